@@ -1,16 +1,31 @@
 import pygame
 import math
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from typing import List, Tuple, Optional, Set, Dict
 import sys
 import random
+import os
+import json
+import hashlib
+import multiprocessing
+import threading
+import time
+import struct
+import zlib
+from array import array
 
 # Konstanten
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
 HEX_SIZE = 35
 FPS = 60
+IDLE_WAIT_MS = 500  # Maximale Wartezeit auf Events, wenn nichts animiert wird
+TIMELINE_RECT = (WINDOW_WIDTH // 2 - 400, WINDOW_HEIGHT - 50, 800, 10)  # Zeitleiste der Wiederholung
+EVAL_BAR_RECT = (40, 170, 24, 440)  # Bewertungsbalken des Analysemodus
+ANALYSIS_LINES = 3  # Hinweiszüge im Analysemodus
+ANALYSIS_BUDGET = 0.008  # Rechenzeit der Analyse pro Frame in Sekunden
+EVAL_BAR_SCALE = 1000.0  # Bewertung, bei der der Balken zu 76 % gefüllt ist (eine Kugel)
 
 # Basis Enums (müssen vor Settings definiert werden)
 class GameState(Enum):
@@ -19,6 +34,9 @@ class GameState(Enum):
 	GAME_PVP = 'game_pvp'
 	GAME_AI = 'game_ai'
 	GAME_2V2 = 'game_2v2'
+	REPLAY = 'replay'
+
+GAME_STATES = (GameState.GAME_PVP, GameState.GAME_AI, GameState.GAME_2V2, GameState.REPLAY)
 
 class Theme(Enum):
 	CLASSIC = 'classic'
@@ -32,13 +50,27 @@ class AIDifficulty(Enum):
 	HARD = 3
 
 # Einstellungen und Konfiguration
+ENGINE_ALPHABETA = 'alphabeta'
+ENGINE_MCTS = 'mcts'
+AI_ENGINES = (ENGINE_ALPHABETA, ENGINE_MCTS)
+
+
 class Settings:
 	def __init__(self):
 		self.current_theme = Theme.CLASSIC
 		self.sound_enabled = True
 		self.ai_difficulty = AIDifficulty.MEDIUM
+		self.ai_engine = ENGINE_ALPHABETA  # Suchverfahren der KI (AI_ENGINES)
+		self.board_animation = True  # Leichtes Wippen des Bretts
+		self.ai_thinking_fps = None  # FPS-Obergrenze während die KI rechnet (None = keine)
+		self.dirty_rect_rendering = False  # Nur geänderte Bereiche an das Display übergeben
+
+	def board_bob_active(self):
+		"""Das Wippen verschiebt das ganze Brett und ist daher mit Dirty-Rects aus"""
+		return self.board_animation and not self.dirty_rect_rendering
 		
-	def get_theme_colors(self):
+	def get_theme_colors(self, theme=None):
+		"""Farben eines Themes - ohne Angabe die des aktuellen"""
 		themes = {
 			Theme.CLASSIC: {
 				'background': (15, 20, 35),
@@ -81,37 +113,139 @@ class Settings:
 				'button_end': (0, 100, 0)
 			}
 		}
-		return themes[self.current_theme]
+		return themes[theme or self.current_theme]
 
 # Globale Einstellungen
 SETTINGS = Settings()
 
+# Gewichte der Stellungsbewertung (können per abalone_tuning.py angepasst werden)
+DEFAULT_EVAL_WEIGHTS = {
+	'score': 1000,
+	'center': 50,
+	'material': 20,
+	'cohesion': 5,
+	'edge': 0,
+	'danger': -250,
+}
+EVAL_WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abalone_weights.json')
+
+# Zentrumsfelder für die Bewertung (Axialkoordinaten)
+CENTER_POSITIONS = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]
+
+
+def load_eval_weights(path=EVAL_WEIGHTS_FILE):
+	"""Lädt Bewertungsgewichte - fehlende Datei oder Einträge fallen auf die Standardwerte zurück"""
+	weights = dict(DEFAULT_EVAL_WEIGHTS)
+	try:
+		with open(path, encoding='utf-8') as f:
+			stored = json.load(f)
+	except FileNotFoundError:
+		return weights
+	except (OSError, ValueError) as e:
+		print(f"Gewichtsdatei {path} nicht lesbar: {e}")
+		return weights
+
+	for name in weights:
+		if name in stored:
+			weights[name] = float(stored[name])
+	return weights
+
+@dataclass(frozen=True)
+class SearchProfile:
+	"""Suchparameter einer Spielstärke
+
+	Ohne time_limit hängt das Ergebnis nur von Stellung, Budget und seed ab und
+	ist damit auf jeder Maschine reproduzierbar.
+	"""
+	name: str
+	max_depth: int
+	node_limit: Optional[int] = None  # Knotenbudget pro Zug
+	time_limit: Optional[float] = None  # Zeitbudget pro Zug in Sekunden
+	noise: float = 0.0  # Standardabweichung des Rauschens auf den Wurzelbewertungen
+	random_move_rate: float = 0.0  # Anteil zufällig gewählter Züge
+	heuristic_only: bool = False  # Schnellbewertung statt Suche
+	seed: int = 0
+	simulations: Optional[int] = None  # Budget der MCTS-Suche (abalone_mcts), sonst node_limit
+
+
+SEARCH_PROFILES = {profile.name: profile for profile in (
+	SearchProfile('easy', max_depth=1, random_move_rate=0.5, heuristic_only=True, seed=1),
+	SearchProfile('medium', max_depth=2, node_limit=500, seed=2, simulations=300),
+	SearchProfile('hard', max_depth=3, node_limit=6000, seed=3, simulations=2000),
+	SearchProfile('blitz', max_depth=3, time_limit=0.25, seed=4),  # Zeitbudget, nicht reproduzierbar
+)}
+
+
+@dataclass
+class SearchResult:
+	"""Ergebnis von AbaloneAI.search"""
+	move: Optional[tuple]  # (Kugeln, Zielfeld) wie bei get_best_move
+	score: float
+	depth: int
+	nodes: int
+	time: float
+	pv: list = field(default_factory=list)
+	lines: list = field(default_factory=list)  # AnalysisLine je Zug, nur bei AbaloneAI.analyze
+
+	@property
+	def nps(self):
+		"""Knoten pro Sekunde"""
+		return int(self.nodes / self.time) if self.time > 0 else 0
+
+
+@dataclass
+class AnalysisLine:
+	"""Ein Wurzelzug der Multi-PV-Analyse"""
+	move: tuple
+	score: float
+	pv: list
+
+
 class AbaloneAI:
 	"""KI-Gegner für Abalone mit verschiedenen Schwierigkeitsgraden"""
 	
-	def __init__(self, difficulty=AIDifficulty.MEDIUM):
+	def __init__(self, difficulty=AIDifficulty.MEDIUM, weights=None, profile=None, analysis_cache=None,
+				 ntuple_weights=None):
 		self.difficulty = difficulty
-		self.max_depth = self._get_max_depth()
+		# Suchprofil: Name aus SEARCH_PROFILES, SearchProfile oder das der Schwierigkeit
+		if profile is None:
+			profile = difficulty.name.lower()
+		self.profile = SEARCH_PROFILES[profile] if isinstance(profile, str) else profile
+		self.max_depth = self.profile.max_depth
+		self.rng = random.Random(self.profile.seed)
 		self.thinking_time = 0.0  # Keine künstliche Denkzeit
 		self.move_cache = {}  # Cache für berechnete Züge
-		
-	def _get_max_depth(self):
-		"""Bestimmt die Suchtiefe basierend auf Schwierigkeit"""
-		if self.difficulty == AIDifficulty.EASY:
-			return 1  # Reduziert für bessere Performance
-		elif self.difficulty == AIDifficulty.MEDIUM:
-			return 2  # Reduziert für bessere Performance
-		else:  # HARD
-			return 3  # Reduziert für bessere Performance
-	
-	def get_best_move(self, game, player):
-		"""Findet den besten Zug für den gegebenen Spieler - optimiert für Performance"""
-		# Vereinfachter Cache-Key (Performance-Problem behoben)
-		board_hash = hash(tuple(sorted((pos.q, pos.r, p.value if p else None) for pos, p in game.board.items())))
-		cache_key = (board_hash, player.value, self.difficulty.value)
-		
-		if cache_key in self.move_cache:
-			return self.move_cache[cache_key]
+		self.analysis_cache = analysis_cache  # Persistenter Cache (z.B. abalone_cache.AnalysisCache)
+		self.weights = weights if weights is not None else load_eval_weights()
+		# Gelernte N-Tupel-Tabellen (None = ohne N-Tupel-Bewertung)
+		self.ntuple_weights = ntuple_weights if ntuple_weights is not None else load_ntuple_weights()
+		self.nodes = 0  # Besuchte Knoten der laufenden bzw. letzten Suche
+		self._deadline = None  # Zeitbudget der laufenden Suche (perf_counter)
+		self._node_limit = None
+		self._stop_event = threading.Event()  # Stoppsignal der laufenden Suche
+		self._stopped = False
+		
+	def get_best_move(self, game, player, time_limit=None):
+		"""Findet den besten Zug für den gegebenen Spieler - optimiert für Performance
+
+		Tiefe und Budgets kommen aus dem Suchprofil; time_limit ersetzt optional
+		dessen Zeitbudget (in Sekunden). Ist ein Budget erschöpft, wird der beste
+		bis dahin gefundene Zug geliefert.
+		"""
+		profile = self.profile
+		self._begin_search(time_limit or profile.time_limit, self._profile_node_limit())
+
+		# Kanonische Stellung als Cache-Key, sodass symmetrische Stellungen und die
+		# mit vertauschten Farben einen Eintrag teilen; gespeichert wird der Zug der
+		# kanonischen Stellung. Bei Wiederholungen nicht, da der gespeicherte Zug
+		# die Wiederholung sonst fortsetzen würde
+		black, white, black_score, white_score, _ = game.snapshot()
+		canonical, (symmetry, _) = canonical_snapshot((black, white, black_score, white_score, player.value))
+		cache_key = (canonical, self.difficulty.value)
+		use_cache = game.repetitions() <= 1
+		
+		if use_cache and cache_key in self.move_cache:
+			return transform_move(self.move_cache[cache_key], SYMMETRY_INVERSE[symmetry])
 		
 		# Alle möglichen Züge generieren
 		all_moves = self._generate_all_moves_fast(game, player)
@@ -119,54 +253,268 @@ class AbaloneAI:
 		if not all_moves:
 			return None
 		
-		# Bei einfacher Schwierigkeit: schnelle heuristische Auswahl
-		if self.difficulty == AIDifficulty.EASY:
-			# 50% zufällig, 50% beste oberflächliche Bewertung
-			if random.random() < 0.5:
-				best_move = random.choice(all_moves)
-			else:
-				best_move = self._quick_evaluate_moves(game, all_moves, player)
-			self.move_cache[cache_key] = best_move
+		# Zufall pro Stellung neu gesät: gleiche Stellung, gleicher Zug - unabhängig vom Partieverlauf
+		self.rng.seed(profile.seed ^ game.hash)
+		
+		# Zufallszüge und Schnellbewertung (z.B. EASY) - mit dem Zufallsgenerator des Profils
+		if profile.random_move_rate and self.rng.random() < profile.random_move_rate:
+			best_move = self.rng.choice(all_moves)
+		elif profile.heuristic_only:
+			best_move = self._quick_evaluate_moves(game, all_moves, player)
+		else:
+			best_move = None
+		if best_move is not None:
+			if use_cache:
+				self.move_cache[cache_key] = transform_move(best_move, symmetry)
 			return best_move
 		
+		# Gespeicherte Analyse mit ausreichender Tiefe direkt übernehmen
+		if use_cache and self.analysis_cache is not None:
+			cached = self.analysis_cache.probe(game, player, self.max_depth, self.cache_config())
+			if cached is not None:
+				self.move_cache[cache_key] = transform_move(cached.move, symmetry)
+				return cached.move
+		
 		# Für Medium/Hard: Minimax mit verbessertem Pruning
+		# Sortiere Züge für besseres Pruning
+		all_moves.sort(key=lambda m: self._quick_move_score(game, m, player), reverse=True)
+		best_move, best_score, pv = self._search_root(game, player, all_moves, self.max_depth)
+		
+		# Cache das Ergebnis (nur bei erfolgreichen, vollständigen Suchen)
+		if best_move and not self._stopped and use_cache:
+			self.move_cache[cache_key] = transform_move(best_move, symmetry)
+			if self.analysis_cache is not None and not profile.noise:
+				self.analysis_cache.store(game, player, SearchResult(
+					best_move, best_score, self.max_depth, self.nodes, 0.0, pv), self.cache_config())
+		
+		# Cache-Größe begrenzen
+		if len(self.move_cache) > 100:  # Kleinerer Cache für bessere Performance
+			self.move_cache.clear()
+		
+		return best_move
+	
+	def search(self, game, player, depth=None, time_limit=None, node_limit=None, info_callback=None,
+			   stop_event=None):
+		"""Iterative Vertiefung mit Tiefen-, Zeit- und Knotenlimit
+
+		Liefert ein SearchResult der tiefsten abgeschlossenen Iteration; nur wenn
+		schon Tiefe 1 abgebrochen wird, zählt deren bis dahin bester Zug.
+		info_callback wird nach jeder Iteration mit dem Zwischenstand aufgerufen.
+		Ohne jedes Limit gelten Tiefe und Budgets des Suchprofils.
+		stop_event: threading.Event des Aufrufers, das die Suche abbricht - auch
+		wenn es schon gesetzt wird, bevor die Suche in ihrem Thread beginnt.
+		"""
+		if depth is None and time_limit is None and node_limit is None:
+			time_limit, node_limit = self.profile.time_limit, self._profile_node_limit()
+		self._begin_search(time_limit, node_limit, stop_event)
+		started = time.perf_counter()
+		max_depth = depth or self.max_depth
+
+		# Gespeicherte Analyse mit ausreichender Tiefe direkt übernehmen
+		use_cache = self.analysis_cache is not None and game.repetitions() <= 1
+		if use_cache:
+			config = self.cache_config()
+			cached = self.analysis_cache.probe(game, player, max_depth, config)
+			if cached is not None:
+				cached.time = time.perf_counter() - started
+				if info_callback:
+					info_callback(cached)
+				return cached
+
+		moves = self._generate_all_moves_fast(game, player)
+		if not moves:
+			return SearchResult(None, self._evaluate_position(game, player), 0, 0, 0.0)
+		moves.sort(key=lambda m: self._quick_move_score(game, m, player), reverse=True)
+
+		result = None
+		complete = False  # Ob result aus einer vollständigen Iteration stammt
+		for current_depth in range(1, max_depth + 1):
+			best_move, best_score, pv = self._search_root(game, player, moves, current_depth)
+			if self._stopped and result is not None:
+				break  # Abgebrochene Iteration verwerfen
+
+			complete = not self._stopped
+			result = SearchResult(best_move, best_score, current_depth, self.nodes,
+								  time.perf_counter() - started, pv)
+			if info_callback:
+				info_callback(result)
+			if self._stopped:
+				break
+
+			# Besten Zug der letzten Iteration zuerst durchsuchen
+			moves.remove(best_move)
+			moves.insert(0, best_move)
+
+		result.nodes = self.nodes
+		result.time = time.perf_counter() - started
+		if use_cache and complete and not self.profile.noise:
+			self.analysis_cache.store(game, player, result, config)
+		return result
+	
+	def analyze(self, game, player, lines=3, depth=None):
+		"""Multi-PV-Analyse der besten Züge mit Bewertung und Hauptvariante - als Generator
+
+		Alle Züge teilen sich eine Suche: das Fenster an der Wurzel beginnt bei
+		der Bewertung des bisher lines-besten Zugs, genau bewertet werden also
+		nur Züge, die noch unter die besten kommen. Jeder Schritt durchsucht
+		höchstens den Teilbaum einer Antwort des Gegners; der Aufrufer kann
+		nach einem Zeitbudget aufhören und später weitermachen. Geliefert wird
+		None, nach jeder abgeschlossenen Tiefe ein SearchResult mit lines.
+		"""
+		self._begin_search()
+		started = time.perf_counter()
+		game = self._copy_game_state(game)
+
+		moves = self._generate_all_moves_fast(game, player)
+		if not moves:
+			yield SearchResult(None, self._evaluate_position(game, player), 0, 0, 0.0)
+			return
+		moves.sort(key=lambda m: self._quick_move_score(game, m, player), reverse=True)
+		del moves[16:]  # Wie _search_root nur die besten Kandidaten
+
+		for current_depth in range(1, (depth or self.max_depth) + 1):
+			found = []
+			for move in moves:
+				alpha = found[-1].score if len(found) >= lines else float('-inf')
+				pv = []
+				score = yield from self._analyze_move(game, move, player, current_depth, alpha, pv)
+				if score > alpha:
+					found.append(AnalysisLine(move, score, [move] + pv))
+					found.sort(key=lambda line: line.score, reverse=True)
+					del found[lines:]
+				yield None
+
+			best = found[0]
+			yield SearchResult(best.move, best.score, current_depth, self.nodes,
+							   time.perf_counter() - started, best.pv, found)
+
+			# Beste Züge der letzten Tiefe zuerst durchsuchen
+			ranked = [line.move for line in found]
+			moves = ranked + [move for move in moves if move not in ranked]
+
+	def _analyze_move(self, game, move, player, depth, alpha, pv):
+		"""Bewertet einen Wurzelzug für analyze() wie _minimax(depth - 1, alpha, inf, ...)
+
+		Der Knoten des Gegners ist ausgerollt, damit nach jeder seiner
+		Antworten die Kontrolle an den Aufrufer zurückgeht.
+		"""
+		self._execute_move(game, move, player)
+		try:
+			opponent = Player.WHITE if player == Player.BLACK else Player.BLACK
+			replies = None
+			if depth > 2 and game.check_winner() is None and not self._is_search_draw(game):
+				replies = self._generate_all_moves(game, opponent)
+			if not replies:
+				return self._minimax(game, depth - 1, alpha, float('inf'), False, player, pv)
+
+			self.nodes += 1
+			beta = float('inf')
+			child_pv = []
+			for reply in replies:
+				self._execute_move(game, reply, opponent)
+				child_pv.clear()
+				score = self._minimax(game, depth - 2, alpha, beta, True, player, child_pv)
+				game.unmake()
+				if score < beta:
+					beta = score
+					pv[:] = [reply] + child_pv
+				if beta <= alpha:
+					break
+				yield None
+			return beta
+		finally:
+			game.unmake()
+
+	def cache_config(self):
+		"""64-Bit-Kennung der Konfiguration für den Analyse-Cache
+
+		Bewertungen und Züge hängen von Schwierigkeit, Bewertungsgewichten,
+		Suchprofil und N-Tupel-Tabellen ab; der Cache legt Einträge
+		verschiedener Konfigurationen damit getrennt ab. Der Seed zählt nicht
+		mit, da Suchen mit Rauschen ohnehin nicht gespeichert werden.
+		"""
+		profile = replace(self.profile, seed=0)
+		data = repr((type(self).__name__, self.difficulty.value, sorted(self.weights.items()), profile)).encode()
+		if self.ntuple_weights is not None:
+			data += array('f', self.ntuple_weights).tobytes()
+		return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+	def stop(self):
+		"""Bricht die laufende Suche ab (aus einem anderen Thread aufrufbar)
+
+		Eine Suche, die noch nicht begonnen hat, bekommt das nicht mit - wer
+		Suchen in einem Thread startet, übergibt search() ein eigenes stop_event.
+		"""
+		self._stop_event.set()
+	
+	def _profile_node_limit(self):
+		"""Knotenbudget des Suchprofils"""
+		return self.profile.node_limit
+
+	def _begin_search(self, time_limit=None, node_limit=None, stop_event=None):
+		"""Setzt Knotenzähler und Limits für eine neue Suche zurück
+
+		Das Stoppsignal wird nicht zurückgesetzt, sondern ersetzt: durch
+		stop_event des Aufrufers oder ein neues Event.
+		"""
+		self.nodes = 0
+		self._deadline = time.perf_counter() + time_limit if time_limit else None
+		self._node_limit = node_limit
+		self._stop_event = stop_event if stop_event is not None else threading.Event()
+		self._stopped = False
+	
+	def _should_stop(self):
+		"""Prüft, ob die laufende Suche abbrechen muss (Stopp, Zeit- oder Knotenlimit)"""
+		if not self._stopped and (
+				self._stop_event.is_set()
+				or (self._node_limit is not None and self.nodes >= self._node_limit)
+				or (self._deadline is not None and time.perf_counter() >= self._deadline)):
+			self._stopped = True
+		return self._stopped
+	
+	def _search_root(self, game, player, moves, depth):
+		"""Bewertet die sortierten Wurzelzüge - liefert (Zug, Bewertung, Hauptvariante)"""
 		best_move = None
 		best_score = float('-inf')
+		best_pv = []
 		alpha = float('-inf')
 		beta = float('inf')
 		
-		# Sortiere Züge für besseres Pruning
-		all_moves.sort(key=lambda m: self._quick_move_score(game, m, player), reverse=True)
+		# Einmalige Kopie - darunter wird nur noch gezogen und zurückgenommen
+		game = self._copy_game_state(game)
 		
-		for i, move in enumerate(all_moves):
+		for i, move in enumerate(moves):
 			# Begrenze Anzahl der bewerteten Züge für bessere Performance
 			if i > 15:  # Nur die besten 15 Züge bewerten
 				break
+			if best_move and self._should_stop():
+				break  # Zeit- oder Knotenbudget aufgebraucht
 				
 			# Simuliere den Zug
-			game_copy = self._copy_game_state(game)
-			self._execute_move(game_copy, move, player)
+			self._execute_move(game, move, player)
 			
 			# Bewerte den resultierenden Zustand
-			score = self._minimax(game_copy, self.max_depth - 1, alpha, beta, False, player)
+			pv = []
+			score = self._minimax(game, depth - 1, alpha, beta, False, player, pv)
+			game.unmake()
+			if self._stopped and best_move:
+				break  # Nur teilweise durchsucht - der beste vollständige Zug bleibt
+			if self.profile.noise:
+				# Mit Rauschen ohne Anheben von alpha (volles Fenster): nur exakte
+				# Bewertungen dürfen verrauscht werden, keine oberen Schranken
+				score += self.rng.gauss(0, self.profile.noise)
+			else:
+				alpha = max(alpha, score)
 			
 			if score > best_score:
 				best_score = score
 				best_move = move
+				best_pv = [move] + pv
 				
-			alpha = max(alpha, score)
 			if beta <= alpha:
 				break  # Alpha-Beta-Pruning
 		
-		# Cache das Ergebnis (nur bei erfolgreichen Zügen)
-		if best_move:
-			self.move_cache[cache_key] = best_move
-		
-		# Cache-Größe begrenzen
-		if len(self.move_cache) > 100:  # Kleinerer Cache für bessere Performance
-			self.move_cache.clear()
-		
-		return best_move
+		return best_move, best_score, best_pv
 	
 	def _quick_evaluate_moves(self, game, moves, player):
 		"""Schnelle oberflächliche Bewertung von Zügen"""
@@ -183,7 +531,7 @@ class AbaloneAI:
 	
 	def _quick_move_score(self, game, move, player):
 		"""Schnelle Bewertung eines einzelnen Zugs"""
-		selected_marbles, target = move
+		target = move.target
 		score = 0
 		
 		# Bewertung basierend auf Zentrum
@@ -191,13 +539,13 @@ class AbaloneAI:
 		score -= center_distance * 2
 		
 		# Bewertung für Angriffszüge
-		if game.board.get(target) != Player.EMPTY:
+		if move.kind == MoveKind.PUSH:
 			score += 50  # Bonus für Pushen
 		
 		return score
 	
 	def _generate_all_moves_fast(self, game, player):
-		"""Generiert alle möglichen Züge für einen Spieler - optimiert und korrekt"""
+		"""Generiert alle möglichen Züge (Move) für einen Spieler - optimiert und korrekt"""
 		moves = []
 		
 		# Finde alle Kugeln des Spielers
@@ -205,9 +553,7 @@ class AbaloneAI:
 		
 		# Einzelne Kugeln - verwende die bewährte Methode
 		for marble in player_marbles:
-			valid_moves = game.calculate_valid_moves([marble])
-			for target in valid_moves:
-				moves.append(([marble], target))
+			moves.extend(game.moves_for_selection([marble]))
 		
 		# Nur bei höheren Schwierigkeiten: 2er-Kombinationen
 		if self.difficulty != AIDifficulty.EASY and len(player_marbles) > 1:
@@ -215,9 +561,7 @@ class AbaloneAI:
 				for j in range(i + 1, min(len(player_marbles), 8)):
 					marble_combo = [player_marbles[i], player_marbles[j]]
 					if game._are_marbles_in_line(marble_combo):
-						valid_moves = game.calculate_valid_moves(marble_combo)
-						for target in valid_moves:
-							moves.append((marble_combo, target))
+						moves.extend(game.moves_for_selection(marble_combo))
 		
 		# Nur bei HARD: 3er-Kombinationen
 		if self.difficulty == AIDifficulty.HARD and len(player_marbles) > 2:
@@ -226,9 +570,7 @@ class AbaloneAI:
 					for k in range(j + 1, min(len(player_marbles), 6)):
 						marble_combo = [player_marbles[i], player_marbles[j], player_marbles[k]]
 						if game._are_marbles_in_line(marble_combo):
-							valid_moves = game.calculate_valid_moves(marble_combo)
-							for target in valid_moves:
-								moves.append((marble_combo, target))
+							moves.extend(game.moves_for_selection(marble_combo))
 		
 		return moves
 	
@@ -236,15 +578,22 @@ class AbaloneAI:
 		"""Legacy-Methode für Kompatibilität"""
 		return self._generate_all_moves_fast(game, player)
 	
-	def _minimax(self, game, depth, alpha, beta, maximizing_player, ai_player):
-		"""Minimax-Algorithmus mit Alpha-Beta-Pruning"""
+	def _minimax(self, game, depth, alpha, beta, maximizing_player, ai_player, pv=None):
+		"""Minimax-Algorithmus mit Alpha-Beta-Pruning
+
+		Ist pv eine Liste, wird sie mit der Hauptvariante ab diesem Knoten gefüllt.
+		"""
+		self.nodes += 1
+		
 		# Terminalbedingungen
 		winner = game.check_winner()
 		if winner == ai_player:
 			return 1000 + depth  # Bevorzuge schnelle Siege
 		elif winner is not None:
 			return -1000 - depth  # Vermeide schnelle Niederlagen
-		elif depth == 0:
+		elif self._is_search_draw(game):
+			return DRAW_SCORE
+		elif depth == 0 or self._should_stop():
 			return self._evaluate_position(game, ai_player)
 		
 		current_player = ai_player if maximizing_player else (Player.WHITE if ai_player == Player.BLACK else Player.BLACK)
@@ -253,13 +602,19 @@ class AbaloneAI:
 		if not moves:
 			return self._evaluate_position(game, ai_player)
 		
+		child_pv = [] if pv is not None else None
 		if maximizing_player:
 			max_eval = float('-inf')
 			for move in moves:
-				game_copy = self._copy_game_state(game)
-				self._execute_move(game_copy, move, current_player)
-				eval_score = self._minimax(game_copy, depth - 1, alpha, beta, False, ai_player)
-				max_eval = max(max_eval, eval_score)
+				self._execute_move(game, move, current_player)
+				if child_pv is not None:
+					child_pv.clear()
+				eval_score = self._minimax(game, depth - 1, alpha, beta, False, ai_player, child_pv)
+				game.unmake()
+				if eval_score > max_eval:
+					max_eval = eval_score
+					if pv is not None:
+						pv[:] = [move] + child_pv
 				alpha = max(alpha, eval_score)
 				if beta <= alpha:
 					break
@@ -267,41 +622,70 @@ class AbaloneAI:
 		else:
 			min_eval = float('inf')
 			for move in moves:
-				game_copy = self._copy_game_state(game)
-				self._execute_move(game_copy, move, current_player)
-				eval_score = self._minimax(game_copy, depth - 1, alpha, beta, True, ai_player)
-				min_eval = min(min_eval, eval_score)
+				self._execute_move(game, move, current_player)
+				if child_pv is not None:
+					child_pv.clear()
+				eval_score = self._minimax(game, depth - 1, alpha, beta, True, ai_player, child_pv)
+				game.unmake()
+				if eval_score < min_eval:
+					min_eval = eval_score
+					if pv is not None:
+						pv[:] = [move] + child_pv
 				beta = min(beta, eval_score)
 				if beta <= alpha:
 					break
 			return min_eval
 	
+	def _is_search_draw(self, game):
+		"""Remis in der Suche: schon eine Wiederholung gilt, da sie sich beliebig fortsetzen ließe"""
+		if game.repetition_limit and game.repetitions() > 1:
+			return True
+		return bool(game.quiet_ply_limit) and game.quiet_plies >= game.quiet_ply_limit
+	
 	def _evaluate_position(self, game, ai_player):
 		"""Bewertet eine Spielposition aus Sicht der KI - optimiert"""
 		opponent = Player.WHITE if ai_player == Player.BLACK else Player.BLACK
+		weights = self.weights
 		
 		score = 0
 		
 		# 1. Scores (wichtigster Faktor)
-		score += (game.scores[ai_player] - game.scores[opponent]) * 1000
+		score += (game.scores[ai_player] - game.scores[opponent]) * weights['score']
 		
 		# 2. Schnelle zentrale Kontrolle
-		center_positions = [(0, 0), (1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]
-		ai_center = sum(1 for q, r in center_positions if game.board.get(Hex(q, r)) == ai_player)
-		opp_center = sum(1 for q, r in center_positions if game.board.get(Hex(q, r)) == opponent)
-		score += (ai_center - opp_center) * 50
+		ai_center = sum(1 for q, r in CENTER_POSITIONS if game.board.get(Hex(q, r)) == ai_player)
+		opp_center = sum(1 for q, r in CENTER_POSITIONS if game.board.get(Hex(q, r)) == opponent)
+		score += (ai_center - opp_center) * weights['center']
 		
 		# 3. Vereinfachte Kugel-Anzahl
 		ai_count = sum(1 for p in game.board.values() if p == ai_player)
 		opp_count = sum(1 for p in game.board.values() if p == opponent)
-		score += (ai_count - opp_count) * 20
+		score += (ai_count - opp_count) * weights['material']
 		
-		# 4. Nur bei höherer Schwierigkeit: erweiterte Bewertung
-		if self.difficulty == AIDifficulty.HARD:
-			# Zusammenhalt (reduziert)
+		# 4. Zusammenhalt (reduziert) - wie alle Merkmale bei jeder Schwierigkeit,
+		# da abalone_tuning die Gewichte für genau diese Bewertung anpasst
+		if weights['cohesion']:
 			ai_cohesion = self._calculate_cohesion_fast(game, ai_player)
 			opp_cohesion = self._calculate_cohesion_fast(game, opponent)
-			score += (ai_cohesion - opp_cohesion) * 5
+			score += (ai_cohesion - opp_cohesion) * weights['cohesion']
+		
+		# 5. Kugeln am Rand (nur wenn ein Gewicht eingestellt ist)
+		if weights['edge']:
+			edge = self._calculate_edge_penalty(game, ai_player) - self._calculate_edge_penalty(game, opponent)
+			score += edge * weights['edge']
+		
+		# 6. Randkugeln, die per Sumito hinausgeschoben werden können
+		if weights['danger']:
+			state = game.patterns.get('danger')
+			danger = state.value if state is not None else self._ejection_threats(game)
+			if ai_player != Player.BLACK:
+				danger = -danger
+			score += danger * weights['danger']
+		
+		# 7. N-Tupel-Muster (inkrementell mitgeführt, aus Sicht von Schwarz)
+		state = game.patterns.get('ntuple')
+		if state is not None:
+			score += state.value if ai_player == Player.BLACK else -state.value
 		
 		return score
 	
@@ -324,39 +708,102 @@ class AbaloneAI:
 	
 	def _calculate_edge_penalty(self, game, player):
 		"""Berechnet die Strafe für Kugeln am Randbereich"""
-		penalty = 0
-		edge_positions = []
-		
-		# Bestimme Randpositionen (Positionen mit weniger als 6 Nachbarn auf dem Brett)
-		for pos in game.board:
-			neighbor_count = 0
-			for direction in range(6):
-				neighbor = pos.neighbor(direction)
-				if neighbor in game.board:
-					neighbor_count += 1
-			if neighbor_count < 6:
-				edge_positions.append(pos)
-		
-		# Zähle eigene Kugeln am Rand
-		for pos in edge_positions:
-			if game.board[pos] == player:
-				penalty += 1
-		
-		return penalty
+		board = game.board
+		return sum(1 for pos in EDGE_CELLS if board[pos] == player)
+	
+	@staticmethod
+	def _ejection_threats(game):
+		"""Gefährdete schwarze minus weiße Randkugeln, ohne mitgeführten Zustand neu berechnet"""
+		return PatternState(EJECTION_PATTERNS, EJECTION_TABLE, game.board).value
 	
 	def _copy_game_state(self, game):
-		"""Erstellt eine Kopie des Spielzustands"""
-		new_game = AbaloneGame()
-		new_game.board = game.board.copy()
-		new_game.current_player = game.current_player
-		new_game.scores = game.scores.copy()
-		return new_game
+		"""Erstellt eine Kopie des Spielzustands - mit den Musterzuständen, die die Bewertung braucht"""
+		game = game.copy()
+		if self.weights['danger']:
+			game.patterns['danger'] = PatternState(EJECTION_PATTERNS, EJECTION_TABLE, game.board)
+		if self.ntuple_weights is not None:
+			game.patterns['ntuple'] = PatternState(NTUPLE_PATTERNS, self.ntuple_weights, game.board)
+		return game
 	
 	def _execute_move(self, game, move, player):
-		"""Führt einen Zug in einer Spielkopie aus"""
-		selected_marbles, target = move
-		game.current_player = player
-		game.make_move(selected_marbles, target)
+		"""Führt einen Zug in einer Spielkopie aus (Rücknahme mit game.unmake())"""
+		if game.current_player != player:
+			game.current_player = player
+			game.rehash()
+		game.apply(move)
+
+def create_ai(difficulty=AIDifficulty.MEDIUM, engine=ENGINE_ALPHABETA, **kwargs):
+	"""Erstellt die KI für das gewählte Suchverfahren (siehe AI_ENGINES)"""
+	if engine == ENGINE_MCTS:
+		from abalone_mcts import MCTSAI  # benötigt NumPy, daher erst bei Bedarf
+		return MCTSAI(difficulty, **kwargs)
+	if engine != ENGINE_ALPHABETA:
+		raise ValueError(f"Unbekanntes Suchverfahren: {engine}")
+	return AbaloneAI(difficulty, **kwargs)
+
+
+class AIProcess:
+	"""KI-Gegner in einem eigenen Prozess, damit die Suche die Oberfläche nicht ausbremst
+
+	Der Prozess erhält je Anfrage nur einen kompakten Zustand (snapshot() plus
+	Wiederholungszähler) und antwortet mit einem Zugcode aus
+	abalone_archive.encode_move. Das Spiel selbst verändert nur der
+	Hauptthread, der das Ergebnis mit poll() abholt.
+	"""
+
+	def __init__(self, difficulty=AIDifficulty.MEDIUM, engine=ENGINE_ALPHABETA):
+		self.difficulty = difficulty
+		self.engine = engine
+		# spawn statt fork: der Prozess erbt weder Fenster noch Audio-Threads von SDL
+		context = multiprocessing.get_context('spawn')
+		self._conn, child_conn = context.Pipe()
+		self._process = context.Process(target=_ai_process_main, args=(child_conn, difficulty.value, engine),
+										daemon=True)
+		self._process.start()
+		child_conn.close()
+		self.pending = False
+
+	def request(self, game, player):
+		"""Startet die Suche für player in der Stellung von game"""
+		self._conn.send((game.snapshot(), game.position_counts, game.quiet_plies, player.value))
+		self.pending = True
+
+	def poll(self):
+		"""(Zugcode oder None, Fehlermeldung oder None), sobald die Suche fertig ist - sonst None"""
+		if not self.pending or not self._conn.poll():
+			return None
+		self.pending = False
+		try:
+			return self._conn.recv()
+		except (EOFError, OSError):
+			return None, "KI-Prozess beendet"
+
+	def close(self):
+		"""Beendet den Prozess - eine laufende Suche wird abgebrochen"""
+		self._process.terminate()
+		self._process.join()
+		self._conn.close()
+
+
+def _ai_process_main(conn, difficulty, engine):
+	"""Hauptschleife des KI-Prozesses: beantwortet Suchanfragen bis zum Ende der Verbindung"""
+	from abalone_archive import encode_move
+
+	ai = create_ai(AIDifficulty(difficulty), engine)
+	while True:
+		try:
+			snapshot, position_counts, quiet_plies, player = conn.recv()
+		except EOFError:
+			break
+		game = AbaloneGame.from_snapshot(snapshot)
+		game.position_counts = position_counts
+		game.quiet_plies = quiet_plies
+		try:
+			move = ai.get_best_move(game, Player(player))
+			conn.send((encode_move(*move) if move else None, None))
+		except Exception as e:
+			conn.send((None, str(e)))
+
 
 class Menu:
 	"""Basis-Klasse für alle Menüs"""
@@ -426,6 +873,9 @@ class MainMenu(Menu):
 
 class SettingsMenu(Menu):
 	"""Einstellungsmenü"""
+	THEME_NAMES = {Theme.CLASSIC: "Classic", Theme.DARK: "Dark", Theme.OCEAN: "Ocean", Theme.FOREST: "Forest"}
+	AI_LEVELS = {AIDifficulty.EASY: "Leicht", AIDifficulty.MEDIUM: "Mittel", AIDifficulty.HARD: "Schwer"}
+
 	def __init__(self, screen, font, large_font):
 		super().__init__(screen, font, large_font)
 		self.setup_buttons()
@@ -438,36 +888,55 @@ class SettingsMenu(Menu):
 		right_col_x = center_x + 40
 		col_width = 280
 		
-		# Theme-Buttons (linke Spalte)
+		# Theme-Buttons (linke Spalte) - Beschriftungen setzt refresh()
 		theme_start_y = 220
-		theme_names = ["Classic", "Dark", "Ocean", "Forest"]
-		themes = [Theme.CLASSIC, Theme.DARK, Theme.OCEAN, Theme.FOREST]
-		
-		for i, (name, theme) in enumerate(zip(theme_names, themes)):
-			prefix = "✓ " if SETTINGS.current_theme == theme else "  "
+		for i, theme in enumerate(self.THEME_NAMES):
 			self.add_button(left_col_x, theme_start_y + i*55, 
-							col_width, button_height, f"{prefix}{name}", f"theme_{theme.value}")
+							col_width, button_height, "", f"theme_{theme.value}")
 		
 		# Audio & KI Settings (rechte Spalte)
 		audio_start_y = 220
 		
 		# Sound-Button
-		sound_text = "✓ Sound An" if SETTINGS.sound_enabled else "  Sound Aus"
 		self.add_button(right_col_x, audio_start_y, 
-						col_width, button_height, sound_text, "toggle_sound")
+						col_width, button_height, "", "toggle_sound")
 		
 		# KI-Schwierigkeit
-		ai_levels = ["Leicht", "Mittel", "Schwer"]
-		difficulties = [AIDifficulty.EASY, AIDifficulty.MEDIUM, AIDifficulty.HARD]
-		
-		for i, (name, diff) in enumerate(zip(ai_levels, difficulties)):
-			prefix = "✓ " if SETTINGS.ai_difficulty == diff else "  "
+		for i, diff in enumerate(self.AI_LEVELS):
 			self.add_button(right_col_x, audio_start_y + (i+1)*55, 
-							col_width, button_height, f"{prefix}KI {name}", f"ai_{diff.value}")
+							col_width, button_height, "", f"ai_{diff.value}")
+		
+		# Dirty-Rect-Rendering
+		self.add_button(right_col_x, audio_start_y + 4*55, 
+						col_width, button_height, "", "toggle_dirty_rects")
+		
+		# Suchverfahren der KI
+		self.add_button(right_col_x, audio_start_y + 5*55, 
+						col_width, button_height, "", "toggle_ai_engine")
 		
 		# Zurück-Button (zentriert unten)
 		self.add_button(center_x - 150, 550, 
 						300, 50, "Zurück", "back")
+		self.refresh()
+
+	def refresh(self):
+		"""Übernimmt die aktuellen Einstellungen in die Beschriftungen (Häkchen)"""
+		for button in self.buttons:
+			action = button.action
+			if action.startswith("theme_"):
+				theme = Theme(action[len("theme_"):])
+				prefix = "✓ " if SETTINGS.current_theme == theme else "  "
+				button.text = f"{prefix}{self.THEME_NAMES[theme]}"
+			elif action == "toggle_sound":
+				button.text = "✓ Sound An" if SETTINGS.sound_enabled else "  Sound Aus"
+			elif action.startswith("ai_"):
+				diff = AIDifficulty(int(action[len("ai_"):]))
+				prefix = "✓ " if SETTINGS.ai_difficulty == diff else "  "
+				button.text = f"{prefix}KI {self.AI_LEVELS[diff]}"
+			elif action == "toggle_dirty_rects":
+				button.text = "✓ Teilupdates An" if SETTINGS.dirty_rect_rendering else "  Teilupdates Aus"
+			elif action == "toggle_ai_engine":
+				button.text = "  KI: MCTS" if SETTINGS.ai_engine == ENGINE_MCTS else "  KI: Alpha-Beta"
 	
 	def draw(self):
 		self.draw_background()
@@ -535,6 +1004,7 @@ BOARD_HIGHLIGHT_COLOR = (85, 95, 115)  # Light border
 HIGHLIGHT_COLOR = (102, 187, 106)  # Material Green 400
 VALID_MOVE_COLOR = (102, 187, 106, 120)  # Semi-transparent green
 INVALID_MOVE_COLOR = (244, 67, 54, 80)  # Semi-transparent red
+HINT_COLORS = [(255, 193, 7), (100, 181, 246), (186, 104, 200)]  # Analyse-Hinweise nach Rang
 
 # Marble colors with gradients
 BLACK_MARBLE_DARK = (20, 20, 25)
@@ -566,18 +1036,51 @@ DIRECTIONS = [
 ]
 
 
-@dataclass
+HEX_CACHE_RADIUS = 5  # Brett (Radius 4) plus ein Ring Randfelder außerhalb
+
+
 class Hex:
-	"""Repräsentiert eine Position auf dem Hexagon-Brett"""
-	q: int
-	r: int
+	"""Repräsentiert eine Position auf dem Hexagon-Brett
+
+	Unveränderlich. Felder bis HEX_CACHE_RADIUS werden interniert: Hex(q, r)
+	liefert dafür immer dieselbe Instanz mit vorberechnetem Hash und
+	gecachten Nachbarn. Der Ring außerhalb des Bretts dient als Randfeld, so
+	dass neighbor() für jedes Brettfeld ohne Allokation auskommt.
+	"""
+	__slots__ = ('q', 'r', '_hash', '_neighbors')
+
+	_interned = {}
+
+	def __new__(cls, q, r):
+		cell = cls._interned.get((q, r))
+		if cell is not None:
+			return cell
+		cell = object.__new__(cls)
+		object.__setattr__(cell, 'q', q)
+		object.__setattr__(cell, 'r', r)
+		object.__setattr__(cell, '_hash', hash((q, r)))
+		object.__setattr__(cell, '_neighbors', None)
+		if max(abs(q), abs(r), abs(q + r)) <= HEX_CACHE_RADIUS:
+			cls._interned[(q, r)] = cell
+		return cell
+
+	def __setattr__(self, name, value):
+		raise AttributeError(f"Hex ist unveränderlich ({name})")
+
+	def __reduce__(self):
+		return Hex, (self.q, self.r)
+
+	def __repr__(self):
+		return f"Hex(q={self.q!r}, r={self.r!r})"
 
 	def __hash__(self):
-		return hash((self.q, self.r))
+		return self._hash
 
 	def __eq__(self, other):
-		if other is None:
-			return False
+		if self is other:
+			return True
+		if not isinstance(other, Hex):
+			return NotImplemented if other is not None else False
 		return self.q == other.q and self.r == other.r
 
 	def __lt__(self, other):
@@ -599,8 +1102,12 @@ class Hex:
 
 	def neighbor(self, direction_index):
 		"""Gibt den Nachbarn in der angegebenen Richtung zurück"""
-		dq, dr = DIRECTIONS[direction_index]
-		return Hex(self.q + dq, self.r + dr)
+		neighbors = self._neighbors
+		if neighbors is None:
+			neighbors = tuple(Hex(self.q + dq, self.r + dr) for dq, dr in DIRECTIONS)
+			if Hex._interned.get((self.q, self.r)) is self:
+				object.__setattr__(self, '_neighbors', neighbors)
+		return neighbors[direction_index]
 
 	def to_pixel(self, center_x, center_y):
 		"""Konvertiert Axialkoordinaten zu Pixelkoordinaten"""
@@ -615,6 +1122,410 @@ class Player(Enum):
 	EMPTY = None
 
 
+# Feste Nummerierung der 61 Felder (gleiche Reihenfolge wie AbaloneGame._create_board)
+BOARD_CELLS = [Hex(q, r) for q in range(-4, 5) for r in range(-4, 5) if -4 <= -q - r <= 4]
+CELL_INDEX = {cell: i for i, cell in enumerate(BOARD_CELLS)}
+for _cell in BOARD_CELLS:
+	_cell.neighbor(0)  # Nachbarn der Brettfelder vorab berechnen
+
+# Zobrist-Schlüssel: je Feld und Farbe, Spieler am Zug und Punktestand
+_zobrist_rng = random.Random(0xABA1)
+ZOBRIST_KEYS = {
+	Player.BLACK: {cell: _zobrist_rng.getrandbits(64) for cell in BOARD_CELLS},
+	Player.WHITE: {cell: _zobrist_rng.getrandbits(64) for cell in BOARD_CELLS},
+	Player.EMPTY: {cell: 0 for cell in BOARD_CELLS},
+}
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)  # Weiß am Zug
+ZOBRIST_SCORE_CAP = 7  # Höhere Punktestände teilen sich den Schlüssel von 7
+ZOBRIST_SCORES = {player: [_zobrist_rng.getrandbits(64) for _ in range(ZOBRIST_SCORE_CAP + 1)]
+				  for player in (Player.BLACK, Player.WHITE)}
+
+
+_ZOBRIST_BY_INDEX = {player: [ZOBRIST_KEYS[player][cell] for cell in BOARD_CELLS]
+					 for player in (Player.BLACK, Player.WHITE)}
+
+
+def snapshot_hash(snapshot):
+	"""Zobrist-Hash eines Snapshots - derselbe Wert wie AbaloneGame.hash der Stellung"""
+	black, white, black_score, white_score, player = snapshot
+	h = ZOBRIST_SIDE if player == Player.WHITE.value else 0
+	for mask, keys in ((black, _ZOBRIST_BY_INDEX[Player.BLACK]), (white, _ZOBRIST_BY_INDEX[Player.WHITE])):
+		while mask:
+			low = mask & -mask
+			h ^= keys[low.bit_length() - 1]
+			mask ^= low
+	h ^= ZOBRIST_SCORES[Player.BLACK][min(black_score, ZOBRIST_SCORE_CAP)]
+	h ^= ZOBRIST_SCORES[Player.WHITE][min(white_score, ZOBRIST_SCORE_CAP)]
+	return h
+
+# --- Brettsymmetrien ---
+#
+# Das Brett hat 12 Symmetrien: 6 Drehungen um 60°, jeweils mit und ohne
+# Spiegelung (Symmetrie s: erst spiegeln, wenn s >= 6, dann s % 6 mal drehen).
+# Dazu kommt der Farbtausch: dieselbe Stellung mit vertauschten Farben und
+# dem anderen Spieler am Zug ist gleichwertig. canonical_snapshot() wählt
+# einen festen Vertreter je Klasse, Caches und Datensätze speichern unter
+# diesem und bilden Züge mit transform_move() hin und zurück ab.
+
+SYMMETRY_COUNT = 12
+
+
+def _symmetry_image(cell, symmetry):
+	q, r = cell.q, cell.r
+	if symmetry >= 6:
+		q, r = r, q  # Spiegelung an der Achse q = r
+	for _ in range(symmetry % 6):
+		q, r = -r, q + r  # Drehung um 60°
+	return Hex(q, r)
+
+
+def _direction_image(direction, symmetry):
+	image = _symmetry_image(Hex(*DIRECTIONS[direction]), symmetry)
+	return image.q, image.r
+
+
+# Feldindex -> Feldindex des Bildes, Richtung -> Richtung des Bildes (Abbildung ist linear)
+SYMMETRY_CELLS = [[CELL_INDEX[_symmetry_image(cell, symmetry)] for cell in BOARD_CELLS]
+				  for symmetry in range(SYMMETRY_COUNT)]
+SYMMETRY_DIRECTIONS = [[DIRECTIONS.index(_direction_image(direction, symmetry)) for direction in range(6)]
+					   for symmetry in range(SYMMETRY_COUNT)]
+SYMMETRY_INVERSE = [next(inverse for inverse in range(SYMMETRY_COUNT)
+						 if all(SYMMETRY_CELLS[inverse][j] == i for i, j in enumerate(SYMMETRY_CELLS[symmetry])))
+					for symmetry in range(SYMMETRY_COUNT)]
+
+
+def _build_symmetry_bytes():
+	"""Je Symmetrie 8 Tabellen: Bytewert an Byteposition k der Maske -> Bild als Maske"""
+	tables = []
+	for cells in SYMMETRY_CELLS:
+		per_byte = []
+		for offset in range(0, 64, 8):
+			table = [0] * 256
+			for value in range(1, 256):
+				low = value & -value
+				index = offset + low.bit_length() - 1
+				image = 1 << cells[index] if index < len(cells) else 0
+				table[value] = table[value ^ low] | image
+			per_byte.append(table)
+		tables.append(per_byte)
+	return tables
+
+
+_SYMMETRY_BYTES = _build_symmetry_bytes()
+
+
+def transform_mask(mask, symmetry):
+	"""Bildet eine Feldmaske (Bits in der Reihenfolge von BOARD_CELLS) mit einer Symmetrie ab"""
+	t0, t1, t2, t3, t4, t5, t6, t7 = _SYMMETRY_BYTES[symmetry]
+	return (t0[mask & 255] | t1[mask >> 8 & 255] | t2[mask >> 16 & 255] | t3[mask >> 24 & 255]
+			| t4[mask >> 32 & 255] | t5[mask >> 40 & 255] | t6[mask >> 48 & 255] | t7[mask >> 56])
+
+
+def transform_cell(cell, symmetry):
+	"""Bild eines Feldes (auch außerhalb des Bretts) unter einer Symmetrie"""
+	index = CELL_INDEX.get(cell)
+	if index is None:
+		return _symmetry_image(cell, symmetry)
+	return BOARD_CELLS[SYMMETRY_CELLS[symmetry][index]]
+
+
+def transform_move(move, symmetry):
+	"""Bild eines Move unter einer Symmetrie - zurück mit SYMMETRY_INVERSE[symmetry]"""
+	return Move(tuple(transform_cell(cell, symmetry) for cell in move.marbles),
+				SYMMETRY_DIRECTIONS[symmetry][move.direction], move.kind,
+				tuple(transform_cell(cell, symmetry) for cell in move.pushed))
+
+
+def canonical_snapshot(snapshot):
+	"""Kanonischer Vertreter eines Snapshots unter den 12 Symmetrien und dem Farbtausch
+
+	Ist Weiß am Zug, werden die Farben getauscht, sodass immer Schwarz zieht;
+	von den 12 Bildern gilt das mit dem kleinsten (Schwarz, Weiß)-Maskenpaar.
+	Liefert (Snapshot, (Symmetrie, getauscht)). Ein Zug der Stellung wird mit
+	transform_move(move, symmetrie) zum Zug der kanonischen Stellung, ein
+	Zug der kanonischen mit SYMMETRY_INVERSE[symmetrie] zurück. Bewertungen
+	aus Sicht des Spielers am Zug bleiben gleich, Ergebnisse aus Sicht von
+	Schwarz wechseln beim Farbtausch das Vorzeichen.
+	"""
+	black, white, black_score, white_score, player = snapshot
+	swapped = player != Player.BLACK.value
+	if swapped:
+		black, white, black_score, white_score = white, black, white_score, black_score
+
+	best = None
+	best_symmetry = 0
+	for symmetry in range(SYMMETRY_COUNT):
+		image = transform_mask(black, symmetry)
+		if best is not None and image > best[0]:
+			continue  # Schwarz allein entscheidet schon
+		key = (image, transform_mask(white, symmetry))
+		if best is None or key < best:
+			best = key
+			best_symmetry = symmetry
+	return (best[0], best[1], black_score, white_score, Player.BLACK.value), (best_symmetry, swapped)
+
+CHECKPOINT_INTERVAL = 16  # Halbzüge zwischen vollständigen Snapshots im Verlauf
+
+# Remisregeln (0 bzw. None schaltet die jeweilige Regel ab)
+REPETITION_LIMIT = 3  # Wie oft dieselbe Stellung auftreten darf
+QUIET_PLY_LIMIT = 100  # Halbzüge ohne hinausgeschobene Kugel
+DRAW_SCORE = 0  # Bewertung eines Remis in der Suche
+
+
+# --- Muster-Bewertung (N-Tupel, Ausschubgefahr) ---
+# Ein Muster ist eine feste Folge von Feldern; deren Belegung (leer/schwarz/weiß)
+# ergibt einen Index zur Basis 3 in die Tabelle des Musters. Die Summe der
+# Tabelleneinträge wird mit den Zügen inkrementell nachgeführt (PatternState).
+
+PATTERN_CODES = {Player.EMPTY: 0, Player.BLACK: 1, Player.WHITE: 2}
+
+
+class PatternSet:
+	"""Feste Feldfolgen (als Indizes in BOARD_CELLS) mit Lage ihrer Tabellen im flachen Array"""
+
+	def __init__(self, tuples):
+		self.tuples = [tuple(cells) for cells in tuples]
+		self.offsets = []  # Beginn der Tabelle jedes Musters
+		self.size = 0
+		for cells in self.tuples:
+			self.offsets.append(self.size)
+			self.size += 3 ** len(cells)
+		# Feld -> [(Muster, Tabellenbeginn, Stellenwert)] für inkrementelle Updates
+		self.by_cell = {cell: [] for cell in BOARD_CELLS}
+		for t, cells in enumerate(self.tuples):
+			for i, index in enumerate(cells):
+				self.by_cell[BOARD_CELLS[index]].append((t, self.offsets[t], 3 ** i))
+
+
+class PatternState:
+	"""Muster-Indizes und Tabellensumme einer Stellung, mit den Zügen inkrementell nachgeführt"""
+	__slots__ = ('patterns', 'table', 'indices', 'value')
+
+	def __init__(self, patterns, table, board):
+		self.patterns = patterns
+		self.table = table
+		self.reset(board)
+
+	def reset(self, board):
+		"""Berechnet Indizes und Summe vollständig neu"""
+		codes = [PATTERN_CODES[board[cell]] for cell in BOARD_CELLS]
+		self.indices = [sum(codes[index] * 3 ** i for i, index in enumerate(cells))
+						for cells in self.patterns.tuples]
+		self.value = sum(self.table[offset + index] for offset, index in zip(self.patterns.offsets, self.indices))
+
+	def update(self, changes, forward=True):
+		"""Übernimmt die Änderungen (Feld, vorher, nachher) eines MoveDelta - rückwärts mit forward=False"""
+		table = self.table
+		indices = self.indices
+		by_cell = self.patterns.by_cell
+		value = self.value
+		for cell, before, after in changes:
+			delta = PATTERN_CODES[after] - PATTERN_CODES[before]
+			if not forward:
+				delta = -delta
+			for t, offset, power in by_cell[cell]:
+				old = indices[t]
+				new = old + delta * power
+				value += table[offset + new] - table[offset + old]
+				indices[t] = new
+		self.value = value
+
+
+def _ring(cell):
+	"""Abstand zur Brettmitte (Randfelder: 4)"""
+	return max(abs(cell.q), abs(cell.r), abs(cell.q + cell.r))
+
+
+# Rand: Feldmengen und Bitmaske über BOARD_CELLS, einmalig vorberechnet
+EDGE_CELLS = frozenset(cell for cell in BOARD_CELLS if _ring(cell) == 4)
+EDGE_MASK = sum(1 << CELL_INDEX[cell] for cell in EDGE_CELLS)
+
+
+# N-Tupel: gelernte Tabellen, Summe ist die Bewertung aus Sicht von Schwarz
+
+NTUPLE_WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abalone_ntuple.bin')
+NTUPLE_MAGIC = b'ABNT'
+NTUPLE_VERSION = 1
+NTUPLE_HEADER = struct.Struct('<4sHI')  # Magic, Version, CRC32 der Tupel-Definition
+
+
+def _build_ntuples():
+	"""Randlinien, zweiter Ring, Sechsecke im Zentrum und Ecken-Dreiecke"""
+	def line(start, end, length):
+		step_q = (end.q - start.q) // (length - 1)
+		step_r = (end.r - start.r) // (length - 1)
+		return [Hex(start.q + step_q * i, start.r + step_r * i) for i in range(length)]
+
+	def corners(radius):
+		return [Hex(dq * radius, dr * radius) for dq, dr in DIRECTIONS]
+
+	tuples = []
+	for radius in (4, 3):
+		ring = corners(radius)
+		for i in range(6):
+			tuples.append(line(ring[i], ring[(i + 1) % 6], radius + 1))
+	for center in [Hex(0, 0)] + corners(2):
+		tuples.append([center] + [center.neighbor(d) for d in range(6)])
+	outer, inner = corners(4), corners(3)
+	for i in range(6):
+		# Ecke, je zwei Felder entlang beider Kanten und das Feld davor
+		tuples.append(line(outer[i], outer[(i + 1) % 6], 5)[:3] + line(outer[i], outer[i - 1], 5)[1:3] + [inner[i]])
+	return [tuple(CELL_INDEX[cell] for cell in cells) for cells in tuples]
+
+
+NTUPLE_PATTERNS = PatternSet(_build_ntuples())
+NTUPLES = NTUPLE_PATTERNS.tuples
+NTUPLE_OFFSETS = NTUPLE_PATTERNS.offsets
+NTUPLE_SIZE = NTUPLE_PATTERNS.size
+NTUPLE_CHECKSUM = zlib.crc32(repr(NTUPLES).encode())
+
+
+def load_ntuple_weights(path=NTUPLE_WEIGHTS_FILE):
+	"""Lädt die N-Tupel-Tabellen als array('f') - None, wenn keine passende Datei existiert"""
+	try:
+		with open(path, 'rb') as f:
+			magic, version, checksum = NTUPLE_HEADER.unpack(f.read(NTUPLE_HEADER.size))
+			table = array('f')
+			table.frombytes(f.read())
+	except FileNotFoundError:
+		return None
+	except (OSError, struct.error) as e:
+		print(f"N-Tupel-Datei {path} nicht lesbar: {e}")
+		return None
+	if magic != NTUPLE_MAGIC or version != NTUPLE_VERSION or checksum != NTUPLE_CHECKSUM or len(table) != NTUPLE_SIZE:
+		print(f"N-Tupel-Datei {path} passt nicht zur Tupel-Definition")
+		return None
+	if sys.byteorder != 'little':
+		table.byteswap()
+	return table
+
+
+# Ausschubgefahr: für jedes Randfeld und jede Richtung, die vom Brett führt, die
+# Linie rückwärts ins Brett. Eine Belegung, in der n (1-2) Kugeln am Rand von
+# m > n (höchstens 3 ziehenden) gegnerischen Kugeln direkt dahinter gefolgt
+# werden, erlaubt einen Sumito, der die Randkugel hinausschiebt.
+
+EJECTION_LINE_LENGTH = 5  # 2 Verteidiger + 3 Angreifer
+
+
+def _build_ejection_lines():
+	lines = []
+	for cell in BOARD_CELLS:
+		if cell not in EDGE_CELLS:
+			continue
+		for direction in range(6):
+			if cell.neighbor(direction) in CELL_INDEX:
+				continue
+			back = (direction + 3) % 6
+			line = [cell]
+			while len(line) < EJECTION_LINE_LENGTH and line[-1].neighbor(back) in CELL_INDEX:
+				line.append(line[-1].neighbor(back))
+			if len(line) >= 3:
+				lines.append(tuple(CELL_INDEX[c] for c in line))
+	return lines
+
+
+def _ejection_value(codes):
+	"""+1, wenn eine schwarze Randkugel hinausgeschoben werden kann, -1 bei Weiß, sonst 0"""
+	defender = codes[0]
+	if defender == 0:
+		return 0
+	attacker = 3 - defender
+	n = 0
+	while n < len(codes) and codes[n] == defender:
+		n += 1
+	m = 0
+	while n + m < len(codes) and codes[n + m] == attacker:
+		m += 1
+	if n <= 2 and min(m, 3) > n:
+		return 1 if defender == 1 else -1
+	return 0
+
+
+def _build_ejection_table(patterns):
+	"""Tabellen aller Linien hintereinander - gleich lange Linien haben dieselben Einträge"""
+	by_length = {}
+	table = array('f')
+	for cells in patterns.tuples:
+		length = len(cells)
+		entries = by_length.get(length)
+		if entries is None:
+			entries = array('f', (_ejection_value([index // 3 ** i % 3 for i in range(length)])
+								  for index in range(3 ** length)))
+			by_length[length] = entries
+		table.extend(entries)
+	return table
+
+
+EJECTION_PATTERNS = PatternSet(_build_ejection_lines())
+EJECTION_TABLE = _build_ejection_table(EJECTION_PATTERNS)  # Summe: gefährdete schwarze minus weiße Kugeln
+
+
+class MoveDelta:
+	"""Kompakte Änderung eines Zugs für den Verlauf
+
+	changes enthält (Feld, vorher, nachher) in Ausführungsreihenfolge;
+	scored ist gesetzt, wenn eine gegnerische Kugel vom Brett geschoben wurde.
+	"""
+	__slots__ = ('move', 'player', 'changes', 'scored', 'hash_before', 'hash_after', 'quiet_before')
+
+	def __init__(self, move, player, changes, scored, hash_before, hash_after, quiet_before):
+		self.move = move
+		self.player = player
+		self.changes = changes
+		self.scored = scored
+		self.hash_before = hash_before
+		self.hash_after = hash_after
+		self.quiet_before = quiet_before
+
+
+class MoveKind(Enum):
+	INLINE = 'inline'
+	BROADSIDE = 'broadside'
+	PUSH = 'push'
+
+
+@dataclass(frozen=True)
+class Move:
+	"""Ein vom Zuggenerator erzeugter Zug - AbaloneGame.apply führt ihn ohne Prüfung aus
+
+	pushed enthält bei einem Sumito die geschobenen gegnerischen Kugeln,
+	von der führenden Kugel aus gesehen.
+	"""
+	marbles: Tuple[Hex, ...]
+	direction: int
+	kind: MoveKind
+	pushed: Tuple[Hex, ...] = ()
+
+	@property
+	def lead(self):
+		"""Führende Kugel in Zugrichtung"""
+		dq, dr = DIRECTIONS[self.direction]
+		return max(self.marbles, key=lambda m: m.q * dq + m.r * dr)
+
+	@property
+	def tail(self):
+		"""Letzte Kugel in Zugrichtung"""
+		dq, dr = DIRECTIONS[self.direction]
+		return min(self.marbles, key=lambda m: m.q * dq + m.r * dr)
+
+	@property
+	def target(self):
+		"""Zielfeld wie bei calculate_valid_moves bzw. make_move"""
+		if self.kind == MoveKind.BROADSIDE:
+			return self.marbles[0].neighbor(self.direction)
+		return self.lead.neighbor(self.direction)
+
+	@property
+	def destinations(self):
+		"""Neue Felder der eigenen Kugeln (in der Reihenfolge von marbles)"""
+		return tuple(marble.neighbor(self.direction) for marble in self.marbles)
+
+	def __iter__(self):
+		"""Entpackt wie das bisherige (Kugeln, Zielfeld)-Tupel, z.B. für encode_move(*move)"""
+		return iter((list(self.marbles), self.target))
+
+
 def draw_gradient_rect(surface, rect, start_color, end_color, vertical=True):
 	"""Zeichnet ein Rechteck mit Farbverlauf"""
 	if vertical:
@@ -701,15 +1612,28 @@ class Button:
 class AbaloneGame:
 	"""Hauptklasse für die Spiellogik"""
 
-	def __init__(self):
+	def __init__(self, repetition_limit=REPETITION_LIMIT, quiet_ply_limit=QUIET_PLY_LIMIT):
 		self.board = {}
 		self.current_player = Player.BLACK
 		self.scores = {Player.BLACK: 0, Player.WHITE: 0}
 		self.selected_marbles = []
 		self.valid_moves = set()
 		self.animating_marbles = []
+		self.repetition_limit = repetition_limit
+		self.quiet_ply_limit = quiet_ply_limit
+		self.patterns = {}  # Name -> PatternState, den die Suche an ihre Kopie hängt
 		self._create_board()
 		self._setup_initial_position()
+		self.rehash()
+		self._clear_history()
+
+	def _clear_history(self):
+		"""Leert Verlauf und Wiederholungszähler - die aktuelle Stellung wird zum Start"""
+		self.history = []  # MoveDelta je gespieltem Halbzug
+		self.redo_stack = []  # Zurückgenommene Züge, zuletzt zurückgenommener zuoberst
+		self._checkpoints = {}  # Halbzug -> (Hash, Snapshot)
+		self.position_counts = {self.hash: 1}  # Hash -> Vorkommen im bisherigen Verlauf
+		self.quiet_plies = 0  # Halbzüge seit der letzten hinausgeschobenen Kugel
 
 	def _create_board(self):
 		"""Erstellt das hexagonale Spielbrett"""
@@ -791,289 +1715,471 @@ class AbaloneGame:
 		return self._get_line_direction(marbles) is not None
 
 	def calculate_valid_moves(self, selected_marbles):
-		"""Berechnet alle gültigen Züge für die ausgewählten Kugeln"""
-		valid_moves = set()
+		"""Berechnet alle gültigen Zielfelder für die ausgewählten Kugeln"""
+		return {move.target for move in self.moves_for_selection(selected_marbles)}
 
-		if not selected_marbles:
-			return valid_moves
+	def moves_for_selection(self, selected_marbles):
+		"""Alle gültigen Züge (Move) für die ausgewählten Kugeln"""
+		if not selected_marbles or len(selected_marbles) > 3:
+			return []
 
 		# Prüfe ob alle Kugeln dem aktuellen Spieler gehören
 		for marble in selected_marbles:
-			if self.board[marble] != self.current_player:
-				return valid_moves
+			if self.board.get(marble) != self.current_player:
+				return []
 
-		# Bei einer einzelnen Kugel
 		if len(selected_marbles) == 1:
-			marble = selected_marbles[0]
-			# Prüfe alle 6 Nachbarfelder
-			for dir_idx in range(6):
-				target = marble.neighbor(dir_idx)
-				if self._is_valid_position(target) and self.board[target] == Player.EMPTY:
-					valid_moves.add(target)
-			return valid_moves
-
-		# Prüfe ob Kugeln in einer Linie liegen
-		if not self._are_marbles_in_line(selected_marbles):
-			return valid_moves
+			line_dir = None
+		else:
+			# Prüfe ob Kugeln in einer Linie liegen
+			line_dir = self._get_line_direction(selected_marbles)
+			if line_dir is None:
+				return []
 
-		# Prüfe alle 6 Richtungen für mehrere Kugeln
+		moves = []
 		for dir_idx in range(6):
-			# Inline-Bewegung
-			if self._can_move_inline(selected_marbles, dir_idx):
-				# Berechne Zielposition für die führende Kugel
-				lead_marble = self._get_lead_marble(selected_marbles, dir_idx)
-				target = lead_marble.neighbor(dir_idx)
-				valid_moves.add(target)
-
-			# Seitwärtsbewegung
-			if self._can_move_broadside(selected_marbles, dir_idx):
-				# Füge die erste Kugel als Repräsentant hinzu
-				target = selected_marbles[0].neighbor(dir_idx)
-				valid_moves.add(target)
+			move = self._move_in_direction(selected_marbles, dir_idx, line_dir)
+			if move is not None:
+				moves.append(move)
+		return moves
 
-		return valid_moves
+	def generate_moves(self):
+		"""Alle gültigen Züge des aktuellen Spielers
 
-	def _get_lead_marble(self, marbles, direction):
-		"""Findet die führende Kugel in einer bestimmten Richtung"""
-		return max(marbles, key=lambda m: m.q * DIRECTIONS[direction][0] + m.r * DIRECTIONS[direction][1])
+		Linien aus 2 und 3 Kugeln werden nur in den Richtungen 0-2 vom
+		Ankerfeld aus aufgebaut, damit jede Auswahl genau einmal vorkommt.
+		"""
+		player = self.current_player
+		moves = []
+		for anchor in BOARD_CELLS:
+			if self.board[anchor] != player:
+				continue
+			for dir_idx in range(6):
+				move = self._move_in_direction((anchor,), dir_idx, None)
+				if move is not None:
+					moves.append(move)
+			for line_dir in range(3):
+				line = [anchor]
+				for _ in range(2):
+					cell = line[-1].neighbor(line_dir)
+					if self.board.get(cell) != player:
+						break
+					line.append(cell)
+					for dir_idx in range(6):
+						move = self._move_in_direction(line, dir_idx, line_dir)
+						if move is not None:
+							moves.append(move)
+		return moves
 
-	def _can_move_inline(self, marbles, direction):
-		"""Prüft, ob eine Inline-Bewegung möglich ist"""
-		# Sortiere Kugeln in Bewegungsrichtung
-		lead = self._get_lead_marble(marbles, direction)
-		target = lead.neighbor(direction)
+	def _move_in_direction(self, marbles, direction, line_dir):
+		"""Klassifiziert und prüft einen Zug in eine Richtung - liefert Move oder None
+
+		line_dir ist die Linienrichtung der Kugeln (None bei einer Einzelkugel).
+		"""
+		board = self.board
+		if line_dir is None or direction == line_dir or direction == (line_dir + 3) % 6:
+			# Inline-Bewegung, ggf. mit Sumito
+			target = self._get_lead_marble(marbles, direction).neighbor(direction)
+			occupant = board.get(target)
+			if occupant is None or occupant == self.current_player:
+				return None  # Vom Brett oder eigene Kugel
+			if occupant == Player.EMPTY:
+				return Move(tuple(marbles), direction, MoveKind.INLINE)
+
+			pushed = []
+			while board.get(target) == occupant:
+				pushed.append(target)
+				target = target.neighbor(direction)
+			# Numerische Überlegenheit und freies Feld (oder Brettrand) dahinter
+			if len(marbles) <= len(pushed) or board.get(target, Player.EMPTY) != Player.EMPTY:
+				return None
+			return Move(tuple(marbles), direction, MoveKind.PUSH, tuple(pushed))
+
+		# Seitwärtsbewegung: alle Zielfelder müssen frei sein
+		for marble in marbles:
+			if board.get(marble.neighbor(direction)) != Player.EMPTY:
+				return None
+		return Move(tuple(marbles), direction, MoveKind.BROADSIDE)
 
-		# Prüfe, ob Ziel auf dem Brett ist
-		if not self._is_valid_position(target):
+	def is_legal(self, move):
+		"""Prüft einen Zug aus unsicherer Quelle (z.B. Netzwerk) vollständig"""
+		if not isinstance(move, Move) or not 0 <= move.direction < 6:
 			return False
-
-		# Prüfe ob das Ziel eine eigene Kugel ist (nicht erlaubt!)
-		if self.board[target] == self.current_player:
+		marbles = list(move.marbles)
+		if len(set(marbles)) != len(marbles) or not self._are_marbles_in_line(marbles):
 			return False
-
-		# Leeres Feld - einfache Bewegung
-		if self.board[target] == Player.EMPTY:
-			return True
-
-		# Gegnerische Kugel - prüfe Sumito
-		if self.board[target] != self.current_player:
-			return self._can_push(marbles, direction)
-
-		return False
-
-	def _can_move_broadside(self, marbles, direction):
-		"""Prüft, ob eine Seitwärtsbewegung möglich ist"""
-		# Bei einzelnen Kugeln gibt es keine Seitwärtsbewegung
-		if len(marbles) < 2:
+		if any(self.board.get(marble) != self.current_player for marble in marbles):
 			return False
-
-		# Prüfe ob die Richtung senkrecht zur Linie ist
 		line_dir = self._get_line_direction(marbles)
-		if line_dir is None:
-			return False
+		return self._move_in_direction(marbles, move.direction, line_dir) == move
+
+	def apply(self, move):
+		"""Führt einen vom Zuggenerator erzeugten Zug ohne erneute Prüfung aus
+
+		Der Zug wird als MoveDelta im Verlauf abgelegt; ausstehende Redo-Züge
+		verfallen.
+		"""
+		board = self.board
+		player = self.current_player
+		direction = move.direction
+		hash_before = self.hash
+
+		ply = len(self.history)
+		if ply % CHECKPOINT_INTERVAL == 0:
+			checkpoint = self._checkpoints.get(ply)
+			if checkpoint is None or checkpoint[0] != hash_before:
+				self._checkpoints[ply] = (hash_before, self.snapshot())
+		if self.redo_stack:
+			self.redo_stack.clear()
+
+		scored = False
+		if move.kind == MoveKind.BROADSIDE:
+			changes = [(marble, player, Player.EMPTY) for marble in move.marbles]
+			changes += [(marble.neighbor(direction), Player.EMPTY, player) for marble in move.marbles]
+		else:
+			changes = []
+			if move.pushed:
+				# Die gegnerische Reihe rückt um ein Feld vor - nur das Feld dahinter ändert sich
+				behind = move.pushed[-1].neighbor(direction)
+				if behind in board:
+					changes.append((behind, Player.EMPTY, board[move.pushed[0]]))
+				else:
+					scored = True
+			# Ebenso bei der eigenen Reihe: Ende wird frei, Zielfeld besetzt
+			target = move.lead.neighbor(direction)
+			changes.append((move.tail, player, Player.EMPTY))
+			changes.append((target, board[target], player))
+
+		h = hash_before ^ ZOBRIST_SIDE
+		for cell, before, after in changes:
+			board[cell] = after
+			h ^= ZOBRIST_KEYS[before][cell] ^ ZOBRIST_KEYS[after][cell]
+		if scored:
+			score = self.scores[player]
+			# Gleiche Kappung wie rehash(), auch für geladene Stellungen mit hohem Stand
+			h ^= (ZOBRIST_SCORES[player][min(score, ZOBRIST_SCORE_CAP)]
+				  ^ ZOBRIST_SCORES[player][min(score + 1, ZOBRIST_SCORE_CAP)])
+			self.scores[player] = score + 1
+
+		self.hash = h
+		for state in self.patterns.values():
+			state.update(changes)
+		self.position_counts[h] = self.position_counts.get(h, 0) + 1
+		self.history.append(MoveDelta(move, player, changes, scored, hash_before, h, self.quiet_plies))
+		self.quiet_plies = 0 if scored else self.quiet_plies + 1
 
-		# Richtung muss senkrecht zur Linie sein (nicht parallel)
-		if direction == line_dir or direction == (line_dir + 3) % 6:
-			return False
+		# Wechsle den Spieler
+		self.current_player = Player.WHITE if player == Player.BLACK else Player.BLACK
 
-		# WICHTIG: Prüfe ob ALLE Zielfelder frei sind
-		for marble in marbles:
-			target = marble.neighbor(direction)
-			# Ziel muss auf dem Brett sein
-			if not self._is_valid_position(target):
-				return False
-			# Ziel muss leer sein - keine eigenen oder gegnerischen Kugeln!
-			if self.board[target] != Player.EMPTY:
-				return False
-
-		return True
-
-	def _can_push(self, marbles, direction):
-		"""Prüft, ob ein Sumito (Schieben) möglich ist"""
-		opponent = Player.WHITE if self.current_player == Player.BLACK else Player.BLACK
-
-		# Finde alle gegnerischen Kugeln in der Schieberichtung
-		lead = self._get_lead_marble(marbles, direction)
-		opponent_marbles = []
-
-		current = lead.neighbor(direction)
-		while self._is_valid_position(current) and self.board[current] == opponent:
-			opponent_marbles.append(current)
-			current = current.neighbor(direction)
-
-		# Prüfe numerische Überlegenheit
-		if len(marbles) <= len(opponent_marbles):
+	def _revert(self, delta):
+		counts = self.position_counts
+		if counts[delta.hash_after] == 1:
+			del counts[delta.hash_after]
+		else:
+			counts[delta.hash_after] -= 1
+		for cell, before, _ in reversed(delta.changes):
+			self.board[cell] = before
+		for state in self.patterns.values():
+			state.update(reversed(delta.changes), forward=False)
+		if delta.scored:
+			self.scores[delta.player] -= 1
+		self.current_player = delta.player
+		self.hash = delta.hash_before
+		self.quiet_plies = delta.quiet_before
+
+	def _replay(self, delta):
+		for cell, _, after in delta.changes:
+			self.board[cell] = after
+		for state in self.patterns.values():
+			state.update(delta.changes)
+		if delta.scored:
+			self.scores[delta.player] += 1
+		self.current_player = Player.WHITE if delta.player == Player.BLACK else Player.BLACK
+		self.hash = delta.hash_after
+		self.position_counts[self.hash] = self.position_counts.get(self.hash, 0) + 1
+		self.quiet_plies = 0 if delta.scored else delta.quiet_before + 1
+
+	def unmake(self):
+		"""Nimmt den letzten Zug zurück, ohne ihn für redo() aufzuheben (für die Suche)"""
+		self._revert(self.history.pop())
+
+	def undo(self):
+		"""Nimmt den letzten Zug zurück - liefert ihn oder None"""
+		if not self.history:
+			return None
+		delta = self.history.pop()
+		self._revert(delta)
+		self.redo_stack.append(delta)
+		return delta.move
+
+	def redo(self):
+		"""Wiederholt den zuletzt zurückgenommenen Zug - liefert ihn oder None"""
+		if not self.redo_stack:
+			return None
+		delta = self.redo_stack.pop()
+		self._replay(delta)
+		self.history.append(delta)
+		return delta.move
+
+	@property
+	def ply(self):
+		"""Anzahl der gespielten Halbzüge"""
+		return len(self.history)
+
+	def goto_ply(self, ply):
+		"""Springt im Verlauf (inklusive Redo-Zügen) zu einem beliebigen Halbzug
+
+		Kurze Sprünge laufen Schritt für Schritt über undo/redo, weite ab dem
+		nächstgelegenen gültigen Snapshot.
+		"""
+		timeline = self.history + self.redo_stack[::-1]
+		ply = max(0, min(ply, len(timeline)))
+		current = len(self.history)
+
+		start = ply - ply % CHECKPOINT_INTERVAL
+		while start > 0 and not self._checkpoint_valid(start, timeline):
+			start -= CHECKPOINT_INTERVAL
+		if self._checkpoint_valid(start, timeline) and ply - start + CHECKPOINT_INTERVAL // 4 < abs(ply - current):
+			hash_at, snapshot = self._checkpoints[start]
+			self._load_snapshot(snapshot)
+			self.hash = hash_at
+			self.history = timeline[:start]
+			self.redo_stack = timeline[start:][::-1]
+			current = start
+
+			# Wiederholungszähler und Remis-Zähler für den neuen Stand aufbauen
+			self.position_counts = {}
+			for h in [delta.hash_before for delta in self.history] + [hash_at]:
+				self.position_counts[h] = self.position_counts.get(h, 0) + 1
+			if start < len(timeline):
+				self.quiet_plies = timeline[start].quiet_before
+			else:
+				last = timeline[start - 1]
+				self.quiet_plies = 0 if last.scored else last.quiet_before + 1
+
+		while current < ply:
+			self.redo()
+			current += 1
+		while current > ply:
+			self.undo()
+			current -= 1
+
+	def _checkpoint_valid(self, ply, timeline):
+		checkpoint = self._checkpoints.get(ply)
+		if checkpoint is None:
 			return False
+		expected = timeline[ply].hash_before if ply < len(timeline) else self.hash
+		return checkpoint[0] == expected
+
+	def copy(self):
+		"""Kopie der Stellung ohne Verlauf (z.B. als Wurzel einer Suche)
+
+		Wiederholungszähler und Remisregeln werden übernommen, damit die Suche
+		Wiederholungen der bisherigen Partie erkennt.
+		"""
+		game = AbaloneGame.__new__(AbaloneGame)
+		game.board = self.board.copy()
+		game.current_player = self.current_player
+		game.scores = self.scores.copy()
+		game.selected_marbles = []
+		game.valid_moves = set()
+		game.animating_marbles = []
+		game.repetition_limit = self.repetition_limit
+		game.quiet_ply_limit = self.quiet_ply_limit
+		game.patterns = {}
+		game.history = []
+		game.redo_stack = []
+		game._checkpoints = {}
+		game.hash = self.hash
+		game.position_counts = self.position_counts.copy()
+		game.quiet_plies = self.quiet_plies
+		return game
+
+	def rehash(self):
+		"""Berechnet den Zobrist-Hash der Stellung neu"""
+		h = ZOBRIST_SIDE if self.current_player == Player.WHITE else 0
+		for cell, player in self.board.items():
+			h ^= ZOBRIST_KEYS[player][cell]
+		for player in (Player.BLACK, Player.WHITE):
+			h ^= ZOBRIST_SCORES[player][min(self.scores[player], ZOBRIST_SCORE_CAP)]
+		self.hash = h
+		return h
 
-		# Prüfe ob das Feld hinter der letzten gegnerischen Kugel frei ist
-		if opponent_marbles:
-			last_opponent = opponent_marbles[-1]
-			behind = last_opponent.neighbor(direction)
-
-			# Kann vom Brett geschoben werden
-			if not self._is_valid_position(behind):
-				return True
-
-			# Oder auf ein leeres Feld
-			return self.board[behind] == Player.EMPTY
-
-		return False
+	def _get_lead_marble(self, marbles, direction):
+		"""Findet die führende Kugel in einer bestimmten Richtung"""
+		return max(marbles, key=lambda m: m.q * DIRECTIONS[direction][0] + m.r * DIRECTIONS[direction][1])
 
 	def make_move(self, selected_marbles, target_hex):
 		"""Führt einen Zug aus"""
-		if not selected_marbles or target_hex not in self.calculate_valid_moves(selected_marbles):
-			return False
-
-		# Bestimme die Bewegungsrichtung
-		direction = None
+		for move in self.moves_for_selection(selected_marbles):
+			if move.target == target_hex:
+				self.apply(move)
+				return True
+		return False
 
-		# Für einzelne Kugeln ist es einfach
-		if len(selected_marbles) == 1:
-			for dir_idx in range(6):
-				if selected_marbles[0].neighbor(dir_idx) == target_hex:
-					direction = dir_idx
-					break
-		else:
-			# Für mehrere Kugeln müssen wir prüfen ob es inline oder broadside ist
-			for dir_idx in range(6):
-				# Prüfe Seitwärtsbewegung
-				if self._can_move_broadside(selected_marbles, dir_idx):
-					# Bei Seitwärtsbewegung bewegen sich alle Kugeln in dieselbe Richtung
-					if selected_marbles[0].neighbor(dir_idx) == target_hex:
-						direction = dir_idx
-						break
+	def to_masks(self):
+		"""Bitmasken (Schwarz, Weiß) über die Feldnummerierung BOARD_CELLS"""
+		black = white = 0
+		for i, cell in enumerate(BOARD_CELLS):
+			player = self.board[cell]
+			if player == Player.BLACK:
+				black |= 1 << i
+			elif player == Player.WHITE:
+				white |= 1 << i
+		return black, white
+
+	def snapshot(self):
+		"""Kompakter, picklebarer Spielzustand (Masken, Scores, Spieler am Zug)"""
+		black, white = self.to_masks()
+		return (black, white, self.scores[Player.BLACK], self.scores[Player.WHITE],
+				self.current_player.value)
+
+	@classmethod
+	def from_snapshot(cls, snapshot):
+		"""Erstellt ein Spiel aus einem mit snapshot() erzeugten Zustand"""
+		game = cls()
+		game._load_snapshot(snapshot)
+		game.rehash()
+		game._clear_history()
+		return game
+
+	def _load_snapshot(self, snapshot):
+		black, white, black_score, white_score, player = snapshot
+		for i, cell in enumerate(BOARD_CELLS):
+			if black >> i & 1:
+				self.board[cell] = Player.BLACK
+			elif white >> i & 1:
+				self.board[cell] = Player.WHITE
+			else:
+				self.board[cell] = Player.EMPTY
+		self.scores = {Player.BLACK: black_score, Player.WHITE: white_score}
+		self.current_player = Player(player)
+		for state in self.patterns.values():
+			state.reset(self.board)
 
-				# Prüfe Inline-Bewegung
-				if self._can_move_inline(selected_marbles, dir_idx):
-					lead = self._get_lead_marble(selected_marbles, dir_idx)
-					if lead.neighbor(dir_idx) == target_hex:
-						direction = dir_idx
-						break
+	def check_winner(self):
+		"""Prüft, ob es einen Gewinner gibt"""
+		if self.scores[Player.BLACK] >= 6:
+			return Player.BLACK
+		if self.scores[Player.WHITE] >= 6:
+			return Player.WHITE
+		return None
 
-		if direction is None:
-			return False
+	def repetitions(self):
+		"""Wie oft die aktuelle Stellung im bisherigen Verlauf aufgetreten ist"""
+		return self.position_counts.get(self.hash, 0)
 
-		# Führe den Zug aus
-		if self._is_inline_move(selected_marbles, direction):
-			self._execute_inline_move(selected_marbles, direction)
-		else:
-			# Nochmalige Validierung für Seitwärtsbewegung
-			if not self._can_move_broadside(selected_marbles, direction):
-				return False
-			self._execute_broadside_move(selected_marbles, direction)
+	def draw_reason(self):
+		"""'repetition' oder 'quiet_plies', wenn eine Remisregel greift, sonst None"""
+		if self.repetition_limit and self.repetitions() >= self.repetition_limit:
+			return 'repetition'
+		if self.quiet_ply_limit and self.quiet_plies >= self.quiet_ply_limit:
+			return 'quiet_plies'
+		return None
 
-		# Wechsle den Spieler
-		self.current_player = Player.WHITE if self.current_player == Player.BLACK else Player.BLACK
-		return True
+	def is_draw(self):
+		return self.check_winner() is None and self.draw_reason() is not None
 
-	def _is_inline_move(self, marbles, direction):
-		"""Prüft, ob es eine Inline-Bewegung ist"""
-		if len(marbles) == 1:
-			return True  # Einzelne Kugeln sind immer inline
+	def is_over(self):
+		"""Partie beendet durch Sieg oder Remis"""
+		return self.check_winner() is not None or self.draw_reason() is not None
 
-		line_dir = self._get_line_direction(marbles)
-		if line_dir is None:
-			return False
+	def reset_game(self):
+		"""Setzt das Spiel zurück"""
+		self.board.clear()
+		self.current_player = Player.BLACK
+		self.scores = {Player.BLACK: 0, Player.WHITE: 0}
+		self.selected_marbles = []
+		self.valid_moves = set()
+		self._create_board()
+		self._setup_initial_position()
+		self.rehash()
+		self._clear_history()
 
-		# Inline wenn die Bewegung parallel zur Linie ist
-		return line_dir == direction or line_dir == (direction + 3) % 6
 
-	def _execute_inline_move(self, marbles, direction):
-		"""Führt eine Inline-Bewegung aus"""
-		# Sortiere Kugeln in Bewegungsrichtung (führende Kugel hat höchsten Wert)
-		dq, dr = DIRECTIONS[direction]
-		sorted_marbles = sorted(marbles,
-		                        key=lambda m: m.q * dq + m.r * dr,
-		                        reverse=True)
+class RenderScheduler:
+	"""Entscheidet, wann ein neues Bild gezeichnet werden muss"""
 
-		# Die führende Kugel
-		lead = sorted_marbles[0]
-		target = lead.neighbor(direction)
+	def __init__(self, idle_wait_ms=IDLE_WAIT_MS):
+		self.idle_wait_ms = idle_wait_ms
+		self.dirty = True
 
-		# Prüfe auf Sumito (Schieben gegnerischer Kugeln)
-		if self._is_valid_position(target) and self.board[target] != Player.EMPTY:
-			self._push_opponent_marbles(lead, direction)
+	def request_redraw(self):
+		"""Markiert die Szene als veraltet"""
+		self.dirty = True
 
-		# Sammle alle Bewegungen (alte Position -> neue Position)
-		moves = []
-		for marble in sorted_marbles:
-			old_pos = marble
-			new_pos = marble.neighbor(direction)
-			color = self.board[old_pos]
-			moves.append((old_pos, new_pos, color))
-
-		# Lösche erst alle alten Positionen
-		for old_pos, _, _ in moves:
-			self.board[old_pos] = Player.EMPTY
-
-		# Setze dann alle neuen Positionen
-		for _, new_pos, color in moves:
-			self.board[new_pos] = color
-
-	def _execute_broadside_move(self, marbles, direction):
-		"""Führt eine Seitwärtsbewegung aus"""
-		# Bewege alle Kugeln gleichzeitig
-		new_positions = []
-		for marble in marbles:
-			new_pos = marble.neighbor(direction)
-			new_positions.append((marble, new_pos))
+	def is_animating(self, ui):
+		"""Prüft, ob laufende Effekte fortlaufend neue Frames benötigen"""
+		if ui.particles or ui.animations or ui.ai_thinking:
+			return True
+		if ui.current_state in GAME_STATES and ui.game:
+			# Wippendes Brett und Gewinner-Partikel laufen ständig
+			return SETTINGS.board_bob_active() or ui.game.check_winner() is not None
+		return False
 
-		# Erst alle alten Positionen leeren
-		for old, _ in new_positions:
-			self.board[old] = Player.EMPTY
+	def should_draw(self, ui):
+		"""Prüft, ob in diesem Durchlauf gezeichnet werden muss"""
+		return self.dirty or self.is_animating(ui)
 
-		# Dann alle neuen Positionen setzen
-		for _, new in new_positions:
-			self.board[new] = self.current_player
+	def poll_events(self, ui):
+		"""Holt anstehende Events - schläft im Leerlauf bis zum nächsten Event"""
+		if self.should_draw(ui) or ui.analysis is not None:
+			return pygame.event.get()
 
-	def _push_opponent_marbles(self, from_pos, direction):
-		"""Schiebt gegnerische Kugeln"""
-		opponent = Player.WHITE if self.current_player == Player.BLACK else Player.BLACK
+		event = pygame.event.wait(self.idle_wait_ms)
+		events = [] if event.type == pygame.NOEVENT else [event]
+		events.extend(pygame.event.get())
+		return events
 
-		# Finde alle zu schiebenden Kugeln
-		marbles_to_push = []
-		current = from_pos.neighbor(direction)
+	def frame_rate(self, ui):
+		"""Ziel-FPS - gedrosselt, solange die KI rechnet"""
+		if ui.ai_thinking and SETTINGS.ai_thinking_fps:
+			return min(FPS, SETTINGS.ai_thinking_fps)
+		return FPS
 
-		while self._is_valid_position(current) and self.board[current] == opponent:
-			marbles_to_push.append(current)
-			current = current.neighbor(direction)
+	def frame_presented(self):
+		"""Wird nach jedem gezeichneten Frame aufgerufen"""
+		self.dirty = False
 
-		# Schiebe von hinten nach vorne
-		for marble in reversed(marbles_to_push):
-			new_pos = marble.neighbor(direction)
 
-			if not self._is_valid_position(new_pos):
-				# Kugel wird vom Brett geschoben
-				self.board[marble] = Player.EMPTY
-				self.scores[self.current_player] += 1
-			else:
-				# Kugel wird auf neues Feld geschoben
-				self.board[new_pos] = opponent
-				self.board[marble] = Player.EMPTY
+class DirtyRectTracker:
+	"""Sammelt die Bildschirmbereiche, die sich seit dem letzten Frame geändert haben"""
 
-	def check_winner(self):
-		"""Prüft, ob es einen Gewinner gibt"""
-		if self.scores[Player.BLACK] >= 6:
-			return Player.BLACK
-		if self.scores[Player.WHITE] >= 6:
-			return Player.WHITE
-		return None
+	def __init__(self):
+		self.rects = []
+		self.full = True
+		self._previous = {}
+
+	def invalidate(self):
+		"""Erzwingt beim nächsten Frame ein komplettes Update"""
+		self.full = True
+		self._previous.clear()
+
+	def track(self, key, value, rects):
+		"""Markiert alte und neue Bereiche eines Elements, wenn sich sein Zustand ändert"""
+		previous = self._previous.get(key)
+		if previous is not None and previous[0] == value:
+			return
+		if previous is not None:
+			self.rects.extend(previous[1])
+		self.rects.extend(rects)
+		self._previous[key] = (value, rects)
 
-	def reset_game(self):
-		"""Setzt das Spiel zurück"""
-		self.board.clear()
-		self.current_player = Player.BLACK
-		self.scores = {Player.BLACK: 0, Player.WHITE: 0}
-		self.selected_marbles = []
-		self.valid_moves = set()
-		self._create_board()
-		self._setup_initial_position()
+	def collect(self):
+		"""Liefert None für ein volles Update, sonst die Liste geänderter Bereiche"""
+		rects = None if self.full else self.rects
+		self.rects = []
+		self.full = False
+		return rects
 
 
 class AbaloneUI:
 	"""UI-Klasse für die grafische Darstellung"""
 
 	def __init__(self):
+		self.started = time.perf_counter()
+		self.first_frame_ms = None  # Zeit bis zum ersten angezeigten Bild
+		self.report_startup = False
 		pygame.init()
 		self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 		pygame.display.set_caption("Abalone")
@@ -1093,6 +2199,7 @@ class AbaloneUI:
 		self.drag_start = None
 		self.hovered_hex = None
 		self.selected_marbles = []
+		self.selection_moves = {}  # Zielfeld -> Move für die aktuelle Auswahl
 		self.mouse_pos = (0, 0)
 		
 		# KI-spezifische Variablen
@@ -1101,9 +2208,19 @@ class AbaloneUI:
 		self.ai_thinking = False
 		self.ai_move_timer = 0
 
-		# Menüs
+		# Wiederholung: Ziehen an der Zeitleiste springt direkt zum Halbzug
+		self.replay_scrubbing = False
+
+		# Analysemodus: Multi-PV-Suche im Hauptthread, pro Frame höchstens ANALYSIS_BUDGET
+		self.analysis_enabled = False
+		self.analyzer = None
+		self.analysis = None  # Laufender Generator aus AbaloneAI.analyze
+		self.analysis_key = None  # Snapshot der analysierten Stellung
+		self.analysis_result = None
+
+		# Menüs - das Einstellungsmenü erst beim ersten Öffnen
 		self.main_menu = MainMenu(self.screen, self.font, self.large_font)
-		self.settings_menu = SettingsMenu(self.screen, self.font, self.large_font)
+		self._settings_menu = None
 
 		# Buttons für Game-View (werden bei Bedarf erstellt)
 		self.new_game_button = None
@@ -1112,27 +2229,135 @@ class AbaloneUI:
 		# Animation und Effekte
 		self.animations = []
 		self.particles = []
-		self.background_pattern = self._create_background_pattern()
+		self._background_pattern = None
 		self.animation_time = 0
+		self.scheduler = RenderScheduler()
+
+		# Gecachte Ebenen und Sprites sowie Dirty-Rect-Verwaltung
+		self._layers = {}
+		self._marble_sprites = {}
+		self._prebuild_thread = None
+		self.dirty_tracker = DirtyRectTracker()
+
+	@property
+	def settings_menu(self):
+		if self._settings_menu is None:
+			self._settings_menu = SettingsMenu(self.screen, self.font, self.large_font)
+		return self._settings_menu
+
+	@property
+	def background_pattern(self):
+		if self._background_pattern is None:
+			self._background_pattern = self._create_background_pattern()
+		return self._background_pattern
+
+	def prebuild_assets(self):
+		"""Baut Ebenen und Sprites im Hintergrund vor, solange das Menü angezeigt wird
+
+		Gezeichnet wird nur auf Software-Flächen ohne convert(), das ist
+		neben dem Hauptthread unbedenklich. Was der Hauptthread vorher selbst
+		braucht, baut er wie bisher bei der ersten Verwendung. Beide Threads
+		füllen dieselben Caches: eine Ebene kann dabei zweimal gebaut werden,
+		gespeichert und verwendet wird aber nur die zuerst fertige (setdefault).
+		"""
+		if self._prebuild_thread is not None and self._prebuild_thread.is_alive():
+			return
+		self._prebuild_thread = threading.Thread(target=self._prebuild, daemon=True)
+		self._prebuild_thread.start()
+
+	def _prebuild(self):
+		# Zuerst der aktuelle Hintergrund und die für alle Themes gleiche Hex-Ebene,
+		# dann die übrigen Hintergründe für schnelle Theme-Wechsel
+		current = SETTINGS.current_theme
+		self._get_layer('background', current)
+		self._get_layer('hexes')
+		for theme in Theme:
+			self._get_layer('background', theme)
+		for selected, valid_move in ((True, False), (False, True), (True, True)):
+			self._get_hex_sprite(selected, valid_move)
+		for player in (Player.BLACK, Player.WHITE):
+			for selected, preview in ((False, False), (True, False), (False, True)):
+				self._get_marble_sprite(player, selected, preview)
 	
 	def start_game(self, game_mode):
 		"""Startet ein neues Spiel im angegebenen Modus"""
 		self.game = AbaloneGame()
-		self.selected_marbles = []
+		self.set_selection([])
+		self.analysis = self.analysis_key = self.analysis_result = None
 		self.current_state = game_mode
 		
-		# KI-Setup für KI-Spiele
+		# KI-Setup für KI-Spiele - eine noch laufende Suche der letzten Partie verfällt
+		self.close_ai()
 		if game_mode == GameState.GAME_AI:
-			self.ai = AbaloneAI(SETTINGS.ai_difficulty)
+			self.ai = AIProcess(SETTINGS.ai_difficulty, SETTINGS.ai_engine)
 			self.ai_player = Player.WHITE  # KI spielt Weiß
-			self.ai_thinking = False
-		else:
-			self.ai = None
 		
 		# Erstelle Game-UI-Buttons
 		self.new_game_button = Button(30, 20, 120, 40, "Menü", self.small_font)
 		self.quit_button = Button(30, 70, 120, 40, "Beenden", self.small_font)
-	
+
+	def start_replay(self, moves, ply=0):
+		"""Zeigt eine gespeicherte Partie (Zugcodes aus abalone_archive) zum Durchblättern
+
+		Alle Züge werden einmal ausgeführt; der Verlauf legt dabei alle
+		CHECKPOINT_INTERVAL Halbzüge einen Snapshot ab. Jeder Sprung auf der
+		Zeitleiste lädt den nächstgelegenen Snapshot und spielt höchstens
+		ein Intervall an Zügen nach, ein Schritt ist ein einzelnes undo/redo.
+		"""
+		from abalone_archive import decode_move
+
+		self.start_game(GameState.REPLAY)
+		for code in moves:
+			if not self.game.make_move(*decode_move(code)):
+				print(f"Wiederholung: ungültiger Zug {code} nach Halbzug {self.game.ply}")
+				break
+		self.replay_seek(ply)
+
+	def replay_seek(self, ply):
+		"""Springt in der Wiederholung zu einem Halbzug"""
+		if ply != self.game.ply:
+			self.game.goto_ply(ply)
+			self.scheduler.request_redraw()
+
+	def replay_length(self):
+		"""Anzahl der Halbzüge der wiedergegebenen Partie"""
+		return self.game.ply + len(self.game.redo_stack)
+
+	def _timeline_ply(self, x):
+		"""Halbzug zu einer x-Position auf der Zeitleiste"""
+		left, _, width, _ = TIMELINE_RECT
+		ratio = min(max((x - left) / width, 0.0), 1.0)
+		return round(ratio * self.replay_length())
+
+	def handle_replay_key(self, key):
+		"""Pfeiltasten: einzelne Halbzüge, Bild auf/ab: ein Snapshot-Intervall, Pos1/Ende"""
+		steps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1,
+				 pygame.K_PAGEUP: -CHECKPOINT_INTERVAL, pygame.K_PAGEDOWN: CHECKPOINT_INTERVAL}
+		if key in steps:
+			self.replay_seek(max(0, min(self.game.ply + steps[key], self.replay_length())))
+		elif key == pygame.K_HOME:
+			self.replay_seek(0)
+		elif key == pygame.K_END:
+			self.replay_seek(self.replay_length())
+
+	def draw_replay_timeline(self):
+		"""Zeitleiste mit Markierungen der Snapshots und aktuellem Halbzug"""
+		colors = SETTINGS.get_theme_colors()
+		rect = pygame.Rect(TIMELINE_RECT)
+		length = max(self.replay_length(), 1)
+		pygame.draw.rect(self.screen, colors['board_border'], rect, border_radius=5)
+		filled = pygame.Rect(rect.x, rect.y, rect.width * self.game.ply // length, rect.height)
+		if filled.width > 0:
+			pygame.draw.rect(self.screen, HIGHLIGHT_COLOR, filled, border_radius=5)
+		for ply in range(CHECKPOINT_INTERVAL, length, CHECKPOINT_INTERVAL):
+			x = rect.x + rect.width * ply // length
+			pygame.draw.line(self.screen, colors['board_start'], (x, rect.top), (x, rect.bottom - 1))
+		pygame.draw.circle(self.screen, TEXT_COLOR, (filled.right, rect.centery), 9)
+
+		text = f"Halbzug {self.game.ply} / {self.replay_length()}   (Pfeiltasten, Bild auf/ab, Pos1/Ende)"
+		surface = self.small_font.render(text, True, TEXT_COLOR)
+		self.screen.blit(surface, (rect.x, rect.y - 28))
+
 	def handle_menu_action(self, action):
 		"""Behandelt Menü-Aktionen"""
 		if action == "start_game":
@@ -1153,18 +2378,26 @@ class AbaloneUI:
 				if theme.value == theme_name:
 					SETTINGS.current_theme = theme
 					break
-			# Menü neu aufbauen um Checkmarks zu aktualisieren
-			self.settings_menu = SettingsMenu(self.screen, self.font, self.large_font)
+			# Checkmarks aktualisieren und Ebenen des neuen Themes vorbereiten
+			self.settings_menu.refresh()
+			self.prebuild_assets()
 		elif action == "toggle_sound":
 			SETTINGS.sound_enabled = not SETTINGS.sound_enabled
-			self.settings_menu = SettingsMenu(self.screen, self.font, self.large_font)
+			self.settings_menu.refresh()
+		elif action == "toggle_dirty_rects":
+			SETTINGS.dirty_rect_rendering = not SETTINGS.dirty_rect_rendering
+			self.settings_menu.refresh()
+		elif action == "toggle_ai_engine":
+			index = AI_ENGINES.index(SETTINGS.ai_engine)
+			SETTINGS.ai_engine = AI_ENGINES[(index + 1) % len(AI_ENGINES)]
+			self.settings_menu.refresh()
 		elif action.startswith("ai_"):
 			difficulty_level = int(action.split("_")[1])
 			for diff in AIDifficulty:
 				if diff.value == difficulty_level:
 					SETTINGS.ai_difficulty = diff
 					break
-			self.settings_menu = SettingsMenu(self.screen, self.font, self.large_font)
+			self.settings_menu.refresh()
 		
 		return None
 
@@ -1260,8 +2493,11 @@ class AbaloneUI:
 
 		return Hex(int(rq), int(rr))
 
-	def draw_hexagon(self, center_x, center_y, use_gradient=True, selected=False, valid_move=False):
+	def draw_hexagon(self, center_x, center_y, use_gradient=True, selected=False, valid_move=False, surface=None):
 		"""Zeichnet ein verbessertes Hexagon mit Farbverläufen ohne Überlappung"""
+		if surface is None:
+			surface = self.screen
+
 		# Optimierte Hexagon-Größe für größeres Spielfeld
 		hex_draw_size = HEX_SIZE * 0.9
 		
@@ -1280,7 +2516,7 @@ class AbaloneUI:
 			y = center_y + (hex_draw_size + 1) * math.sin(angle)
 			outer_points.append((x, y))
 		
-		pygame.draw.polygon(self.screen, BOARD_BORDER_COLOR, outer_points)
+		pygame.draw.polygon(surface, BOARD_BORDER_COLOR, outer_points)
 
 		# Basis-Hexagon mit Farbverlauf
 		if use_gradient:
@@ -1298,9 +2534,9 @@ class AbaloneUI:
 					x = center_x + (hex_draw_size * size_factor) * math.cos(angle)
 					y = center_y + (hex_draw_size * size_factor) * math.sin(angle)
 					inner_points.append((x, y))
-				pygame.draw.polygon(self.screen, color, inner_points)
+				pygame.draw.polygon(surface, color, inner_points)
 		else:
-			pygame.draw.polygon(self.screen, BOARD_GRADIENT_START, points)
+			pygame.draw.polygon(surface, BOARD_GRADIENT_START, points)
 
 		# Highlight-Effekte - reduzierte Größe
 		if valid_move:
@@ -1312,7 +2548,7 @@ class AbaloneUI:
 					color = (*HIGHLIGHT_COLOR, alpha)
 					pygame.draw.circle(s, color, (hex_draw_size * 1.25, hex_draw_size * 1.25), 
 									  hex_draw_size * 0.6 + i * 2)
-			self.screen.blit(s, (center_x - hex_draw_size * 1.25, center_y - hex_draw_size * 1.25))
+			surface.blit(s, (center_x - hex_draw_size * 1.25, center_y - hex_draw_size * 1.25))
 		
 		if selected:
 			# Goldener Glow für Auswahl
@@ -1323,7 +2559,7 @@ class AbaloneUI:
 					color = (*SELECTED_GLOW[:3], alpha)
 					pygame.draw.circle(s, color, (hex_draw_size * 1.25, hex_draw_size * 1.25), 
 									  hex_draw_size * 0.6 + i * 2)
-			self.screen.blit(s, (center_x - hex_draw_size * 1.25, center_y - hex_draw_size * 1.25))
+			surface.blit(s, (center_x - hex_draw_size * 1.25, center_y - hex_draw_size * 1.25))
 
 		# Innerer Highlight - angepasste Größe
 		inner_points = []
@@ -1332,18 +2568,30 @@ class AbaloneUI:
 			x = center_x + (hex_draw_size * 0.75) * math.cos(angle)
 			y = center_y + (hex_draw_size * 0.75) * math.sin(angle)
 			inner_points.append((x, y))
-		pygame.draw.polygon(self.screen, BOARD_HIGHLIGHT_COLOR, inner_points, 1)
+		pygame.draw.polygon(surface, BOARD_HIGHLIGHT_COLOR, inner_points, 1)
+
+	def _get_layer(self, name, theme=None):
+		"""Liefert eine gecachte, statische Ebene des Spielbretts (ohne Theme die des aktuellen)
+
+		Nur der Hintergrund hängt vom Theme ab; die Hex-Ebene gibt es einmal.
+		"""
+		key = (name, theme or SETTINGS.current_theme) if name == 'background' else (name, None)
+		layer = self._layers.get(key)
+		if layer is None:
+			if name == 'background':
+				layer = self._create_background_layer(key[1])
+			else:
+				layer = self._create_hex_layer()
+			# Baut der Vorbau-Thread dieselbe Ebene gleichzeitig, gilt die zuerst gespeicherte
+			layer = self._layers.setdefault(key, layer)
+		return layer
+
+	def _create_background_layer(self, theme=None):
+		"""Hintergrund mit Board-Glow (ändert sich nur mit dem Theme)"""
+		colors = SETTINGS.get_theme_colors(theme)
+		layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+		layer.fill(colors['background'])
 
-	def draw_board(self):
-		"""Zeichnet das verbesserte Spielbrett mit Theme-Farben"""
-		# Verwende Theme-Farben
-		colors = SETTINGS.get_theme_colors()
-		self.screen.fill(colors['background'])
-		
-		# Subtile Animation des Hintergrunds
-		self.animation_time += 0.02
-		animation_offset = math.sin(self.animation_time) * 2
-		
 		# Zeichne Board-Rand mit Glow-Effekt
 		board_center = (self.center_x, self.center_y)
 		board_radius = HEX_SIZE * 6
@@ -1355,21 +2603,49 @@ class AbaloneUI:
 				color = (*BOARD_HIGHLIGHT_COLOR, alpha)
 				s = pygame.Surface((board_radius * 2 + i * 4, board_radius * 2 + i * 4), pygame.SRCALPHA)
 				pygame.draw.circle(s, color, (board_radius + i * 2, board_radius + i * 2), board_radius + i * 2, 2)
-				self.screen.blit(s, (board_center[0] - board_radius - i * 2, board_center[1] - board_radius - i * 2))
-		
-		for hex_pos in self.game.board:
+				layer.blit(s, (board_center[0] - board_radius - i * 2, board_center[1] - board_radius - i * 2))
+		return layer
+
+	def _create_hex_layer(self):
+		"""Alle Felder ohne Hervorhebungen auf transparentem Grund"""
+		layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+		for hex_pos in BOARD_CELLS:
 			x, y = self.hex_to_pixel(hex_pos)
+			self.draw_hexagon(x, y, use_gradient=True, surface=layer)
+		return layer
+
+	def draw_board(self):
+		"""Zeichnet das verbesserte Spielbrett mit Theme-Farben"""
+		# Subtile Animation des Hintergrunds
+		self.animation_time += 0.02
+		animation_offset = math.sin(self.animation_time) * 2 if SETTINGS.board_bob_active() else 0
 
+		# Statische Ebenen aus dem Cache
+		self.screen.blit(self._get_layer('background'), (0, 0))
+		self.screen.blit(self._get_layer('hexes'), (0, animation_offset))
+		
+		# Zielfelder der Analyse-Hinweise wie gültige Züge hervorheben
+		hint_targets = {move.target for move in self._hint_moves()}
+
+		for hex_pos in self.game.board:
 			# Bestimme Hexagon-Zustand
 			selected = hex_pos in self.selected_marbles
-			valid_move = hex_pos in self.game.valid_moves
-			
+			valid_move = hex_pos in self.selection_moves or hex_pos in hint_targets
+			hovered = hex_pos == self.hovered_hex and not selected
+			if not (selected or valid_move or hovered):
+				continue  # Bereits in der Hex-Ebene enthalten
+
+			x, y = self.hex_to_pixel(hex_pos)
+
 			# Basis-Hexagon mit Verbesserungen und Animation
 			animated_y = y + animation_offset
-			self.draw_hexagon(x, animated_y, use_gradient=True, selected=selected, valid_move=valid_move)
+			if selected or valid_move:
+				sprite = self._get_hex_sprite(selected, valid_move)
+				half = sprite.get_width() // 2
+				self.screen.blit(sprite, (x - half, animated_y - half))
 
 			# Hover-Effekt - angepasste Größe
-			if hex_pos == self.hovered_hex and hex_pos not in self.selected_marbles:
+			if hovered:
 				hex_draw_size = HEX_SIZE * 0.85
 				s = pygame.Surface((hex_draw_size * 2, hex_draw_size * 2), pygame.SRCALPHA)
 				for i in range(6):
@@ -1380,9 +2656,37 @@ class AbaloneUI:
 										  hex_draw_size * 0.6 + i * 2)
 				self.screen.blit(s, (x - hex_draw_size, animated_y - hex_draw_size))
 
+	def _get_hex_sprite(self, selected, valid_move):
+		"""Liefert ein gecachtes, hervorgehobenes Feld inklusive Glow"""
+		key = ('hex', selected, valid_move)
+		sprite = self._layers.get(key)
+		if sprite is None:
+			half = int(HEX_SIZE * 1.3)
+			sprite = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
+			self.draw_hexagon(half, half, use_gradient=True, selected=selected,
+							  valid_move=valid_move, surface=sprite)
+			sprite = self._layers.setdefault(key, sprite)
+		return sprite
+
 	def draw_marble(self, hex_pos, player, selected=False, preview=False):
 		"""Zeichnet eine verbesserte Kugel mit 3D-Effekt"""
 		x, y = self.hex_to_pixel(hex_pos)
+		sprite = self._get_marble_sprite(player, selected and not preview, preview)
+		self.screen.blit(sprite, (x - HEX_SIZE, y - HEX_SIZE))
+
+	def _get_marble_sprite(self, player, selected, preview):
+		"""Liefert ein gecachtes Kugel-Sprite (zentriert auf HEX_SIZE, HEX_SIZE)"""
+		key = (player, selected, preview)
+		sprite = self._marble_sprites.get(key)
+		if sprite is None:
+			sprite = self._create_marble_sprite(player, selected, preview)
+			sprite = self._marble_sprites.setdefault(key, sprite)
+		return sprite
+
+	def _create_marble_sprite(self, player, selected, preview):
+		"""Rendert eine Kugel einmalig auf eine transparente Fläche"""
+		s = pygame.Surface((HEX_SIZE * 2, HEX_SIZE * 2), pygame.SRCALPHA)
+		x, y = HEX_SIZE, HEX_SIZE
 		# Angepasste Kugel-Größe für bessere Darstellung
 		radius = int(HEX_SIZE * 0.4)
 
@@ -1398,10 +2702,8 @@ class AbaloneUI:
 
 		if preview:
 			# Transparente Vorschau
-			s = pygame.Surface((HEX_SIZE * 2, HEX_SIZE * 2), pygame.SRCALPHA)
-
 			# Schatten
-			pygame.draw.circle(s, (0, 0, 0, 40), (HEX_SIZE + 3, HEX_SIZE + 3), radius)
+			pygame.draw.circle(s, (0, 0, 0, 40), (x + 3, y + 3), radius)
 
 			# Basis-Kugel mit Transparenz
 			for i in range(radius, 0, -2):
@@ -1411,21 +2713,19 @@ class AbaloneUI:
 					for j in range(3)
 				]
 				color.append(80)  # Alpha für Transparenz
-				pygame.draw.circle(s, color, (HEX_SIZE, HEX_SIZE), i)
+				pygame.draw.circle(s, color, (x, y), i)
 
 			# Glanzlicht
-			pygame.draw.circle(s, (*highlight_color, 60), (HEX_SIZE - 8, HEX_SIZE - 8), radius // 3)
-
-			self.screen.blit(s, (x - HEX_SIZE, y - HEX_SIZE))
+			pygame.draw.circle(s, (*highlight_color, 60), (x - 8, y - 8), radius // 3)
 		else:
 			# Normale Darstellung mit 3D-Effekt
 			# Schatten (mehrschichtig für weicheren Effekt)
 			for i in range(5):
 				alpha = 60 - (i * 10)
 				if alpha > 0:
-					s = pygame.Surface((radius * 2 + 10, radius * 2 + 10), pygame.SRCALPHA)
-					pygame.draw.circle(s, (0, 0, 0, alpha), (radius + 5, radius + 5), radius + i)
-					self.screen.blit(s, (x - radius - 5 + 2, y - radius - 5 + 2))
+					shadow = pygame.Surface((radius * 2 + 10, radius * 2 + 10), pygame.SRCALPHA)
+					pygame.draw.circle(shadow, (0, 0, 0, alpha), (radius + 5, radius + 5), radius + i)
+					s.blit(shadow, (x - radius - 5 + 2, y - radius - 5 + 2))
 
 			# Radialer Farbverlauf für 3D-Effekt
 			for i in range(radius, 0, -1):
@@ -1434,25 +2734,27 @@ class AbaloneUI:
 					int(dark_color[j] + (light_color[j] - dark_color[j]) * ratio)
 					for j in range(3)
 				]
-				pygame.draw.circle(self.screen, color, (x, y), i)
+				pygame.draw.circle(s, color, (x, y), i)
 
 			# Mehrere Glanzlichter für realistischen Effekt
 			# Hauptglanzlicht
-			pygame.draw.circle(self.screen, highlight_color, (x - 8, y - 8), radius // 3)
+			pygame.draw.circle(s, highlight_color, (x - 8, y - 8), radius // 3)
 			# Sekundäres Glanzlicht
-			pygame.draw.circle(self.screen, highlight_color, (x - 12, y - 6), radius // 6)
+			pygame.draw.circle(s, highlight_color, (x - 12, y - 6), radius // 6)
 			# Subtiler Rim-Light
-			pygame.draw.circle(self.screen, light_color, (x, y), radius, 1)
+			pygame.draw.circle(s, light_color, (x, y), radius, 1)
 
 			# Auswahlmarkierung mit Glow-Effekt
 			if selected:
-				s = pygame.Surface((radius * 3, radius * 3), pygame.SRCALPHA)
+				glow = pygame.Surface((radius * 3, radius * 3), pygame.SRCALPHA)
 				for i in range(12):
 					alpha = 200 - (i * 16)
 					if alpha > 0:
 						color = (*SELECTED_GLOW[:3], alpha)
-						pygame.draw.circle(s, color, (radius * 1.5, radius * 1.5), radius + i)
-				self.screen.blit(s, (x - radius * 1.5, y - radius * 1.5))
+						pygame.draw.circle(glow, color, (radius * 1.5, radius * 1.5), radius + i)
+				s.blit(glow, (x - radius * 1.5, y - radius * 1.5))
+
+		return s
 
 	def draw_ui(self):
 		"""Zeichnet die kompaktere UI-Info-Box"""
@@ -1514,10 +2816,17 @@ class AbaloneUI:
 		if white_progress.width > 0:
 			pygame.draw.rect(self.screen, (255, 255, 255), white_progress, border_radius=4)
 
-		# Gewinner-Nachricht mit Effekt
+		# Gewinner- bzw. Remis-Nachricht mit Effekt
 		winner = self.game.check_winner()
-		if winner:
-			winner_text = "Schwarz" if winner == Player.BLACK else "Weiß"
+		draw_reason = self.game.draw_reason() if not winner else None
+		if winner or draw_reason:
+			if winner:
+				winner_text = "Schwarz" if winner == Player.BLACK else "Weiß"
+				win_text = f"🎉 {winner_text} hat gewonnen! 🎉"
+			elif draw_reason == 'repetition':
+				win_text = "Remis durch Stellungswiederholung"
+			else:
+				win_text = f"Remis: {self.game.quiet_ply_limit} Züge ohne Hinausschieben"
 			
 			# Hintergrund mit Glow
 			wins_bg_rect = pygame.Rect(0, 100, WINDOW_WIDTH, 100)
@@ -1527,7 +2836,6 @@ class AbaloneUI:
 			self.screen.blit(win_bg, (0, 100))
 			
 			# Text mit größerer Schrift und besserem Kontrast
-			win_text = f"🎉 {winner_text} hat gewonnen! 🎉"
 			win_shadow = self.large_font.render(win_text, True, (0, 0, 0))
 			win_surface = self.large_font.render(win_text, True, (255, 255, 255))
 			win_rect = win_surface.get_rect(center=(WINDOW_WIDTH // 2, 150))
@@ -1539,68 +2847,161 @@ class AbaloneUI:
 			self.screen.blit(win_surface, win_rect)
 			
 			# Partikel-Effekt für Gewinn
-			if random.random() < 0.3:
+			if winner and random.random() < 0.3:
 				self.add_particle_effect((WINDOW_WIDTH // 2, 150), SELECTED_GLOW[:3])
 
+	def set_selection(self, marbles):
+		"""Setzt die Auswahl und berechnet einmalig alle Züge dafür (Zielfeld -> Move)"""
+		self.selected_marbles = marbles
+		self.selection_moves = {}
+		if marbles and self.game:
+			for move in self.game.moves_for_selection(marbles):
+				# Wie make_move: bei gleichem Zielfeld gilt der erste Zug
+				self.selection_moves.setdefault(move.target, move)
+
+	def _get_preview_move(self):
+		"""Zug für das Feld unter der Maus (oder None)"""
+		if self.hovered_hex is None:
+			return None
+		return self.selection_moves.get(self.hovered_hex)
+
 	def draw_preview(self):
-		"""Zeichnet eine Vorschau der ausgewählten Kugeln an der Mausposition"""
-		if not self.selected_marbles or not self.hovered_hex:
+		"""Zeichnet eine Vorschau des Zugs für das Feld unter der Maus"""
+		move = self._get_preview_move()
+		if move is None:
 			return
 
-		# Prüfe ob dies ein gültiger Zug wäre
-		if self.hovered_hex not in self.game.valid_moves:
-			return
+		self._draw_move_path(move, HIGHLIGHT_COLOR)
 
-		# Bestimme die Bewegungsrichtung
-		direction = None
+		# Geschobene gegnerische Kugeln: Vorschau am neuen Feld, vom Brett
+		# geschobene Kugeln werden rot markiert
+		opponent = Player.WHITE if self.game.current_player == Player.BLACK else Player.BLACK
+		for cell in move.pushed:
+			new_pos = cell.neighbor(move.direction)
+			if self.game._is_valid_position(new_pos):
+				self.draw_marble(new_pos, opponent, preview=True)
+			else:
+				x, y = self.hex_to_pixel(cell)
+				pygame.draw.circle(self.screen, INVALID_MOVE_COLOR[:3], (x, y), HEX_SIZE - 6, 3)
 
-		if len(self.selected_marbles) == 1:
-			# Für einzelne Kugeln
-			for dir_idx in range(6):
-				if self.selected_marbles[0].neighbor(dir_idx) == self.hovered_hex:
-					direction = dir_idx
-					break
-		else:
-			# Für mehrere Kugeln
-			for dir_idx in range(6):
-				# Prüfe ob es eine gültige Bewegung in diese Richtung ist
-				if self.game._is_inline_move(self.selected_marbles, dir_idx):
-					lead = self.game._get_lead_marble(self.selected_marbles, dir_idx)
-					if lead.neighbor(dir_idx) == self.hovered_hex:
-						direction = dir_idx
-						break
-				elif self.game._can_move_broadside(self.selected_marbles, dir_idx):
-					if self.selected_marbles[0].neighbor(dir_idx) == self.hovered_hex:
-						direction = dir_idx
-						break
+		# Zeichne transparente Vorschau der Kugeln an neuer Position
+		for new_pos in move.destinations:
+			self.draw_marble(new_pos, self.game.current_player, preview=True)
+
+	def _draw_move_path(self, move, color):
+		"""Gestrichelte Linien von jeder gezogenen Kugel zu ihrem Zielfeld"""
+		for marble, new_pos in zip(move.marbles, move.destinations):
+			start_x, start_y = self.hex_to_pixel(marble)
+			end_x, end_y = self.hex_to_pixel(new_pos)
+
+			# Zeichne gestrichelte Linie
+			distance = math.sqrt((end_x - start_x) ** 2 + (end_y - start_y) ** 2)
+			steps = int(distance / 10)
+			for i in range(0, steps, 2):
+				t1 = i / steps
+				t2 = min((i + 1) / steps, 1)
+				x1 = start_x + (end_x - start_x) * t1
+				y1 = start_y + (end_y - start_y) * t1
+				x2 = start_x + (end_x - start_x) * t2
+				y2 = start_y + (end_y - start_y) * t2
+				pygame.draw.line(self.screen, color, (x1, y1), (x2, y2), 2)
+
+	def toggle_analysis(self):
+		"""Schaltet den Analysemodus (Bewertungsbalken und Zughinweise) um"""
+		self.analysis_enabled = not self.analysis_enabled
+		self.analysis = self.analysis_key = self.analysis_result = None
+		self.scheduler.request_redraw()
+
+	def _human_to_move(self):
+		"""Ob ein menschlicher Spieler am Zug ist (nicht die KI, keine beendete Partie)"""
+		if self.game.is_over() or self.ai_thinking:
+			return False
+		return not (self.ai and self.game.current_player == self.ai_player)
 
-		if direction is None:
+	def update_analysis(self):
+		"""Rechnet die Analyse der aktuellen Stellung für höchstens ANALYSIS_BUDGET weiter
+
+		Die Suche läuft schrittweise im Hauptthread weiter (ein Schritt ist
+		ein Teilbaum von wenigen Millisekunden), daher bleibt die Oberfläche
+		flüssig; nach jeder fertigen Tiefe werden Balken und Hinweise genauer.
+		"""
+		if not self.analysis_enabled or self.current_state not in GAME_STATES:
 			return
 
-		# Zeichne gestrichelte Linien von Original zu Vorschau
-		for marble in self.selected_marbles:
-			start_x, start_y = self.hex_to_pixel(marble)
-			new_pos = marble.neighbor(direction)
-			if self.game._is_valid_position(new_pos):
-				end_x, end_y = self.hex_to_pixel(new_pos)
-
-				# Zeichne gestrichelte Linie
-				distance = math.sqrt((end_x - start_x) ** 2 + (end_y - start_y) ** 2)
-				steps = int(distance / 10)
-				for i in range(0, steps, 2):
-					t1 = i / steps
-					t2 = min((i + 1) / steps, 1)
-					x1 = start_x + (end_x - start_x) * t1
-					y1 = start_y + (end_y - start_y) * t1
-					x2 = start_x + (end_x - start_x) * t2
-					y2 = start_y + (end_y - start_y) * t2
-					pygame.draw.line(self.screen, HIGHLIGHT_COLOR, (x1, y1), (x2, y2), 2)
+		key = self.game.snapshot()
+		if key != self.analysis_key:
+			self.analysis_key = key
+			self.analysis = self.analysis_result = None
+			self.scheduler.request_redraw()
+			if self._human_to_move():
+				if self.analyzer is None:
+					self.analyzer = AbaloneAI(AIDifficulty.HARD)
+				self.analysis = self.analyzer.analyze(self.game, self.game.current_player, ANALYSIS_LINES)
+		if self.analysis is None:
+			return
 
-		# Zeichne transparente Vorschau der Kugeln an neuer Position
-		for marble in self.selected_marbles:
-			new_pos = marble.neighbor(direction)
-			if self.game._is_valid_position(new_pos):
-				self.draw_marble(new_pos, self.game.current_player, preview=True)
+		deadline = time.perf_counter() + ANALYSIS_BUDGET
+		while time.perf_counter() < deadline:
+			try:
+				result = next(self.analysis)
+			except StopIteration:
+				self.analysis = None
+				break
+			if result is not None:
+				self.analysis_result = result
+				self.scheduler.request_redraw()
+
+	def _hint_moves(self):
+		"""Züge der Analyse, die als Hinweis angezeigt werden (nicht während einer Auswahl)"""
+		result = self.analysis_result
+		if not self.analysis_enabled or result is None or self.selected_marbles:
+			return []
+		return [line.move for line in result.lines]
+
+	def _eval_bar_state(self):
+		"""(Anteil von Schwarz 0..1, Beschriftung) für den Bewertungsbalken"""
+		result = self.analysis_result
+		if result is None or result.move is None:
+			return 0.5, "..."
+		# Die Analyse bewertet aus Sicht des Spielers am Zug, der Balken aus Sicht von Schwarz
+		score = result.score if self.game.current_player == Player.BLACK else -result.score
+		share = 0.5 + 0.5 * math.tanh(score / EVAL_BAR_SCALE)
+		return share, f"{score:+.0f} T{result.depth}"
+
+	def draw_analysis(self):
+		"""Zeichnet Bewertungsbalken und Zughinweise (bester Hinweis zuoberst)"""
+		hints = self._hint_moves()
+		for rank in range(len(hints), 0, -1):
+			move = hints[rank - 1]
+			color = HINT_COLORS[(rank - 1) % len(HINT_COLORS)]
+			self._draw_move_path(move, color)
+			x, y = self.hex_to_pixel(move.target)
+			badge = (int(x + HEX_SIZE * 0.45), int(y - HEX_SIZE * 0.45))
+			pygame.draw.circle(self.screen, color, badge, 10)
+			label = self.small_font.render(str(rank), True, (0, 0, 0))
+			self.screen.blit(label, label.get_rect(center=badge))
+
+		colors = SETTINGS.get_theme_colors()
+		rect = pygame.Rect(EVAL_BAR_RECT)
+		share, text = self._eval_bar_state()
+		pygame.draw.rect(self.screen, WHITE_MARBLE_LIGHT, rect, border_radius=4)
+		black = pygame.Rect(rect.x, rect.bottom - int(rect.height * share), rect.width, int(rect.height * share))
+		if black.height > 0:
+			pygame.draw.rect(self.screen, BLACK_MARBLE_LIGHT, black, border_radius=4)
+		pygame.draw.line(self.screen, HIGHLIGHT_COLOR, (rect.x - 4, rect.centery), (rect.right + 3, rect.centery), 2)
+		pygame.draw.rect(self.screen, colors['board_border'], rect, 2, border_radius=4)
+		surface = self.small_font.render(text, True, TEXT_COLOR)
+		self.screen.blit(surface, surface.get_rect(midtop=(rect.centerx, rect.bottom + 8)))
+
+	def _analysis_rects(self):
+		"""Bildschirmbereiche von Bewertungsbalken und Hinweisen"""
+		bar = pygame.Rect(EVAL_BAR_RECT).inflate(12, 12)
+		bar.height += 40  # Beschriftung unter dem Balken
+		hints = []
+		for move in self._hint_moves():
+			for cell in move.marbles + move.destinations:
+				hints.append(self._hex_rect(cell))
+		return [bar], hints
 
 	def handle_click(self, pos):
 		"""Verarbeitet Mausklicks"""
@@ -1613,38 +3014,72 @@ class AbaloneUI:
 		if self.ai and self.game.current_player == self.ai_player:
 			return
 
+		# In der Wiederholung wird nur geblättert
+		if self.current_state == GameState.REPLAY:
+			return
+
+		# Nach Sieg oder Remis sind keine Züge mehr möglich
+		if self.game.is_over():
+			return
+
 		marble = self.game.board[hex_pos]
 
 		# Klick auf eigene Kugel
 		if marble == self.game.current_player:
 			if hex_pos in self.selected_marbles:
-				self.selected_marbles.remove(hex_pos)
+				selection = [m for m in self.selected_marbles if m != hex_pos]
 			else:
-				self.selected_marbles.append(hex_pos)
+				selection = self.selected_marbles + [hex_pos]
 
 			# Aktualisiere gültige Züge
-			self.game.valid_moves = self.game.calculate_valid_moves(self.selected_marbles)
+			self.set_selection(selection)
 
 		# Klick auf gültigen Zug
-		elif hex_pos in self.game.valid_moves:
-			if self.game.make_move(self.selected_marbles, hex_pos):
-				# Partikel-Effekt für erfolgreichen Zug
-				pixel_pos = self.hex_to_pixel(hex_pos)
-				self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 8)
-				
-				self.selected_marbles = []
-				self.game.valid_moves = set()
+		elif hex_pos in self.selection_moves:
+			self.game.apply(self.selection_moves[hex_pos])
+
+			# Partikel-Effekt für erfolgreichen Zug
+			pixel_pos = self.hex_to_pixel(hex_pos)
+			self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 8)
+			
+			self.set_selection([])
+
+	def undo_move(self):
+		"""Nimmt den letzten Zug zurück - gegen die KI auch deren Antwort"""
+		if not self.game or self.ai_thinking:
+			return
+		self.game.undo()
+		if self.ai and self.game.current_player == self.ai_player and self.game.history:
+			self.game.undo()
+		self.set_selection([])
+
+	def redo_move(self):
+		"""Wiederholt einen zurückgenommenen Zug - gegen die KI auch deren Antwort"""
+		if not self.game or self.ai_thinking:
+			return
+		self.game.redo()
+		if self.ai and self.game.current_player == self.ai_player and self.game.redo_stack:
+			self.game.redo()
+		self.set_selection([])
 
 	def run(self):
 		"""Hauptspiel-Loop mit State-Management"""
 		running = True
 
 		while running:
-			# Events verarbeiten
-			for event in pygame.event.get():
+			# Events verarbeiten (im Leerlauf wird hier geschlafen)
+			events = self.scheduler.poll_events(self)
+			if events:
+				self.scheduler.request_redraw()
+
+			for event in events:
 				if event.type == pygame.QUIT:
 					running = False
 
+				elif event.type == pygame.VIDEOEXPOSE:
+					# Fensterinhalt ging verloren - komplett neu übertragen
+					self.dirty_tracker.invalidate()
+
 				elif event.type == pygame.MOUSEBUTTONDOWN:
 					if self.current_state == GameState.MAIN_MENU:
 						action = self.main_menu.handle_event(event)
@@ -1660,26 +3095,47 @@ class AbaloneUI:
 							if result == "quit":
 								running = False
 								
-					elif self.current_state in [GameState.GAME_PVP, GameState.GAME_AI, GameState.GAME_2V2]:
+					elif self.current_state in GAME_STATES:
 						# Game-spezifische Event-Behandlung
 						if self.new_game_button and self.new_game_button.handle_event(event):
 							self.current_state = GameState.MAIN_MENU
 						elif self.quit_button and self.quit_button.handle_event(event):
 							running = False
+						elif (self.current_state == GameState.REPLAY
+							  and pygame.Rect(TIMELINE_RECT).inflate(20, 30).collidepoint(event.pos)):
+							self.replay_scrubbing = True
+							self.replay_seek(self._timeline_ply(event.pos[0]))
 						else:
 							# Nur Klicks verarbeiten wenn KI nicht am Denken ist
 							if not self.ai_thinking:
 								self.handle_click(event.pos)
 
+				elif event.type == pygame.MOUSEBUTTONUP:
+					self.replay_scrubbing = False
+
+				elif event.type == pygame.KEYDOWN:
+					if (self.current_state in GAME_STATES and event.key == pygame.K_a
+							and not event.mod & pygame.KMOD_CTRL):
+						self.toggle_analysis()
+					elif self.current_state == GameState.REPLAY and not event.mod & pygame.KMOD_CTRL:
+						self.handle_replay_key(event.key)
+					elif self.current_state in GAME_STATES and event.mod & pygame.KMOD_CTRL:
+						if event.key == pygame.K_z:
+							self.undo_move()
+						elif event.key == pygame.K_y:
+							self.redo_move()
+
 				elif event.type == pygame.MOUSEMOTION:
 					self.mouse_pos = event.pos
+					if self.replay_scrubbing and self.current_state == GameState.REPLAY:
+						self.replay_seek(self._timeline_ply(event.pos[0]))
 					
 					# Menü-Hover-Effekte
 					if self.current_state == GameState.MAIN_MENU:
 						self.main_menu.handle_event(event)
 					elif self.current_state == GameState.SETTINGS:
 						self.settings_menu.handle_event(event)
-					elif self.current_state in [GameState.GAME_PVP, GameState.GAME_AI, GameState.GAME_2V2]:
+					elif self.current_state in GAME_STATES:
 						# Game-spezifische Hover-Behandlung
 						if self.new_game_button:
 							self.new_game_button.handle_event(event)
@@ -1692,18 +3148,31 @@ class AbaloneUI:
 							if self.hovered_hex not in self.game.board:
 								self.hovered_hex = None
 
-			# Bildschirm zeichnen basierend auf aktuellem State
-			if self.current_state == GameState.MAIN_MENU:
-				self.main_menu.draw()
-			elif self.current_state == GameState.SETTINGS:
-				self.settings_menu.draw()
-			elif self.current_state in [GameState.GAME_PVP, GameState.GAME_AI, GameState.GAME_2V2]:
-				self.draw_game()
-
-			# Update
-			pygame.display.flip()
-			self.clock.tick(FPS)
-
+			# KI-Update (falls KI-Spiel) - unabhängig davon, ob gezeichnet wird
+			if self.game and self.current_state in GAME_STATES:
+				self.update_ai()
+				self.update_analysis()
+
+			# Bildschirm nur zeichnen, wenn sich etwas geändert hat
+			if self.scheduler.should_draw(self):
+				if self.current_state == GameState.MAIN_MENU:
+					self.main_menu.draw()
+				elif self.current_state == GameState.SETTINGS:
+					self.settings_menu.draw()
+				elif self.current_state in GAME_STATES:
+					self.draw_game()
+
+				self.present_frame()
+				self.scheduler.frame_presented()
+				if self.first_frame_ms is None:
+					self.first_frame_ms = (time.perf_counter() - self.started) * 1000
+					if self.report_startup:
+						print(f"Erstes Bild nach {self.first_frame_ms:.0f} ms")
+					self.prebuild_assets()
+
+			self.clock.tick(self.scheduler.frame_rate(self))
+
+		self.close_ai()
 		pygame.quit()
 		sys.exit()
 	
@@ -1711,9 +3180,18 @@ class AbaloneUI:
 		"""Zeichnet das Spiel"""
 		if not self.game:
 			return
-			
-		# KI-Update (falls KI-Spiel)
-		self.update_ai()
+
+		# Partikel vor dem Zeichnen bewegen, damit ihre Bereiche erfasst werden
+		self.update_particles()
+
+		# Im Dirty-Rect-Modus nur die geänderten Bereiche neu zeichnen
+		if SETTINGS.dirty_rect_rendering:
+			self._track_dirty_regions()
+			if not self.dirty_tracker.full:
+				if not self.dirty_tracker.rects:
+					return
+				rects = self.dirty_tracker.rects
+				self.screen.set_clip(rects[0].unionall(rects[1:]))
 			
 		# Zeichne Brett (enthält jetzt Hintergrund)
 		self.draw_board()
@@ -1727,13 +3205,16 @@ class AbaloneUI:
 		# Zeichne Vorschau (nur wenn nicht KI am Zug)
 		if not self.ai_thinking:
 			self.draw_preview()
+		if self.analysis_enabled:
+			self.draw_analysis()
 
-		# Update und zeichne Partikel
-		self.update_particles()
+		# Zeichne Partikel
 		self.draw_particles()
 
 		# Zeichne kompakte UI
 		self.draw_ui()
+		if self.current_state == GameState.REPLAY:
+			self.draw_replay_timeline()
 		
 		# Zeichne Game-Buttons
 		if self.new_game_button:
@@ -1744,80 +3225,144 @@ class AbaloneUI:
 		# Zeichne KI-Status
 		if self.ai_thinking:
 			self.draw_ai_thinking()
+
+		self.screen.set_clip(None)
+
+	def _hex_rect(self, hex_pos):
+		"""Bildschirmbereich eines Feldes inklusive Glow und Schatten"""
+		size = int(HEX_SIZE * 2.6)
+		rect = pygame.Rect(0, 0, size, size)
+		rect.center = self.hex_to_pixel(hex_pos)
+		return rect
+
+	def _track_dirty_regions(self):
+		"""Ermittelt die seit dem letzten Frame geänderten Bildschirmbereiche"""
+		tracker = self.dirty_tracker
+
+		# Gezogene, geschobene und geschlagene Kugeln
+		for hex_pos, player in self.game.board.items():
+			tracker.track(('cell', hex_pos), player, [self._hex_rect(hex_pos)])
+
+		# Hover, Auswahl und gültige Züge
+		hovered = [self._hex_rect(self.hovered_hex)] if self.hovered_hex else []
+		tracker.track('hover', self.hovered_hex, hovered)
+		tracker.track('selection', tuple(self.selected_marbles),
+					  [self._hex_rect(h) for h in self.selected_marbles])
+		tracker.track('valid_moves', frozenset(self.selection_moves),
+					  [self._hex_rect(h) for h in self.selection_moves])
+
+		# Zugvorschau: Ursprung und Ziel jeder eigenen und geschobenen Kugel
+		move = None if self.ai_thinking else self._get_preview_move()
+		preview = []
+		if move is not None:
+			preview = list(zip(move.marbles, move.destinations))
+			preview += [(cell, cell.neighbor(move.direction)) for cell in move.pushed]
+		tracker.track('preview', move,
+					  [self._hex_rect(old).union(self._hex_rect(new)) for old, new in preview])
+
+		# Analyse: Balken bei neuer Bewertung, Hinweise bei neuen Zügen
+		bar, hints = self._analysis_rects() if self.analysis_enabled else ([], [])
+		tracker.track('eval_bar', self._eval_bar_state() if self.analysis_enabled else None, bar)
+		tracker.track('hints', tuple(self._hint_moves()), hints)
+
+		# Partikel
+		bounds = []
+		for particle in self.particles:
+			size = int(particle['size'] * particle['life']) + 1
+			bounds.append(pygame.Rect(particle['pos'][0] - size, particle['pos'][1] - size,
+									  size * 2 + 1, size * 2 + 1))
+		tracker.track('particles', tuple(map(tuple, bounds)), bounds)
+
+		# HUD-Panel, Gewinner-Banner und Buttons
+		scores = (self.game.scores[Player.BLACK], self.game.scores[Player.WHITE])
+		tracker.track('hud', (self.game.current_player, scores),
+					  [pygame.Rect(WINDOW_WIDTH - 280, 20, 250, 180).inflate(4, 4)])
+		result = self.game.check_winner() or self.game.draw_reason()
+		tracker.track('winner', result, [pygame.Rect(0, 100, WINDOW_WIDTH, 100)] if result else [])
+		if self.current_state == GameState.REPLAY:
+			tracker.track('timeline', (self.game.ply, self.replay_length()),
+						  [pygame.Rect(TIMELINE_RECT).inflate(24, 24).union(pygame.Rect(TIMELINE_RECT).move(0, -30))])
+		for name, button in (('menu', self.new_game_button), ('quit', self.quit_button)):
+			if button:
+				tracker.track(('button', name), button.hovered, [button.rect.inflate(6, 6)])
+
+		# KI-Status wird während des Denkens in jedem Frame animiert
+		think_rect = pygame.Rect(WINDOW_WIDTH // 2 - 150, 50, 300, 60).inflate(6, 6)
+		tracker.track('ai_thinking', self.animation_time if self.ai_thinking else None,
+					  [think_rect] if self.ai_thinking else [])
+
+	def present_frame(self):
+		"""Übergibt das fertige Bild an das Display"""
+		if SETTINGS.dirty_rect_rendering and self.current_state in GAME_STATES:
+			rects = self.dirty_tracker.collect()
+			if rects is None:
+				pygame.display.flip()
+			elif rects:
+				pygame.display.update(rects)
+		else:
+			# Menüs werden komplett gezeichnet; beim Wechsel ins Spiel alles neu
+			self.dirty_tracker.invalidate()
+			pygame.display.flip()
 	
 	def update_ai(self):
-		"""Aktualisiert die KI-Logik"""
+		"""Aktualisiert die KI-Logik - startet die Suche und übernimmt deren Ergebnis im Hauptthread"""
 		if not self.ai or self.current_state != GameState.GAME_AI:
 			return
-			
-		# Prüfe ob KI am Zug ist
-		if self.game.current_player == self.ai_player and not self.ai_thinking:
-			# Starte KI-Denkprozess in eigenem Thread
-			import threading
+
+		if self.ai_thinking:
+			result = self.ai.poll()
+			if result is not None:
+				self.ai_thinking = False
+				self._apply_ai_move(*result)
+				self.scheduler.request_redraw()
+			return
+
+		# Prüfe ob KI am Zug ist (und die Partie noch läuft)
+		if self.game.current_player == self.ai_player and not self.game.is_over():
 			self.ai_thinking = True
-			self.selected_marbles = []  # Deselektiere alle Kugeln
-			
-			def ai_move_thread():
-				try:
-					import time
-					start_time = time.time()
-					ai_move = None
-					
-					# Einfache Timeout-Simulation durch schnelle Berechnung
-					try:
-						ai_move = self.ai.get_best_move(self.game, self.ai_player)
-						elapsed = time.time() - start_time
-						
-						# Falls zu lange gedauert hat (>3 Sekunden), ignoriere Ergebnis
-						if elapsed > 3.0:
-							print(f"KI-Zug dauerte zu lange ({elapsed:.1f}s) - verwende Fallback")
-							ai_move = None
-							
-					except Exception as e:
-						print(f"KI-Berechnungsfehler: {e}")
-						ai_move = None
-					
-					# Führe den Zug aus oder verwende Fallback
-					if ai_move:
-						selected_marbles, target_hex = ai_move
-						if self.game.make_move(selected_marbles, target_hex):
-							# Partikel-Effekt für KI-Zug
-							pixel_pos = self.hex_to_pixel(target_hex)
-							self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 12)
-						else:
-							print("KI-Zug war ungültig - verwende Fallback")
-							ai_move = None
-					
-					# Fallback wenn kein gültiger Zug gefunden wurde
-					if not ai_move:
-						print("Verwende zufälligen Fallback-Zug")
-						# Einfacher Fallback: Finde ersten gültigen Zug
-						player_marbles = [pos for pos, p in self.game.board.items() if p == self.ai_player]
-						fallback_success = False
-						
-						for marble in player_marbles:
-							if fallback_success:
-								break
-							valid_moves = self.game.calculate_valid_moves([marble])
-							if valid_moves:
-								import random
-								target = random.choice(list(valid_moves))
-								if self.game.make_move([marble], target):
-									pixel_pos = self.hex_to_pixel(target)
-									self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 6)
-									fallback_success = True
-									print(f"Fallback erfolgreich: {marble} -> {target}")
-									break
-						
-						if not fallback_success:
-							print("Keine gültigen Züge verfügbar - KI kann nicht ziehen")
-							
-				except Exception as e:
-					print(f"Kritischer KI-Fehler: {e}")
-				finally:
-					self.ai_thinking = False
-			
-			threading.Thread(target=ai_move_thread, daemon=True).start()
+			self.set_selection([])  # Deselektiere alle Kugeln
+			self.ai.request(self.game, self.ai_player)
+
+	def _apply_ai_move(self, code, error):
+		"""Führt den Zug aus dem KI-Prozess aus oder verwendet einen Fallback"""
+		from abalone_archive import decode_move
+
+		if error:
+			print(f"KI-Berechnungsfehler: {error}")
+		ai_move = None
+		if code is not None:
+			marbles, target = decode_move(code)
+			ai_move = next((move for move in self.game.moves_for_selection(marbles) if move.target == target), None)
+			if ai_move is None:
+				print("KI-Zug war ungültig - verwende Fallback")
+
+		if ai_move:
+			self.game.apply(ai_move)
+			# Partikel-Effekt für KI-Zug
+			pixel_pos = self.hex_to_pixel(ai_move.target)
+			self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 12)
+			return
+
+		# Fallback wenn kein gültiger Zug gefunden wurde: erster gültiger Zug einer Kugel
+		print("Verwende zufälligen Fallback-Zug")
+		player_marbles = [pos for pos, p in self.game.board.items() if p == self.ai_player]
+		for marble in player_marbles:
+			valid_moves = self.game.calculate_valid_moves([marble])
+			if valid_moves:
+				target = random.choice(list(valid_moves))
+				if self.game.make_move([marble], target):
+					pixel_pos = self.hex_to_pixel(target)
+					self.add_particle_effect(pixel_pos, HIGHLIGHT_COLOR, 6)
+					print(f"Fallback erfolgreich: {marble} -> {target}")
+					return
+		print("Keine gültigen Züge verfügbar - KI kann nicht ziehen")
+
+	def close_ai(self):
+		"""Beendet den KI-Prozess der laufenden Partie"""
+		if self.ai is not None:
+			self.ai.close()
+			self.ai = None
+		self.ai_thinking = False
 	
 	def draw_ai_thinking(self):
 		"""Zeichnet KI-Denkstatus"""
@@ -1850,5 +3395,7 @@ class AbaloneUI:
 
 
 if __name__ == "__main__":
-	game = AbaloneUI()
-	game.run()
\ No newline at end of file
+	# Startpunkt ist abalone_main - es lädt 'abalone' als Modul, damit Oberfläche,
+	# KI-Prozess und abalone_mcts dieselben Klassen sehen
+	import abalone_main
+	abalone_main.main()
@@ -0,0 +1,175 @@
+"""Parallele Stapelanalyse von Stellungen und Partiearchiven
+
+analyze_positions() verteilt Stellungen auf einen Prozess-Pool und liefert
+die Ergebnisse als Generator in der Reihenfolge ihrer Fertigstellung. Es sind
+immer nur wenige Aufträge pro Worker unterwegs, sodass beliebig große
+Eingaben durchlaufen, ohne alle Ergebnisse im Speicher zu halten.
+
+Das Kommandozeilenwerkzeug annotiert jede Stellung eines Archivs und schreibt
+eine JSON-Zeile pro Stellung. Wird es erneut mit derselben Ausgabedatei
+gestartet, überspringt es alle bereits analysierten Stellungen.
+"""
+
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from abalone import AbaloneAI, AbaloneGame, AIDifficulty
+from abalone_archive import GameArchiveReader, decode_move, encode_move
+from abalone_cache import AnalysisCache
+
+TASKS_PER_WORKER = 4  # Aufträge pro Worker in der Warteschlange
+
+
+@dataclass
+class AnalysisResult:
+	"""Analyse einer Stellung - Züge als Codes aus encode_move"""
+	position_id: str
+	move: Optional[int]
+	score: float
+	depth: int
+	nodes: int
+	pv: List[int] = field(default_factory=list)
+
+
+# --- Worker (laufen in eigenen Prozessen) ---
+
+_ENGINES = {}
+
+
+def _init_worker(cache_path=None):
+	"""Erstellt die KI-Instanzen einmal pro Prozess"""
+	cache = AnalysisCache(cache_path) if cache_path else None
+	for difficulty in AIDifficulty:
+		_ENGINES[difficulty.value] = AbaloneAI(difficulty, analysis_cache=cache)
+
+
+def _worker_analyze(position_id, snapshot, difficulty, depth, time_limit, node_limit):
+	game = AbaloneGame.from_snapshot(snapshot)
+	result = _ENGINES[difficulty].search(game, game.current_player, depth, time_limit, node_limit)
+	return AnalysisResult(
+		position_id,
+		encode_move(*result.move) if result.move else None,
+		result.score,
+		result.depth,
+		result.nodes,
+		[encode_move(*move) for move in result.pv],
+	)
+
+
+def analyze_positions(positions, difficulty=AIDifficulty.MEDIUM, depth=None, time_limit=None,
+					  node_limit=None, workers=None, skip=frozenset(), cache_path=None):
+	"""Analysiert (ID, Snapshot)-Paare parallel und liefert AnalysisResults, sobald sie fertig sind
+
+	Das Suchbudget (depth, time_limit in Sekunden, node_limit) gilt pro
+	Stellung. IDs in skip werden übersprungen, etwa beim Fortsetzen.
+	Mit cache_path teilen sich alle Worker einen persistenten AnalysisCache.
+	"""
+	workers = workers or os.cpu_count() or 1
+	max_in_flight = workers * TASKS_PER_WORKER
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+							 initargs=(cache_path,)) as executor:
+		pending = set()
+		try:
+			for position_id, snapshot in positions:
+				if position_id in skip:
+					continue
+				if len(pending) >= max_in_flight:
+					done, pending = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						yield future.result()
+				pending.add(executor.submit(_worker_analyze, position_id, snapshot,
+											difficulty.value, depth, time_limit, node_limit))
+
+			while pending:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield future.result()
+		finally:
+			# Abbruch durch den Aufrufer: noch nicht gestartete Aufträge verwerfen
+			for future in pending:
+				future.cancel()
+
+
+def iter_archive_positions(archive):
+	"""Liefert ('Partie:Halbzug', Snapshot, gespielter Zug) vor jedem Zug eines Archivs"""
+	for game_index, record in enumerate(archive):
+		game = AbaloneGame()
+		for ply, code in enumerate(record.moves):
+			yield f"{game_index}:{ply}", game.snapshot(), code
+			if not game.make_move(*decode_move(code)):
+				break
+
+
+def load_analyzed_ids(path):
+	"""Liest die IDs einer vorhandenen Ausgabedatei und entfernt eine abgebrochene letzte Zeile"""
+	ids = set()
+	if not os.path.exists(path):
+		return ids
+	with open(path, 'r+b') as f:
+		valid_end = 0
+		for line in f:
+			if not line.endswith(b'\n'):
+				break
+			try:
+				ids.add(json.loads(line)['id'])
+			except (ValueError, KeyError):
+				break
+			valid_end += len(line)
+		f.truncate(valid_end)
+	return ids
+
+
+def annotate_archive(archive_path, output_path, difficulty=AIDifficulty.MEDIUM, depth=None,
+					 time_limit=None, node_limit=None, workers=None, cache_path=None, log=print):
+	"""Analysiert alle Stellungen eines Archivs und hängt sie als JSON-Zeilen an output_path an"""
+	done = load_analyzed_ids(output_path)
+	if done:
+		log(f"Fortsetzen: {len(done)} Stellungen bereits analysiert")
+
+	played = {}
+
+	def positions(archive):
+		for position_id, snapshot, code in iter_archive_positions(archive):
+			if position_id not in done:
+				played[position_id] = code
+				yield position_id, snapshot
+
+	count = 0
+	with GameArchiveReader(archive_path) as archive, open(output_path, 'a', encoding='utf-8') as out:
+		for result in analyze_positions(positions(archive), difficulty, depth, time_limit,
+										node_limit, workers, cache_path=cache_path):
+			entry = {'id': result.position_id, 'played': played.pop(result.position_id)}
+			entry.update(asdict(result))
+			del entry['position_id']
+			out.write(json.dumps(entry, separators=(',', ':')) + '\n')
+			out.flush()
+			count += 1
+	return count
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Alle Stellungen eines Partiearchivs parallel analysieren")
+	parser.add_argument('archive')
+	parser.add_argument('output', help="JSON-Lines-Datei; vorhandene Einträge werden übersprungen")
+	parser.add_argument('--difficulty', choices=[d.name.lower() for d in AIDifficulty], default='medium')
+	parser.add_argument('--depth', type=int)
+	parser.add_argument('--movetime', type=int, metavar='MS', help="Zeitbudget pro Stellung")
+	parser.add_argument('--nodes', type=int, help="Knotenbudget pro Stellung")
+	parser.add_argument('--workers', type=int)
+	parser.add_argument('--cache', metavar='PATH', help="Persistenter Analyse-Cache (SQLite)")
+	args = parser.parse_args(argv)
+
+	count = annotate_archive(
+		args.archive, args.output, AIDifficulty[args.difficulty.upper()], args.depth,
+		args.movetime / 1000 if args.movetime else None, args.nodes, args.workers, args.cache)
+	print(f"Analysiert: {count} Stellungen")
+
+
+if __name__ == "__main__":
+	main()
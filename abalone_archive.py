@@ -0,0 +1,323 @@
+"""Kompaktes binäres Archivformat für Abalone-Partien
+
+Aufbau einer Archivdatei:
+
+	Header   '<4sHH'   Magic b'ABLA', Version, reserviert
+	Partien  je Partie '<HBBH' (Zuganzahl, Ergebnis, reserviert, Länge der
+	         Metadaten), danach die Metadaten als UTF-8-JSON und die Züge als
+	         uint16 (little endian)
+	Index    uint64-Offset jeder Partie
+	Footer   '<QI4s'   Offset des Index, Anzahl Partien, Magic b'ABLI'
+
+Ein Zug belegt 2 Bytes: Ankerfeld (6 Bit), Anzahl Kugeln - 1 (2 Bit),
+Linienrichtung (3 Bit) und Zugrichtung (3 Bit).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+from abalone import (AbaloneAI, AbaloneGame, AIDifficulty, BOARD_CELLS, CELL_INDEX, DIRECTIONS, QUIET_PLY_LIMIT,
+					 REPETITION_LIMIT, Hex, Player)
+
+ARCHIVE_MAGIC = b'ABLA'
+INDEX_MAGIC = b'ABLI'
+ARCHIVE_VERSION = 1
+
+HEADER = struct.Struct('<4sHH')
+RECORD_HEADER = struct.Struct('<HBBH')
+FOOTER = struct.Struct('<QI4s')
+
+# Ergebnis-Codes im Record-Header
+RESULT_UNKNOWN = 0
+RESULT_BLACK = 1
+RESULT_WHITE = 2
+RESULT_DRAW = 3
+
+
+def encode_move(selected_marbles, target_hex):
+	"""Kodiert einen Zug (Kugeln, Zielfeld) als 14-Bit-Integer"""
+	marbles = sorted(selected_marbles, key=lambda h: (h.q, h.r))
+	anchor = marbles[0]
+	count = len(marbles)
+
+	line_dir = 0
+	if count > 1:
+		step = marbles[1] - anchor
+		line_dir = DIRECTIONS.index((step.q, step.r))
+
+	direction = None
+	for dir_idx in range(6):
+		dq, dr = DIRECTIONS[dir_idx]
+		if count > 1 and dir_idx in (line_dir, (line_dir + 3) % 6):
+			# Inline: Ziel ist das Feld vor der führenden Kugel
+			lead = max(marbles, key=lambda m: m.q * dq + m.r * dr)
+			origin = lead
+		else:
+			# Einzelkugel oder Seitwärtszug: Ziel bezogen auf die erste gewählte Kugel
+			origin = selected_marbles[0]
+		if origin.neighbor(dir_idx) == target_hex:
+			direction = dir_idx
+			break
+
+	if direction is None:
+		raise ValueError(f"Zielfeld {target_hex} passt zu keiner Zugrichtung")
+
+	return CELL_INDEX[anchor] | (count - 1) << 6 | line_dir << 8 | direction << 11
+
+
+def decode_move(code):
+	"""Dekodiert einen Zug in (Kugeln, Zielfeld) für AbaloneGame.make_move"""
+	anchor = BOARD_CELLS[code & 0x3F]
+	count = ((code >> 6) & 0x3) + 1
+	line_dir = (code >> 8) & 0x7
+	direction = (code >> 11) & 0x7
+
+	dq, dr = DIRECTIONS[line_dir]
+	marbles = [Hex(anchor.q + dq * i, anchor.r + dr * i) for i in range(count)]
+
+	if count > 1 and direction in (line_dir, (line_dir + 3) % 6):
+		mq, mr = DIRECTIONS[direction]
+		lead = max(marbles, key=lambda m: m.q * mq + m.r * mr)
+		target = lead.neighbor(direction)
+	else:
+		target = marbles[0].neighbor(direction)
+
+	return marbles, target
+
+
+def result_from_winner(winner, draw=False):
+	"""Wandelt das Ergebnis von AbaloneGame.check_winner in einen Ergebnis-Code"""
+	if winner == Player.BLACK:
+		return RESULT_BLACK
+	if winner == Player.WHITE:
+		return RESULT_WHITE
+	return RESULT_DRAW if draw else RESULT_UNKNOWN
+
+
+@dataclass
+class ArchivedGame:
+	"""Eine Partie aus dem Archiv"""
+	moves: array
+	result: int = RESULT_UNKNOWN
+	metadata: Dict = field(default_factory=dict)
+
+	def replay(self) -> Iterator[Tuple[AbaloneGame, Tuple[List[Hex], Hex]]]:
+		"""Spielt die Partie nach und liefert (Spiel, Zug) nach jedem Halbzug
+
+		Das gelieferte AbaloneGame ist immer dasselbe Objekt und wird weiter
+		verändert - wer eine Stellung behalten will, muss sie kopieren.
+		"""
+		game = AbaloneGame()
+		for ply, code in enumerate(self.moves):
+			move = decode_move(code)
+			if not game.make_move(*move):
+				raise ValueError(f"Ungültiger Zug in Halbzug {ply}: {move}")
+			yield game, move
+
+
+class GameArchiveWriter:
+	"""Streamender Writer - Partien werden nur angehängt, der Index beim Schließen geschrieben"""
+
+	def __init__(self, path):
+		self.path = path
+		self.offsets = array('Q')
+
+		if os.path.exists(path) and os.path.getsize(path) > 0:
+			# Bestehendes Archiv fortsetzen: Index lesen und abschneiden
+			with GameArchiveReader(path) as reader:
+				self.offsets.extend(reader.offsets)
+				end = reader.data_end
+			self.file = open(path, 'r+b')
+			self.file.truncate(end)
+			self.file.seek(end)
+		else:
+			self.file = open(path, 'wb')
+			self.file.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0))
+
+	def write_game(self, moves, result=RESULT_UNKNOWN, metadata=None):
+		"""Hängt eine Partie an (Züge als Integer-Codes oder (Kugeln, Ziel)-Tupel)"""
+		codes = array('H', (m if isinstance(m, int) else encode_move(*m) for m in moves))
+		if sys.byteorder != 'little':
+			codes.byteswap()
+		meta = json.dumps(metadata, separators=(',', ':')).encode('utf-8') if metadata else b''
+
+		self.offsets.append(self.file.tell())
+		self.file.write(RECORD_HEADER.pack(len(codes), result, 0, len(meta)))
+		self.file.write(meta)
+		self.file.write(codes.tobytes())
+
+	def close(self):
+		"""Schreibt Index und Footer"""
+		if self.file.closed:
+			return
+		index_offset = self.file.tell()
+		offsets = array('Q', self.offsets)
+		if sys.byteorder != 'little':
+			offsets.byteswap()
+		self.file.write(offsets.tobytes())
+		self.file.write(FOOTER.pack(index_offset, len(self.offsets), INDEX_MAGIC))
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+class GameArchiveReader:
+	"""Liest Partien lazy über eine Memory-Map
+
+	Fehlt der Index (z.B. nach einem Abbruch beim Schreiben), werden die
+	Offsets durch einen sequentiellen Scan rekonstruiert.
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self.file = open(path, 'rb')
+		# Leere oder abgeschnittene Dateien vor dem mmap abweisen (mmap scheitert an leeren Dateien)
+		if os.fstat(self.file.fileno()).st_size < HEADER.size:
+			self.file.close()
+			raise ValueError(f"{path} ist kein Abalone-Archiv (kürzer als der Header)")
+		self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic, version, _ = HEADER.unpack_from(self.data, 0)
+		error = None
+		if magic != ARCHIVE_MAGIC:
+			error = f"{path} ist kein Abalone-Archiv"
+		elif version > ARCHIVE_VERSION:
+			error = f"Archiv-Version {version} wird nicht unterstützt"
+		if error:
+			self.close()
+			raise ValueError(error)
+
+		self.offsets, self.data_end = self._read_index()
+
+	def _read_index(self):
+		"""Liest den Index aus dem Footer oder scannt die Partien"""
+		size = len(self.data)
+		if size >= HEADER.size + FOOTER.size:
+			index_offset, count, magic = FOOTER.unpack_from(self.data, size - FOOTER.size)
+			if magic == INDEX_MAGIC and index_offset + count * 8 + FOOTER.size == size:
+				offsets = array('Q')
+				offsets.frombytes(self.data[index_offset:index_offset + count * 8])
+				if sys.byteorder != 'little':
+					offsets.byteswap()
+				return offsets, index_offset
+
+		# Kein gültiger Footer: Records bis zum ersten unvollständigen einlesen
+		offsets = array('Q')
+		pos = HEADER.size
+		while pos + RECORD_HEADER.size <= size:
+			count, _, _, meta_len = RECORD_HEADER.unpack_from(self.data, pos)
+			end = pos + RECORD_HEADER.size + meta_len + count * 2
+			if end > size:
+				break
+			offsets.append(pos)
+			pos = end
+		return offsets, pos
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def __getitem__(self, n) -> ArchivedGame:
+		"""Springt direkt zur n-ten Partie"""
+		return self._read_game(self.offsets[n])
+
+	def __iter__(self) -> Iterator[ArchivedGame]:
+		for offset in self.offsets:
+			yield self._read_game(offset)
+
+	def _read_game(self, offset):
+		count, result, _, meta_len = RECORD_HEADER.unpack_from(self.data, offset)
+		pos = offset + RECORD_HEADER.size
+		metadata = json.loads(self.data[pos:pos + meta_len]) if meta_len else {}
+		pos += meta_len
+
+		moves = array('H')
+		moves.frombytes(self.data[pos:pos + count * 2])
+		if sys.byteorder != 'little':
+			moves.byteswap()
+		return ArchivedGame(moves, result, metadata)
+
+	def close(self):
+		self.data.close()
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def play_selfplay_game(black_ai, white_ai, max_plies=200, repetition_limit=REPETITION_LIMIT,
+					   quiet_ply_limit=QUIET_PLY_LIMIT):
+	"""Spielt eine KI-gegen-KI-Partie und liefert (Zug-Codes, Ergebnis-Code)
+
+	Die Partie endet spätestens nach max_plies Halbzügen (Ergebnis offen)
+	oder vorher durch Sieg bzw. eine der Remisregeln.
+	"""
+	game = AbaloneGame(repetition_limit, quiet_ply_limit)
+	ais = {Player.BLACK: black_ai, Player.WHITE: white_ai}
+	moves = array('H')
+
+	while len(moves) < max_plies and not game.is_over():
+		move = ais[game.current_player].get_best_move(game, game.current_player)
+		if not move:
+			break
+		moves.append(encode_move(*move))
+		game.apply(move)
+
+	return moves, result_from_winner(game.check_winner(), game.is_draw())
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Abalone-Partiearchive erzeugen und untersuchen")
+	sub = parser.add_subparsers(dest='command', required=True)
+
+	info = sub.add_parser('info', help="Übersicht über ein Archiv")
+	info.add_argument('archive')
+
+	selfplay = sub.add_parser('selfplay', help="KI-gegen-KI-Partien an ein Archiv anhängen")
+	selfplay.add_argument('archive')
+	selfplay.add_argument('--games', type=int, default=10)
+	selfplay.add_argument('--max-plies', type=int, default=200)
+	selfplay.add_argument('--difficulty', choices=[d.name.lower() for d in AIDifficulty], default='easy')
+	selfplay.add_argument('--repetitions', type=int, default=REPETITION_LIMIT,
+						  help="Remis bei so vielen Stellungswiederholungen (0 = aus)")
+	selfplay.add_argument('--quiet-plies', type=int, default=QUIET_PLY_LIMIT,
+						  help="Remis nach so vielen Halbzügen ohne Hinausschieben (0 = aus)")
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'info':
+		with GameArchiveReader(args.archive) as reader:
+			results = [0, 0, 0, 0]
+			plies = 0
+			for record in reader:
+				results[record.result] += 1
+				plies += len(record.moves)
+			print(f"Partien: {len(reader)}  Halbzüge: {plies}")
+			print(f"Schwarz: {results[RESULT_BLACK]}  Weiß: {results[RESULT_WHITE]}  "
+				  f"Remis: {results[RESULT_DRAW]}  Offen: {results[RESULT_UNKNOWN]}")
+
+	elif args.command == 'selfplay':
+		difficulty = AIDifficulty[args.difficulty.upper()]
+		with GameArchiveWriter(args.archive) as writer:
+			for _ in range(args.games):
+				moves, result = play_selfplay_game(AbaloneAI(difficulty), AbaloneAI(difficulty), args.max_plies,
+												   args.repetitions, args.quiet_plies)
+				writer.write_game(moves, result, {'black': difficulty.name, 'white': difficulty.name})
+
+
+if __name__ == "__main__":
+	main()
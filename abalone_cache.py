@@ -0,0 +1,249 @@
+"""Persistenter Analyse-Cache für AbaloneAI über Sitzungen und Prozesse hinweg
+
+Suchergebnisse (Tiefe, Bewertung, bester Zug, Hauptvariante) werden in einer
+SQLite-Datenbank unter dem Zobrist-Hash der kanonischen Stellung abgelegt
+(abalone.canonical_snapshot): gespiegelte, gedrehte und farbvertauschte
+Stellungen teilen sich einen Eintrag, Züge werden dafür in die kanonische
+Stellung abgebildet und beim Lesen zurück. Die Datenbank
+läuft im WAL-Modus, sodass beliebig viele Prozesse gleichzeitig lesen und
+nacheinander schreiben können. Die Größe ist auf max_entries begrenzt; beim
+Überschreiten werden die am längsten nicht genutzten Einträge entfernt (LRU).
+
+Züge werden wie im Archiv als Codes aus abalone_archive.encode_move
+gespeichert, die Hauptvariante als uint16-Folge (little endian).
+
+AbaloneAI nutzt den Cache über ``probe`` und ``store``:
+
+	cache = AnalysisCache('analysis.sqlite')
+	ai = AbaloneAI(AIDifficulty.HARD, analysis_cache=cache)
+
+Bewertungen und Züge hängen von der Konfiguration der KI ab (Schwierigkeit,
+Bewertungsgewichte, Suchprofil, N-Tupel-Tabellen). ``probe`` und ``store``
+verknüpfen den Hash der Stellung daher mit AbaloneAI.cache_config; KIs
+verschiedener Konfiguration können sich eine Datei teilen, ohne die
+Ergebnisse der anderen zu übernehmen. Einträge einer alten Konfiguration,
+etwa vor einem neuen Tuning, werden nicht mehr gefunden und verschwinden mit
+der LRU-Verdrängung oder mit ``clear``.
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from abalone import SYMMETRY_INVERSE, SearchResult, canonical_snapshot, snapshot_hash, transform_cell, transform_move
+from abalone_archive import decode_move, encode_move
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+EVICT_INTERVAL = 256  # Schreibvorgänge zwischen zwei Größenprüfungen
+EVICT_RATIO = 0.9  # Beim Aufräumen bis auf diesen Anteil von max_entries kürzen
+BUSY_TIMEOUT = 30.0  # Sekunden Wartezeit auf die Schreibsperre anderer Prozesse
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis (
+	key INTEGER PRIMARY KEY,
+	depth INTEGER NOT NULL,
+	score REAL NOT NULL,
+	move INTEGER,
+	pv BLOB NOT NULL,
+	used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used);
+"""
+
+
+@dataclass
+class CachedAnalysis:
+	"""Gespeichertes Suchergebnis - Züge als Codes aus encode_move"""
+	depth: int
+	score: float
+	move: Optional[int]
+	pv: List[int] = field(default_factory=list)
+
+
+def _db_key(position_hash):
+	"""64-Bit-Hash als vorzeichenbehafteter SQLite-Integer"""
+	position_hash &= (1 << 64) - 1
+	return position_hash - (1 << 64) if position_hash >= 1 << 63 else position_hash
+
+
+def _pack_pv(codes):
+	data = array('H', codes)
+	if sys.byteorder != 'little':
+		data.byteswap()
+	return data.tobytes()
+
+
+def _unpack_pv(blob):
+	data = array('H')
+	data.frombytes(blob)
+	if sys.byteorder != 'little':
+		data.byteswap()
+	return data.tolist()
+
+
+class AnalysisCache:
+	"""Größenbegrenzter LRU-Cache für Suchergebnisse in einer SQLite-Datei
+
+	Eine Instanz darf von mehreren Threads benutzt werden; jeder Prozess
+	öffnet seine eigene Instanz (Verbindungen überstehen kein fork).
+	"""
+
+	def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+		self.path = path
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._writes = 0
+		self._lock = threading.Lock()
+		self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None,
+								   check_same_thread=False)
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("PRAGMA synchronous=NORMAL")
+		self._db.executescript(_SCHEMA)
+
+	# --- Rohzugriff über Hash und Zugcodes ---
+
+	def get(self, position_hash, min_depth=0):
+		"""Liefert den Eintrag einer Stellung, wenn er mindestens min_depth tief ist"""
+		key = _db_key(position_hash)
+		with self._lock:
+			row = self._db.execute(
+				"SELECT depth, score, move, pv FROM analysis WHERE key = ? AND depth >= ?",
+				(key, min_depth)).fetchone()
+			if row is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			self._db.execute("UPDATE analysis SET used = ? WHERE key = ?", (time.time(), key))
+		depth, score, move, pv = row
+		return CachedAnalysis(depth, score, move, _unpack_pv(pv))
+
+	def put(self, position_hash, depth, score, move, pv=()):
+		"""Speichert ein Ergebnis - ein tieferer vorhandener Eintrag bleibt erhalten"""
+		with self._lock:
+			self._db.execute(
+				"INSERT INTO analysis (key, depth, score, move, pv, used) VALUES (?, ?, ?, ?, ?, ?) "
+				"ON CONFLICT (key) DO UPDATE SET depth = excluded.depth, score = excluded.score, "
+				"move = excluded.move, pv = excluded.pv, used = excluded.used "
+				"WHERE excluded.depth >= analysis.depth",
+				(_db_key(position_hash), depth, score, move, _pack_pv(pv), time.time()))
+			self._writes += 1
+			if self._writes % EVICT_INTERVAL == 0:
+				self._evict()
+
+	def _evict(self):
+		"""Entfernt die am längsten nicht genutzten Einträge über max_entries"""
+		count = self._db.execute("SELECT count(*) FROM analysis").fetchone()[0]
+		if count <= self.max_entries:
+			return
+		excess = count - int(self.max_entries * EVICT_RATIO)
+		self._db.execute(
+			"DELETE FROM analysis WHERE key IN (SELECT key FROM analysis ORDER BY used LIMIT ?)",
+			(excess,))
+
+	# --- Schnittstelle für AbaloneAI ---
+
+	def probe(self, game, player, min_depth, config=0):
+		"""SearchResult aus dem Cache für game, wenn mindestens min_depth tief gesucht wurde
+
+		config: Kennung der suchenden KI (AbaloneAI.cache_config)
+		"""
+		if player != game.current_player:
+			return None
+		canonical, (symmetry, _) = canonical_snapshot(game.snapshot())
+		entry = self.get(snapshot_hash(canonical) ^ config, min_depth)
+		if entry is None or entry.move is None:
+			return None
+
+		# Codes der kanonischen Stellung zurück in Move-Objekte dieser Stellung auflösen
+		inverse = SYMMETRY_INVERSE[symmetry]
+		move = self._resolve(game, entry.move, inverse)
+		if move is None:
+			return None  # Hash-Kollision oder veralteter Eintrag
+		pv = [move]
+		line = game.copy()
+		line.apply(move)
+		for code in entry.pv[1:]:
+			reply = self._resolve(line, code, inverse)
+			if reply is None:
+				break
+			pv.append(reply)
+			line.apply(reply)
+		return SearchResult(move, entry.score, entry.depth, 0, 0.0, pv)
+
+	def store(self, game, player, result, config=0):
+		"""Legt ein SearchResult für game unter der Konfiguration config ab"""
+		if result.move is None or player != game.current_player:
+			return
+		canonical, (symmetry, _) = canonical_snapshot(game.snapshot())
+		self.put(snapshot_hash(canonical) ^ config, result.depth, result.score,
+				 encode_move(*transform_move(result.move, symmetry)),
+				 [encode_move(*transform_move(move, symmetry)) for move in result.pv])
+
+	@staticmethod
+	def _resolve(game, code, symmetry=0):
+		"""Sucht den zum Code passenden legalen Zug der Stellung, nach Abbildung mit symmetry"""
+		marbles, target = decode_move(code)
+		if symmetry:
+			marbles = [transform_cell(marble, symmetry) for marble in marbles]
+			target = transform_cell(target, symmetry)
+		for move in game.moves_for_selection(marbles):
+			if move.target == target:
+				return move
+		return None
+
+	# --- Verwaltung ---
+
+	def __len__(self):
+		with self._lock:
+			return self._db.execute("SELECT count(*) FROM analysis").fetchone()[0]
+
+	def depth_counts(self):
+		"""Anzahl der Einträge je Suchtiefe"""
+		with self._lock:
+			return dict(self._db.execute("SELECT depth, count(*) FROM analysis GROUP BY depth ORDER BY depth"))
+
+	def clear(self):
+		"""Entfernt alle Einträge"""
+		with self._lock:
+			self._db.execute("DELETE FROM analysis")
+			self._db.execute("VACUUM")
+
+	def close(self):
+		with self._lock:
+			self._db.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Persistenten Analyse-Cache verwalten")
+	sub = parser.add_subparsers(dest='command', required=True)
+	info = sub.add_parser('info', help="Übersicht über einen Cache")
+	info.add_argument('cache')
+	clear = sub.add_parser('clear', help="Alle Einträge löschen")
+	clear.add_argument('cache')
+	args = parser.parse_args(argv)
+
+	with AnalysisCache(args.cache) as cache:
+		if args.command == 'info':
+			print(f"Einträge: {len(cache)}")
+			for depth, count in cache.depth_counts().items():
+				print(f"  Tiefe {depth}: {count}")
+		elif args.command == 'clear':
+			cache.clear()
+			print("Cache geleert")
+
+
+if __name__ == "__main__":
+	main()
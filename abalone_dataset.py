@@ -0,0 +1,251 @@
+"""Deduplizierter Stellungsdatensatz als NumPy-Memmap
+
+Jede Stellung belegt einen festen Record (POSITION_DTYPE, 24 Bytes):
+Bitmasken beider Farben über BOARD_CELLS, Scores, Spieler am Zug sowie die
+Summe der Partieergebnisse (+1 Schwarz gewinnt, -1 Weiß gewinnt) und die
+Anzahl der Vorkommen. Das Label einer Stellung ist outcome_sum / count.
+
+Mit canonical=True wird jede Stellung vor dem Zusammenfassen in ihre
+kanonische Form gebracht (abalone.canonical_snapshot): gespiegelte, gedrehte
+und farbvertauschte Stellungen fallen dann zu einem Record zusammen, es
+ist immer Schwarz am Zug und das Label gilt aus Sicht des Spielers am Zug.
+
+Die Datei ist ein reines Record-Array ohne Header und kann direkt mit
+``np.memmap(path, dtype=POSITION_DTYPE, mode='r')`` bzw. load_dataset()
+geöffnet werden, ohne sie in den Speicher zu laden.
+"""
+
+import os
+
+import numpy as np
+
+from abalone import BOARD_CELLS, Player, canonical_snapshot
+from abalone_archive import RESULT_BLACK, RESULT_UNKNOWN, RESULT_WHITE, GameArchiveReader
+
+POSITION_DTYPE = np.dtype([
+	('black', '<u8'),
+	('white', '<u8'),
+	('black_score', 'u1'),
+	('white_score', 'u1'),
+	('side_to_move', 'u1'),  # 0 = Schwarz, 1 = Weiß
+	('reserved', 'u1'),
+	('outcome_sum', '<i2'),
+	('count', '<u2'),
+])
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+MAX_COUNT = 0x7FFF  # Damit outcome_sum sicher in int16 passt
+
+_OUTCOMES = {RESULT_BLACK: 1, RESULT_WHITE: -1}
+
+
+def position_keys(records):
+	"""64-Bit-Hash je Stellung (vektorisiert, Überlauf ist beabsichtigt)
+
+	Bei 10^8 Stellungen liegt die Kollisionswahrscheinlichkeit unter 10^-3.
+	"""
+	meta = (records['black_score'].astype(np.uint64)
+			| records['white_score'].astype(np.uint64) << np.uint64(8)
+			| records['side_to_move'].astype(np.uint64) << np.uint64(16))
+	with np.errstate(over='ignore'):
+		key = records['black'] * np.uint64(0x9E3779B97F4A7C15)
+		key ^= records['white'] * np.uint64(0xC2B2AE3D27D4EB4F)
+		key ^= meta * np.uint64(0x165667B19E3779F9)
+		key ^= key >> np.uint64(31)
+		key *= np.uint64(0xBF58476D1CE4E5B9)
+		key ^= key >> np.uint64(29)
+	return key
+
+
+def unpack_boards(records):
+	"""Entpackt die Masken in ein (N, 61)-Array: +1 Schwarz, -1 Weiß, 0 leer"""
+	bits = np.arange(len(BOARD_CELLS), dtype=np.uint64)
+	black = (records['black'][:, None] >> bits) & np.uint64(1)
+	white = (records['white'][:, None] >> bits) & np.uint64(1)
+	return black.astype(np.int8) - white.astype(np.int8)
+
+
+def labels(records):
+	"""Mittleres Partieergebnis je Stellung aus Sicht von Schwarz (-1..1)"""
+	return records['outcome_sum'] / records['count']
+
+
+def _saturate(sums, counts):
+	"""Skaliert Summe und Anzahl gemeinsam herunter, sobald MAX_COUNT überschritten wird"""
+	scale = np.maximum(1.0, np.ceil(counts / MAX_COUNT))
+	return np.round(sums / scale), np.round(counts / scale)
+
+
+def load_dataset(path):
+	"""Öffnet einen Datensatz schreibgeschützt als Memmap"""
+	if os.path.getsize(path) == 0:
+		return np.zeros(0, dtype=POSITION_DTYPE)
+	return np.memmap(path, dtype=POSITION_DTYPE, mode='r')
+
+
+def iter_game_positions(archive, include_unfinished=False):
+	"""Liefert (Snapshot, Ergebnis) für jede Stellung aller Partien eines Archivs"""
+	for record in archive:
+		if record.result == RESULT_UNKNOWN and not include_unfinished:
+			continue
+		outcome = _OUTCOMES.get(record.result, 0)
+		for game, _ in record.replay():
+			yield game.snapshot(), outcome
+
+
+class DatasetBuilder:
+	"""Sammelt Stellungen chunkweise, entfernt Duplikate und schreibt die Memmap
+
+	Der Hash-Index ist ein sortiertes uint64-Array der Schlüssel plus die
+	zugehörigen Zeilennummern; Duplikate innerhalb eines Chunks werden mit
+	np.unique, Duplikate zu bereits geschriebenen Zeilen mit searchsorted
+	gefunden.
+	"""
+
+	def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, canonical=False):
+		self.path = path
+		self.chunk_size = chunk_size
+		self.canonical = canonical
+		self.buffer = np.zeros(chunk_size, dtype=POSITION_DTYPE)
+		self.buffered = 0
+		self.count = 0
+		self.seen = 0
+
+		self.index_keys = np.zeros(0, dtype=np.uint64)
+		self.index_rows = np.zeros(0, dtype=np.int64)
+
+		self.file = open(path, 'w+b')
+		self.capacity = 0
+		self.data = None
+
+	def add(self, snapshot, outcome):
+		"""Fügt eine Stellung (AbaloneGame.snapshot()) mit Partieergebnis hinzu"""
+		if self.canonical:
+			snapshot, (_, swapped) = canonical_snapshot(snapshot)
+			if swapped:
+				outcome = -outcome  # Ergebnis aus Sicht von Schwarz, und Schwarz ist jetzt Weiß
+		black, white, black_score, white_score, player = snapshot
+		self.buffer[self.buffered] = (black, white, black_score, white_score,
+									  player != Player.BLACK.value, 0, outcome, 1)
+		self.buffered += 1
+		if self.buffered == self.chunk_size:
+			self.flush()
+
+	def flush(self):
+		"""Dedupliziert den Puffer und schreibt ihn in die Datei"""
+		if not self.buffered:
+			return
+		chunk = self.buffer[:self.buffered]
+		self.seen += self.buffered
+		self.buffered = 0
+
+		# Duplikate innerhalb des Chunks zusammenfassen
+		keys = position_keys(chunk)
+		unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+		unique = chunk[first]
+		sums = np.bincount(inverse, weights=chunk['outcome_sum'], minlength=len(first))
+		counts = np.bincount(inverse, minlength=len(first))
+		unique['outcome_sum'], unique['count'] = _saturate(sums, counts)
+
+		# Bereits bekannte Stellungen: Zähler der vorhandenen Zeilen erhöhen
+		indexed = len(self.index_keys)
+		pos = np.searchsorted(self.index_keys, unique_keys)
+		known = np.zeros(len(unique_keys), dtype=bool)
+		if indexed:
+			in_range = pos < indexed
+			known[in_range] = self.index_keys[pos[in_range]] == unique_keys[in_range]
+		if known.any():
+			rows = self.index_rows[pos[known]]
+			sums = self.data['outcome_sum'][rows].astype(np.int64) + unique['outcome_sum'][known]
+			counts = self.data['count'][rows].astype(np.int64) + unique['count'][known]
+			self.data['outcome_sum'][rows], self.data['count'][rows] = _saturate(sums, counts)
+
+		# Neue Stellungen anhängen und in den Index einsortieren
+		new = ~known
+		new_count = int(new.sum())
+		if new_count:
+			self._reserve(self.count + new_count)
+			self.data[self.count:self.count + new_count] = unique[new]
+			new_rows = np.arange(self.count, self.count + new_count, dtype=np.int64)
+			insert_at = pos[new]
+			self.index_keys = np.insert(self.index_keys, insert_at, unique_keys[new])
+			self.index_rows = np.insert(self.index_rows, insert_at, new_rows)
+			self.count += new_count
+
+	def _reserve(self, size):
+		"""Vergrößert Datei und Memmap bei Bedarf"""
+		if size <= self.capacity:
+			return
+		self.capacity = max(size, self.capacity * 2, self.chunk_size)
+		if self.data is not None:
+			self.data.flush()
+			del self.data
+		self.file.truncate(self.capacity * POSITION_DTYPE.itemsize)
+		self.data = np.memmap(self.file, dtype=POSITION_DTYPE, mode='r+', shape=(self.capacity,))
+
+	def close(self):
+		"""Schreibt die restlichen Stellungen und kürzt die Datei auf ihre Größe"""
+		if self.file.closed:
+			return
+		self.flush()
+		if self.data is not None:
+			self.data.flush()
+			del self.data
+			self.data = None
+		self.file.truncate(self.count * POSITION_DTYPE.itemsize)
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def build_dataset(archive_paths, output_path, include_unfinished=False, chunk_size=DEFAULT_CHUNK_SIZE,
+				  canonical=False):
+	"""Erstellt einen Datensatz aus einem oder mehreren Partiearchiven"""
+	with DatasetBuilder(output_path, chunk_size, canonical) as builder:
+		for archive_path in archive_paths:
+			with GameArchiveReader(archive_path) as archive:
+				for snapshot, outcome in iter_game_positions(archive, include_unfinished):
+					builder.add(snapshot, outcome)
+	return builder
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Stellungsdatensätze aus Partiearchiven erstellen")
+	sub = parser.add_subparsers(dest='command', required=True)
+
+	build = sub.add_parser('build', help="Datensatz aus Archiven erstellen")
+	build.add_argument('output')
+	build.add_argument('archives', nargs='+')
+	build.add_argument('--include-unfinished', action='store_true',
+					   help="Auch Partien ohne Ergebnis aufnehmen (Label 0)")
+	build.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+	build.add_argument('--canonical', action='store_true',
+					   help="Symmetrische und farbvertauschte Stellungen zusammenfassen")
+
+	info = sub.add_parser('info', help="Übersicht über einen Datensatz")
+	info.add_argument('dataset')
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'build':
+		builder = build_dataset(args.archives, args.output, args.include_unfinished, args.chunk_size,
+								args.canonical)
+		print(f"Stellungen: {builder.seen}  eindeutig: {builder.count}")
+
+	elif args.command == 'info':
+		data = load_dataset(args.dataset)
+		print(f"Stellungen: {len(data)}  Vorkommen: {int(data['count'].sum()) if len(data) else 0}")
+		if len(data):
+			y = labels(data)
+			print(f"Schwarz vorn: {int((y > 0).sum())}  Weiß vorn: {int((y < 0).sum())}  "
+				  f"ausgeglichen: {int((y == 0).sum())}")
+
+
+if __name__ == "__main__":
+	main()
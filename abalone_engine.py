@@ -0,0 +1,222 @@
+"""Textprotokoll für AbaloneAI über stdin/stdout (angelehnt an UCI)
+
+Die Engine läuft als langlebiger Prozess, liest einen Befehl pro Zeile und
+antwortet zeilenweise. Züge werden als Integer-Codes aus
+abalone_archive.encode_move übertragen, das Brett als 61 Zeichen
+('B', 'W', '.') in der Reihenfolge von BOARD_CELLS.
+
+	abi                                   -> id ..., option ..., abiok
+	isready                               -> readyok
+	setoption name Difficulty value hard
+	setoption name Profile value blitz    (Suchprofil aus SEARCH_PROFILES)
+	setoption name Engine value mcts      (Suchverfahren aus AI_ENGINES)
+	newgame
+	position startpos [moves <code> ...]
+	position snapshot <brett> <score_b> <score_w> <B|W> [moves <code> ...]
+	undo | redo                           (letzten Zug zurücknehmen/wiederholen)
+	go [depth N] [movetime MS] [nodes N] [infinite]
+	                                      -> info depth .. score .. nodes .. nps .. time .. pv ..
+	                                      -> bestmove <code>|none
+	stop
+	d                                     (Stellung ausgeben)
+	quit
+
+``go`` sucht in einem eigenen Thread, damit ``stop`` und ``isready``
+jederzeit beantwortet werden. Ohne Limits sucht die Engine mit Tiefe und
+Budgets des eingestellten Suchprofils, mit ``infinite`` bis ``stop`` kommt.
+"""
+
+import os
+import sys
+import threading
+
+# pygame-Begrüßung würde sonst auf stdout im Protokoll landen
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from abalone import (AI_ENGINES, ENGINE_ALPHABETA, AbaloneGame, AIDifficulty, BOARD_CELLS, SEARCH_PROFILES, Player,
+					 create_ai)
+from abalone_archive import decode_move, encode_move
+
+ENGINE_NAME = 'AbaloneAI'
+INFINITE_DEPTH = 64
+
+
+class EngineProtocol:
+	"""Verarbeitet Protokollbefehle für eine KI-Instanz"""
+
+	def __init__(self, output=sys.stdout):
+		self.output = output
+		self.output_lock = threading.Lock()
+		self.difficulty = AIDifficulty.MEDIUM
+		self.profile = None  # None = Profil der Schwierigkeit
+		self.engine = ENGINE_ALPHABETA
+		self.ai = create_ai(self.difficulty, self.engine)
+		self.game = AbaloneGame()
+		self.search_thread = None
+		self.stop_event = threading.Event()
+
+	def send(self, line):
+		with self.output_lock:
+			self.output.write(line + '\n')
+			self.output.flush()
+
+	def run(self, input=sys.stdin):
+		"""Liest Befehle bis ``quit`` oder Eingabeende"""
+		for line in input:
+			if not self.handle(line):
+				break
+		self.stop_search()
+
+	def handle(self, line):
+		"""Führt einen Befehl aus - liefert False bei ``quit``"""
+		tokens = line.split()
+		if not tokens:
+			return True
+		command, args = tokens[0], tokens[1:]
+
+		try:
+			if command == 'quit':
+				return False
+			elif command == 'abi':
+				self.send(f"id name {ENGINE_NAME}")
+				choices = ' '.join(f"var {d.name.lower()}" for d in AIDifficulty)
+				self.send(f"option name Difficulty type combo default {self.difficulty.name.lower()} {choices}")
+				profiles = ' '.join(f"var {name}" for name in SEARCH_PROFILES)
+				self.send(f"option name Profile type combo default {self.ai.profile.name} {profiles}")
+				engines = ' '.join(f"var {name}" for name in AI_ENGINES)
+				self.send(f"option name Engine type combo default {self.engine} {engines}")
+				self.send("abiok")
+			elif command == 'isready':
+				self.send("readyok")
+			elif command == 'setoption':
+				self._set_option(args)
+			elif command == 'newgame':
+				self.stop_search()
+				self.ai.move_cache.clear()
+				self.game = AbaloneGame()
+			elif command == 'position':
+				self.stop_search()
+				self.game = self._parse_position(args)
+			elif command in ('undo', 'redo'):
+				self.stop_search()
+				move = self.game.undo() if command == 'undo' else self.game.redo()
+				if move is None:
+					self.send(f"info string Kein Zug für {command}")
+			elif command == 'go':
+				self._go(args)
+			elif command == 'stop':
+				self.stop_search()
+			elif command == 'd':
+				self._display()
+			else:
+				self.send(f"info string Unbekannter Befehl: {command}")
+		except (ValueError, IndexError, KeyError) as e:
+			self.send(f"info string Fehler: {e}")
+		return True
+
+	def _set_option(self, args):
+		if 'name' not in args or 'value' not in args:
+			raise ValueError("setoption name <Name> value <Wert>")
+		name = ' '.join(args[args.index('name') + 1:args.index('value')])
+		value = ' '.join(args[args.index('value') + 1:])
+		if name.lower() == 'difficulty':
+			difficulty = AIDifficulty[value.upper()]
+			self.stop_search()
+			self.difficulty = difficulty
+			self.profile = None
+		elif name.lower() == 'profile':
+			if value.lower() not in SEARCH_PROFILES:
+				raise ValueError(f"Unbekanntes Profil: {value}")
+			self.stop_search()
+			self.profile = value.lower()
+		elif name.lower() == 'engine':
+			if value.lower() not in AI_ENGINES:
+				raise ValueError(f"Unbekanntes Suchverfahren: {value}")
+			self.stop_search()
+			self.engine = value.lower()
+		else:
+			raise ValueError(f"Unbekannte Option: {name}")
+		self.ai = create_ai(self.difficulty, self.engine, profile=self.profile)
+
+	def _parse_position(self, args):
+		if args[0] == 'startpos':
+			game = AbaloneGame()
+			rest = args[1:]
+		elif args[0] == 'snapshot':
+			board, black_score, white_score, side = args[1:5]
+			if len(board) != len(BOARD_CELLS):
+				raise ValueError(f"Brett muss {len(BOARD_CELLS)} Zeichen haben")
+			black = sum(1 << i for i, c in enumerate(board) if c == 'B')
+			white = sum(1 << i for i, c in enumerate(board) if c == 'W')
+			player = Player.BLACK if side.upper() == 'B' else Player.WHITE
+			game = AbaloneGame.from_snapshot((black, white, int(black_score), int(white_score), player.value))
+			rest = args[5:]
+		else:
+			raise ValueError(f"Unbekannte Stellung: {args[0]}")
+
+		if rest and rest[0] == 'moves':
+			for code in rest[1:]:
+				if not game.make_move(*decode_move(int(code))):
+					raise ValueError(f"Ungültiger Zug {code}")
+		return game
+
+	def _go(self, args):
+		self.stop_search()
+		depth = time_limit = node_limit = None
+		for i, arg in enumerate(args):
+			if arg == 'depth':
+				depth = int(args[i + 1])
+			elif arg == 'movetime':
+				time_limit = int(args[i + 1]) / 1000
+			elif arg == 'nodes':
+				node_limit = int(args[i + 1])
+			elif arg == 'infinite':
+				depth = INFINITE_DEPTH
+
+		# Mit Wiederholungszählern, damit die Suche Wiederholungen der Partie erkennt
+		game = self.game.copy()
+		# Neues Stoppsignal vor dem Thread-Start: ein sofortiges ``stop`` geht nicht verloren
+		self.stop_event = threading.Event()
+		self.search_thread = threading.Thread(
+			target=self._search, args=(game, depth, time_limit, node_limit, self.stop_event), daemon=True)
+		self.search_thread.start()
+
+	def _search(self, game, depth, time_limit, node_limit, stop_event):
+		# Auf jedes ``go`` folgt genau ein ``bestmove`` - auch wenn die Suche scheitert
+		bestmove = "none"
+		try:
+			result = self.ai.search(game, game.current_player, depth, time_limit, node_limit, self._send_info,
+									stop_event)
+			if result.move is not None:
+				bestmove = str(encode_move(*result.move))
+		except Exception as e:
+			self.send(f"info string Fehler bei der Suche: {type(e).__name__}: {e}")
+		finally:
+			self.send(f"bestmove {bestmove}")
+
+	def _send_info(self, result):
+		pv = ' '.join(str(encode_move(*move)) for move in result.pv)
+		self.send(f"info depth {result.depth} score {int(result.score)} nodes {result.nodes} "
+				  f"nps {result.nps} time {int(result.time * 1000)} pv {pv}")
+
+	def stop_search(self):
+		"""Bricht eine laufende Suche ab und wartet auf ihr ``bestmove``"""
+		if self.search_thread is not None:
+			self.stop_event.set()
+			self.search_thread.join()
+			self.search_thread = None
+
+	def _display(self):
+		black, white, black_score, white_score, _ = self.game.snapshot()
+		board = ''.join('B' if black >> i & 1 else 'W' if white >> i & 1 else '.'
+						for i in range(len(BOARD_CELLS)))
+		side = 'B' if self.game.current_player == Player.BLACK else 'W'
+		self.send(f"info string snapshot {board} {black_score} {white_score} {side}")
+
+
+def main():
+	EngineProtocol().run()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,45 @@
+"""Startpunkt der Oberfläche
+
+abalone wird hier genau einmal als Modul geladen. Der KI-Prozess und
+abalone_mcts importieren ebenfalls 'abalone' und sehen so dieselben Klassen
+(Player, Hex, ...) wie die Oberfläche - beim Start über ``python abalone.py``
+liefe das Spiel dagegen als __main__ mit eigenen Kopien der Klassen.
+
+	python abalone_main.py [--replay ARCHIV [--game N] [--ply N]] [--startup-time]
+	python abalone_main.py --profile prof/ --seed 3 --sample 1
+"""
+
+import argparse
+
+import abalone
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Abalone")
+	parser.add_argument('--replay', metavar='ARCHIV', help="Partie aus einem Archiv wiedergeben")
+	parser.add_argument('--game', type=int, default=-1, help="Nummer der Partie im Archiv (Standard: letzte)")
+	parser.add_argument('--ply', type=int, default=0, help="Startposition der Wiedergabe")
+	parser.add_argument('--startup-time', action='store_true', help="Zeit bis zum ersten Bild ausgeben")
+	parser.add_argument('--profile', dest='output_dir', metavar='VERZEICHNIS',
+						help="KI-gegen-KI-Partie profilieren (weitere Optionen: abalone_profile.py --help)")
+	args, _ = parser.parse_known_args(argv)
+
+	if args.output_dir:
+		# Das Profiling-Modul und seine Optionen nur laden, wenn es gebraucht wird
+		import abalone_profile
+		abalone_profile.add_arguments(parser, output_dir=False)
+		abalone_profile.run(parser.parse_args(argv))
+		return
+	args = parser.parse_args(argv)
+
+	ui = abalone.AbaloneUI()
+	ui.report_startup = args.startup_time
+	if args.replay:
+		from abalone_archive import GameArchiveReader
+		with GameArchiveReader(args.replay) as archive:
+			ui.start_replay(archive[args.game].moves, args.ply)
+	ui.run()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,329 @@
+"""Monte-Carlo-Baumsuche (MCTS) als Alternative zur Alpha-Beta-Suche
+
+MCTSAI hat dieselbe Schnittstelle wie AbaloneAI (get_best_move, search,
+stop) und übernimmt Suchprofile, Zuggenerator und Zufallszüge. Statt einer
+festen Tiefe wächst ein Suchbaum:
+
+- Auswahl nach PUCT mit Prioritäten aus AbaloneAI._quick_move_score
+- Blattbewertung statt Zufallspartien: Blätter werden in Batches gesammelt
+  (virtueller Verlust verteilt die Auswahl) und gemeinsam mit der
+  vektorisierten Bewertung aus abalone_tuning bewertet
+- Wiederverwendung des Teilbaums zwischen zwei Zügen
+- Wurzelparallele Suche: mit workers > 1 suchen weitere Prozesse eigene
+  Bäume derselben Stellung, die Besuchszahlen der Wurzelzüge werden addiert.
+  Jeder Worker mischt Dirichlet-Rauschen mit eigenem Seed in die
+  Prioritäten der Wurzelzüge, damit die Bäume auseinanderlaufen
+
+Das Budget ist SearchProfile.simulations (ohne Angabe node_limit) in
+Simulationen, also bewerteten Blättern.
+"""
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from abalone import AbaloneAI, AbaloneGame, AIDifficulty, DRAW_SCORE, Player, SearchResult
+from abalone_archive import encode_move
+from abalone_dataset import POSITION_DTYPE
+from abalone_tuning import FEATURES, extract_features
+
+DEFAULT_SIMULATIONS = 1000  # Budget, wenn das Profil weder Knoten- noch Zeitlimit hat
+BATCH_SIZE = 16  # Blätter pro Bewertungsbatch
+C_PUCT = 1.5  # Gewicht der Exploration
+EXPAND_VISITS = 2  # Besuche eines Blatts, ab denen es expandiert wird
+VIRTUAL_LOSS = 1  # Vorläufige Niederlage je Knoten auf ausstehenden Pfaden
+PRIOR_TEMPERATURE = 20.0  # Softmax-Temperatur für die Zugprioritäten
+VALUE_SCALE = 2000.0  # Bewertung -> Gewinnerwartung: tanh(Bewertung / VALUE_SCALE)
+DIRICHLET_ALPHA = 0.3  # Konzentration des Wurzelrauschens der Worker
+ROOT_NOISE = 0.25  # Anteil des Rauschens an den Prioritäten der Wurzelzüge
+
+
+class Node:
+	"""Knoten des Suchbaums - Statistik aus Sicht des Spielers, der den Zug gemacht hat"""
+	__slots__ = ('move', 'player', 'prior', 'visits', 'value', 'children', 'hash', 'terminal')
+
+	def __init__(self, move, player, prior):
+		self.move = move
+		self.player = player  # Spieler, der move gemacht hat
+		self.prior = prior
+		self.visits = 0
+		self.value = 0.0
+		self.children = None  # None = noch nicht expandiert
+		self.hash = None
+		self.terminal = None  # Feste Bewertung aus Sicht von Schwarz bei Spielende/Remis
+
+	def q(self):
+		return self.value / self.visits if self.visits else 0.0
+
+	def select_child(self):
+		"""Kind mit dem höchsten PUCT-Wert"""
+		scale = C_PUCT * math.sqrt(self.visits + 1)
+		best = None
+		best_score = float('-inf')
+		for child in self.children:
+			score = child.q() + scale * child.prior / (1 + child.visits)
+			if score > best_score:
+				best_score = score
+				best = child
+		return best
+
+	def most_visited(self):
+		return max(self.children, key=lambda child: child.visits)
+
+
+class MCTSAI(AbaloneAI):
+	"""KI-Gegner mit Monte-Carlo-Baumsuche"""
+
+	def __init__(self, difficulty=AIDifficulty.MEDIUM, weights=None, profile=None, workers=1, ntuple_weights=None):
+		super().__init__(difficulty, weights, profile, ntuple_weights=ntuple_weights)
+		self.workers = workers
+		self._executor = None
+		self._root = None
+		self.root_noise = None  # Zufallsgenerator für Wurzelrauschen (nur in Workern der parallelen Suche)
+
+		# Gewichtsvektor für die vektorisierte Bewertung (dieselben Merkmale wie _evaluate_position)
+		self._features = [name for name in FEATURES if self.weights[name]]
+		self._weight_vector = np.array([self.weights[name] for name in self._features], dtype=np.float32)
+
+	def _profile_node_limit(self):
+		"""Simulationsbudget des Suchprofils"""
+		return self.profile.simulations or self.profile.node_limit
+
+	def search(self, game, player, depth=None, time_limit=None, node_limit=None, info_callback=None,
+			   stop_event=None):
+		"""Eine MCTS-Suche mit Simulations- oder Zeitbudget
+
+		depth wird ignoriert; ohne Budget gelten die des Suchprofils.
+		"""
+		if time_limit is None and node_limit is None:
+			time_limit, node_limit = self.profile.time_limit, self._profile_node_limit()
+		self._begin_search(time_limit, node_limit, stop_event)
+		started = time.perf_counter()
+
+		moves = self._generate_all_moves_fast(game, player)
+		if not moves:
+			return SearchResult(None, self._evaluate_position(game, player), 0, 0, 0.0)
+		moves.sort(key=lambda m: self._quick_move_score(game, m, player), reverse=True)
+
+		best_move, score, pv = self._search_root(game, player, moves, None)
+		result = SearchResult(best_move, score, len(pv), self.nodes, time.perf_counter() - started, pv)
+		if info_callback:
+			info_callback(result)
+		return result
+
+	def _copy_game_state(self, game):
+		"""Spielkopie ohne Zustand der Ausschubgefahr - die bewertet _evaluate_batch für alle Blätter gemeinsam"""
+		game = super()._copy_game_state(game)
+		game.patterns.pop('danger', None)
+		return game
+
+	def _search_root(self, game, player, moves, depth):
+		"""Baut den Suchbaum bis zum Budget auf - liefert (Zug, Bewertung, Hauptvariante)"""
+		if self._node_limit is None and self._deadline is None:
+			self._node_limit = DEFAULT_SIMULATIONS
+
+		game = self._copy_game_state(game)
+		if game.current_player != player:
+			game.current_player = player
+			game.rehash()
+
+		root = self._reuse_root(game)
+		if root is None:
+			root = Node(None, None, 1.0)
+			root.hash = game.hash
+			self._expand(root, game, moves)
+		self._root = root
+		if self.root_noise is not None:
+			self._add_root_noise(root)
+
+		# Weitere Prozesse durchsuchen dieselbe Stellung parallel
+		futures = []
+		if self.workers > 1:
+			if self._executor is None:
+				self._executor = ProcessPoolExecutor(max_workers=self.workers - 1)
+			budget = (self._node_limit, self._deadline - time.perf_counter() if self._deadline else None)
+			config = self.cache_config()
+			futures = [self._executor.submit(_worker_visits, game.snapshot(), self.difficulty.value,
+											 self.profile, self.weights, self.ntuple_weights, config, worker,
+											 *budget)
+					   for worker in range(1, self.workers)]
+
+		while not self._should_stop():
+			self._run_batch(root, game)
+		# Budgetende ist bei MCTS das reguläre Ende - nur ein Stopp gilt als Abbruch
+		self._stopped = self._stop_event.is_set()
+
+		if not root.children:
+			for future in futures:
+				future.result()
+			return None, DRAW_SCORE, []
+
+		visits = {id(child): child.visits for child in root.children}
+		for future in futures:
+			by_code, nodes = future.result()
+			self.nodes += nodes
+			for child in root.children:
+				visits[id(child)] += by_code.get(encode_move(*child.move), 0)
+
+		best = max(root.children, key=lambda child: visits[id(child)])
+		pv = [best.move]
+		node = best
+		while node.children and node.visits > 1:
+			node = node.most_visited()
+			pv.append(node.move)
+		return best.move, _to_score(best.q()), pv
+
+	def _reuse_root(self, game):
+		"""Sucht die aktuelle Stellung unter den Kindern und Enkeln der letzten Wurzel"""
+		root = self._root
+		if root is None or not root.children:
+			return None
+		if root.hash == game.hash:
+			return root
+		for child in root.children:
+			if child.hash == game.hash and child.children is not None:
+				return child
+			for grandchild in child.children or ():
+				if grandchild.hash == game.hash and grandchild.children is not None:
+					return grandchild
+		return None
+
+	def _expand(self, node, game, moves=None):
+		"""Legt die Kinder eines Knotens mit Softmax-Prioritäten an"""
+		player = game.current_player
+		if moves is None:
+			moves = self._generate_all_moves_fast(game, player)
+		if not moves:
+			node.children = []
+			return
+		scores = [self._quick_move_score(game, move, player) / PRIOR_TEMPERATURE for move in moves]
+		top = max(scores)
+		weights = [math.exp(score - top) for score in scores]
+		total = sum(weights)
+		node.children = [Node(move, player, weight / total) for move, weight in zip(moves, weights)]
+
+	def _add_root_noise(self, root):
+		"""Mischt Dirichlet-Rauschen in die Prioritäten der Wurzelzüge"""
+		if not root.children:
+			return
+		noise = self.root_noise.dirichlet([DIRICHLET_ALPHA] * len(root.children))
+		for child, eta in zip(root.children, noise.tolist()):
+			child.prior = (1 - ROOT_NOISE) * child.prior + ROOT_NOISE * eta
+
+	def _run_batch(self, root, game):
+		"""Wählt bis zu BATCH_SIZE Blätter, bewertet sie gemeinsam und propagiert zurück"""
+		paths = []
+		leaves = []
+		patterns = []  # N-Tupel-Bewertung der Blätter
+		for _ in range(BATCH_SIZE):
+			node = root
+			path = [root]
+			applied = 0
+			while node.children and node.terminal is None:
+				node = node.select_child()
+				game.apply(node.move)
+				applied += 1
+				if node.hash is None:
+					node.hash = game.hash
+				path.append(node)
+
+			if node.terminal is None:
+				node.terminal = self._terminal_value(game)
+			if node.terminal is not None:
+				paths.append((path, node.terminal))
+			else:
+				# Zuggenerierung ist teuer: nur Blätter expandieren, die erneut gewählt werden
+				if node.children is None and node.visits >= EXPAND_VISITS:
+					self._expand(node, game)
+				paths.append((path, None))
+				leaves.append(game.snapshot())
+				ntuple = game.patterns.get('ntuple')
+				patterns.append(ntuple.value if ntuple is not None else 0.0)
+
+			for visited in path:
+				visited.visits += VIRTUAL_LOSS
+				visited.value -= VIRTUAL_LOSS
+			for _ in range(applied):
+				game.unmake()
+
+			self.nodes += 1
+			if self._should_stop():
+				break
+
+		values = iter(self._evaluate_batch(leaves, patterns)) if leaves else iter(())
+		for path, value in paths:
+			if value is None:
+				value = next(values)
+			self._backup(path, value)
+
+	def _terminal_value(self, game):
+		"""Gewinnerwartung aus Sicht von Schwarz bei Spielende oder Remis, sonst None"""
+		winner = game.check_winner()
+		if winner is not None:
+			return 1.0 if winner == Player.BLACK else -1.0
+		if self._is_search_draw(game):
+			return 0.0
+		return None
+
+	def _evaluate_batch(self, snapshots, patterns=None):
+		"""Vektorisierte Bewertung aus Sicht von Schwarz als Gewinnerwartung -1..1"""
+		records = np.zeros(len(snapshots), dtype=POSITION_DTYPE)
+		for i, (black, white, black_score, white_score, _) in enumerate(snapshots):
+			records[i]['black'] = black
+			records[i]['white'] = white
+			records[i]['black_score'] = black_score
+			records[i]['white_score'] = white_score
+		evaluation = extract_features(records, self._features) @ self._weight_vector
+		if patterns is not None:
+			evaluation += np.asarray(patterns, dtype=np.float32)
+		return np.tanh(evaluation / VALUE_SCALE).tolist()
+
+	@staticmethod
+	def _backup(path, value):
+		"""Propagiert value (Sicht von Schwarz) zurück und nimmt den virtuellen Verlust weg"""
+		for node in path:
+			node.visits += 1 - VIRTUAL_LOSS
+			node.value += VIRTUAL_LOSS + (value if node.player == Player.BLACK else -value)
+
+	def close(self):
+		"""Beendet die Worker-Prozesse der parallelen Suche"""
+		if self._executor is not None:
+			self._executor.shutdown()
+			self._executor = None
+
+
+def _to_score(q):
+	"""Gewinnerwartung zurück in die Bewertungsskala von AbaloneAI"""
+	q = max(-0.999, min(0.999, q))
+	return VALUE_SCALE * math.atanh(q)
+
+
+# --- Worker der wurzelparallelen Suche (laufen in eigenen Prozessen) ---
+
+_WORKER_AI = {}
+
+
+def _worker_visits(snapshot, difficulty, profile, weights, ntuple_weights, config, worker, node_limit, time_limit):
+	"""Durchsucht eine Stellung und liefert ({Code: Besuche} der Wurzelzüge, Simulationen)
+
+	config ist cache_config() der aufrufenden KI: ändern sich Gewichte oder
+	N-Tupel-Tabellen, baut der Worker seine KI neu auf. Das Wurzelrauschen
+	hängt von Seed, Worker-Nummer und Stellung ab und bleibt so reproduzierbar.
+	"""
+	key = (config, profile)
+	if key not in _WORKER_AI:
+		_WORKER_AI.clear()
+		_WORKER_AI[key] = MCTSAI(AIDifficulty(difficulty), weights, profile, ntuple_weights=ntuple_weights)
+	ai = _WORKER_AI[key]
+	game = AbaloneGame.from_snapshot(snapshot)
+	player = game.current_player
+	ai.root_noise = np.random.default_rng([profile.seed, worker, game.hash])
+	ai._begin_search(time_limit, node_limit)
+	moves = ai._generate_all_moves_fast(game, player)
+	if not moves:
+		return {}, 0
+	moves.sort(key=lambda m: ai._quick_move_score(game, m, player), reverse=True)
+	ai._search_root(game, player, moves, None)
+	return {encode_move(*child.move): child.visits for child in ai._root.children}, ai.nodes
@@ -0,0 +1,182 @@
+"""Training der N-Tupel-Tabellen aus Selbstspiel-Partien
+
+Die Tupel und das Dateiformat sind in abalone.py definiert (NTUPLES,
+load_ntuple_weights). Der Trainer sammelt Stellungen mit Partieergebnis aus
+Archiven und/oder eigenen Selbstspiel-Runden, ergänzt sie um die Stellungen mit
+vertauschten Farben und passt die Tabellen per SGD auf die logistische
+Verlustfunktion an: P(Schwarz gewinnt) = sigmoid(Summe der Einträge / NTUPLE_SCALE).
+
+Jede Selbstspiel-Runde spielt mit den bis dahin gelernten Tabellen, sodass sich
+Datensatz und Bewertung gegenseitig verbessern. Mit exploration wird ein Anteil
+der Züge zufällig gewählt, damit sich die Partien unterscheiden. Da die meisten
+Selbstspiel-Partien remis oder offen enden, zählt dort der Punktestand am Ende
+(Differenz / 6) als Ergebnis.
+"""
+
+import dataclasses
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from abalone import (NTUPLE_CHECKSUM, NTUPLE_HEADER, NTUPLE_MAGIC, NTUPLE_OFFSETS, NTUPLE_SIZE, NTUPLE_VERSION,
+					 NTUPLE_WEIGHTS_FILE, NTUPLES, SEARCH_PROFILES, AbaloneAI, AbaloneGame, AIDifficulty, Player,
+					 load_ntuple_weights)
+from abalone_archive import RESULT_BLACK, RESULT_WHITE, GameArchiveReader, decode_move, play_selfplay_game
+from abalone_dataset import POSITION_DTYPE, iter_game_positions, unpack_boards
+
+NTUPLE_SCALE = 400.0  # Bewertungseinheiten je Logit
+DEFAULT_EXPLORATION = 0.1
+DEFAULT_BATCH_SIZE = 4096
+
+
+def ntuple_indices(records):
+	"""Flache Tabellenindizes (N, Anzahl Tupel) je Stellung"""
+	board = unpack_boards(records)
+	codes = np.where(board > 0, 1, np.where(board < 0, 2, 0)).astype(np.int64)
+	columns = [offset + codes[:, list(cells)] @ (3 ** np.arange(len(cells)))
+			   for cells, offset in zip(NTUPLES, NTUPLE_OFFSETS)]
+	return np.stack(columns, axis=1)
+
+
+def swap_colors(records):
+	"""Dieselben Stellungen mit vertauschten Farben"""
+	swapped = records.copy()
+	swapped['black'], swapped['white'] = records['white'], records['black']
+	swapped['black_score'], swapped['white_score'] = records['white_score'], records['black_score']
+	swapped['side_to_move'] = 1 - records['side_to_move']
+	return swapped
+
+
+def to_records(positions):
+	"""(Snapshot, Ergebnis)-Paare als (POSITION_DTYPE-Array, Ergebnisse -1..1 aus Sicht von Schwarz)"""
+	rows = []
+	outcomes = []
+	for (black, white, black_score, white_score, player), outcome in positions:
+		rows.append((black, white, black_score, white_score, player != Player.BLACK.value, 0, 0, 1))
+		outcomes.append(outcome)
+	return np.array(rows, dtype=POSITION_DTYPE), np.array(outcomes, dtype=np.float64)
+
+
+def archive_positions(paths):
+	"""Stellungen aller beendeten Partien der Archive"""
+	for path in paths:
+		with GameArchiveReader(path) as archive:
+			yield from iter_game_positions(archive)
+
+
+def selfplay_positions(games, difficulty=AIDifficulty.MEDIUM, table=None, exploration=DEFAULT_EXPLORATION,
+					   max_plies=200, seed=0):
+	"""Spielt Partien mit den Tabellen table und liefert (Snapshot, Ergebnis) aller Stellungen"""
+	base = SEARCH_PROFILES[difficulty.name.lower()]
+	for game_index in range(games):
+		profile = dataclasses.replace(base, random_move_rate=max(base.random_move_rate, exploration),
+									  seed=seed + game_index)
+		ais = [AbaloneAI(difficulty, profile=profile, ntuple_weights=table) for _ in range(2)]
+		moves, result = play_selfplay_game(*ais, max_plies)
+		game = AbaloneGame()
+		snapshots = [game.snapshot()]
+		for code in moves:
+			game.make_move(*decode_move(code))
+			snapshots.append(game.snapshot())
+
+		if result == RESULT_BLACK:
+			outcome = 1.0
+		elif result == RESULT_WHITE:
+			outcome = -1.0
+		else:
+			outcome = (game.scores[Player.BLACK] - game.scores[Player.WHITE]) / 6
+		for snapshot in snapshots:
+			yield snapshot, outcome
+
+
+def _sigmoid(x):
+	return 1 / (1 + np.exp(-np.clip(x, -50, 50)))
+
+
+def train(records, outcomes, table=None, epochs=5, learning_rate=0.1, batch_size=DEFAULT_BATCH_SIZE, seed=0,
+		  log=print):
+	"""Passt die Tabellen an die Partieergebnisse an und liefert sie als float32-Array (Bewertungseinheiten)
+
+	Der Gradient eines Eintrags wird durch die Anzahl seiner Treffer im Batch
+	geteilt, damit seltene Muster ebenso schnell lernen wie häufige.
+	"""
+	records = np.concatenate([records, swap_colors(records)])
+	indices = ntuple_indices(records)
+	target = (np.concatenate([outcomes, -outcomes]) + 1) / 2
+	weight = records['count'].astype(np.float64)
+
+	logits = np.zeros(NTUPLE_SIZE) if table is None else np.asarray(table, dtype=np.float64) / NTUPLE_SCALE
+	rng = np.random.default_rng(seed)
+	for epoch in range(epochs):
+		started = time.perf_counter()
+		order = rng.permutation(len(records))
+		total_loss = 0.0
+		for start in range(0, len(order), batch_size):
+			rows = order[start:start + batch_size]
+			idx = indices[rows]
+			y, w = target[rows], weight[rows]
+			p = np.clip(_sigmoid(logits[idx].sum(axis=1)), 1e-7, 1 - 1e-7)
+			total_loss -= float((w * (y * np.log(p) + (1 - y) * np.log(1 - p))).sum())
+
+			error = np.repeat(w * (p - y), idx.shape[1])
+			flat = idx.ravel()
+			grad = np.bincount(flat, weights=error, minlength=NTUPLE_SIZE)
+			hits = np.bincount(flat, weights=np.repeat(w, idx.shape[1]), minlength=NTUPLE_SIZE)
+			logits -= learning_rate * grad / np.maximum(hits, 1)
+		log(f"Epoche {epoch + 1}: Verlust {total_loss / max(float(weight.sum()), 1):.6f} "
+			f"({time.perf_counter() - started:.1f}s)")
+	return (logits * NTUPLE_SCALE).astype(np.float32)
+
+
+def save_ntuple_weights(table, path=NTUPLE_WEIGHTS_FILE):
+	"""Schreibt die Tabellen im Format von load_ntuple_weights()"""
+	data = array('f', np.asarray(table, dtype=np.float32).tobytes())
+	if sys.byteorder != 'little':
+		data.byteswap()
+	with open(path, 'wb') as f:
+		f.write(NTUPLE_HEADER.pack(NTUPLE_MAGIC, NTUPLE_VERSION, NTUPLE_CHECKSUM))
+		data.tofile(f)
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="N-Tupel-Tabellen aus Selbstspiel-Partien trainieren")
+	parser.add_argument('--output', default=NTUPLE_WEIGHTS_FILE,
+						help="Tabellendatei; vorhandene Tabellen dienen als Startwerte")
+	parser.add_argument('--archives', nargs='*', default=[], help="Zusätzliche Partiearchive")
+	parser.add_argument('--selfplay', type=int, default=0, metavar='GAMES', help="Partien pro Runde")
+	parser.add_argument('--rounds', type=int, default=1)
+	parser.add_argument('--difficulty', choices=[d.name.lower() for d in AIDifficulty], default='medium')
+	parser.add_argument('--exploration', type=float, default=DEFAULT_EXPLORATION, help="Anteil zufälliger Züge")
+	parser.add_argument('--max-plies', type=int, default=200)
+	parser.add_argument('--epochs', type=int, default=5)
+	parser.add_argument('--learning-rate', type=float, default=0.1)
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args(argv)
+
+	table = load_ntuple_weights(args.output)
+	records, outcomes = to_records(archive_positions(args.archives))
+	difficulty = AIDifficulty[args.difficulty.upper()]
+
+	for round_index in range(max(args.rounds, 1)):
+		if args.selfplay:
+			seed = args.seed + round_index * args.selfplay
+			played, played_outcomes = to_records(selfplay_positions(
+				args.selfplay, difficulty, table, args.exploration, args.max_plies, seed))
+			print(f"Runde {round_index + 1}: {len(played)} Stellungen aus Selbstspiel")
+			records = np.concatenate([records, played])
+			outcomes = np.concatenate([outcomes, played_outcomes])
+		if not len(records):
+			parser.error("Keine Stellungen aus beendeten Partien")
+		table = array('f', train(records, outcomes, table, args.epochs, args.learning_rate,
+								 seed=args.seed).tobytes())
+		save_ntuple_weights(table, args.output)
+
+	print(f"Tabellen geschrieben: {args.output} ({len(records)} Stellungen)")
+
+
+if __name__ == "__main__":
+	main()
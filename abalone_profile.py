@@ -0,0 +1,263 @@
+"""Profiling einer reproduzierbaren KI-gegen-KI-Partie
+
+Die Partie ist entweder aus einem Archiv vorgegeben (jede KI sucht in jeder
+Stellung wie im Spiel, gezogen wird aber der Archivzug) oder wird aus einem
+Seed gespielt: einige zufällige Eröffnungszüge, danach die Züge der KIs.
+Ohne Zeitbudget im Suchprofil verläuft sie damit bei jedem Lauf gleich, und
+Messungen vor und nach einer Änderung sind vergleichbar.
+
+Im Ausgabeverzeichnis entstehen:
+
+- profile.pstats: cProfile-Daten für pstats, snakeviz usw.
+- profile.collapsed: Aufrufstapel des Samplers im Collapsed-Format
+  (``flamegraph.pl profile.collapsed > flame.svg`` oder speedscope)
+- summary.txt: die teuersten Funktionen nach Eigenzeit und die Werte der
+  Funktionen aus WATCHED_FUNCTIONS
+
+Der Sampler läuft in einem zweiten Durchgang derselben Partie ohne cProfile,
+damit dessen Overhead die Stapel nicht verzerrt.
+
+	python abalone_main.py --profile prof/ --seed 3 --sample 1
+	python abalone_profile.py prof/ --script games.abla --game 0 --ui
+"""
+
+import cProfile
+import dataclasses
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+import pygame
+
+from abalone import (AI_ENGINES, ENGINE_ALPHABETA, SEARCH_PROFILES, AbaloneAI, AbaloneGame, AIDifficulty, GameState,
+					 Hex, Player, create_ai)
+from abalone_archive import GameArchiveReader, decode_move
+
+DEFAULT_PLIES = 60
+DEFAULT_OPENING = 4  # Zufällige Halbzüge vor den KI-Zügen einer Seed-Partie
+DEFAULT_TOP = 25
+PSTATS_FILE = 'profile.pstats'
+COLLAPSED_FILE = 'profile.collapsed'
+SUMMARY_FILE = 'summary.txt'
+
+# Funktionen, die in der Zusammenfassung immer erscheinen
+WATCHED_FUNCTIONS = {
+	'AbaloneGame.generate_moves': AbaloneGame.generate_moves,
+	'AbaloneGame.apply': AbaloneGame.apply,
+	'AbaloneGame._get_line_direction': AbaloneGame._get_line_direction,
+	'Hex.__hash__': Hex.__hash__,
+	'AbaloneAI._copy_game_state': AbaloneAI._copy_game_state,
+}
+
+
+class StackSampler:
+	"""Tastet den Aufrufstapel eines Threads in festen Abständen ab
+
+	Läuft als eigener Thread über sys._current_frames() und zählt jeden
+	Stapel als 'datei:funktion;...' vom äußersten zum innersten Aufruf.
+	Damit der Thread das GIL oft genug bekommt, wird das Umschaltintervall
+	des Interpreters für die Dauer der Messung auf das Sampling-Intervall
+	gesenkt. Solange C-Code das GIL hält, kommt der Sampler nicht zum Zug -
+	solche Abschnitte fallen dem nächsten Python-Stapel zu.
+	"""
+
+	def __init__(self, interval=0.001, thread_id=None):
+		self.interval = interval
+		self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+		self.counts = Counter()
+		self._stop = threading.Event()
+		self._thread = None
+		self._switch_interval = None
+
+	def start(self):
+		self._stop.clear()
+		self._switch_interval = sys.getswitchinterval()
+		sys.setswitchinterval(min(self._switch_interval, self.interval))
+		self._thread = threading.Thread(target=self._run, daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+		if self._switch_interval is not None:
+			sys.setswitchinterval(self._switch_interval)
+			self._switch_interval = None
+
+	def _run(self):
+		while not self._stop.wait(self.interval):
+			frame = sys._current_frames().get(self.thread_id)
+			if frame is not None:
+				self.counts[self._stack(frame)] += 1
+
+	@staticmethod
+	def _stack(frame):
+		names = []
+		while frame is not None:
+			code = frame.f_code
+			name = getattr(code, 'co_qualname', code.co_name)
+			names.append(f"{os.path.basename(code.co_filename)}:{name}".replace(' ', '_'))
+			frame = frame.f_back
+		return ';'.join(reversed(names))
+
+	def write_collapsed(self, path):
+		"""Schreibt 'stapel anzahl' je Zeile (Eingabeformat von flamegraph.pl)"""
+		with open(path, 'w', encoding='utf-8') as f:
+			for stack, count in self.counts.most_common():
+				f.write(f"{stack} {count}\n")
+
+
+def _create_ais(difficulty, engine, seed):
+	"""Je eine KI pro Farbe mit eigenem, aus seed abgeleitetem Zufallsstrom"""
+	base = SEARCH_PROFILES[difficulty.name.lower()]
+	return {player: create_ai(difficulty, engine, profile=dataclasses.replace(base, seed=seed * 2 + i))
+			for i, player in enumerate((Player.BLACK, Player.WHITE))}
+
+
+def play_profiled_game(ais, plies=DEFAULT_PLIES, seed=0, opening=DEFAULT_OPENING, script=None, ui=None):
+	"""Spielt die Partie und liefert das Spiel am Ende
+
+	script: Zugcodes einer Archivpartie - in jeder Stellung sucht die KI am
+	Zug wie im Spiel, gezogen wird der Archivzug. ui: AbaloneUI, die nach
+	jedem Halbzug ein Bild zeichnet.
+	"""
+	game = AbaloneGame()
+	if ui is not None:
+		ui.start_game(GameState.GAME_PVP)
+		ui.game = game
+	rng = random.Random(seed)
+
+	for ply in range(plies):
+		if game.is_over():
+			break
+		player = game.current_player
+		if script is not None:
+			if ply >= len(script):
+				break
+			ais[player].get_best_move(game, player)
+			if not game.make_move(*decode_move(script[ply])):
+				break
+		elif ply < opening:
+			game.apply(rng.choice(game.generate_moves()))
+		else:
+			move = ais[player].get_best_move(game, player)
+			if not move:
+				break
+			game.apply(move)
+
+		if ui is not None:
+			pygame.event.pump()
+			ui.draw_game()
+			ui.present_frame()
+	return game
+
+
+def _function_label(key):
+	filename, line, name = key
+	if filename == '~':
+		return name  # Eingebaute Funktion
+	return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def summarize(stats, top=DEFAULT_TOP):
+	"""Textzusammenfassung: teuerste Funktionen nach Eigenzeit und beobachtete Funktionen"""
+	entries = stats.stats  # (Datei, Zeile, Name) -> (primitive Aufrufe, Aufrufe, Eigenzeit, Gesamtzeit, Aufrufer)
+	header = f"{'Aufrufe':>10} {'Eigenzeit':>10} {'Gesamt':>10}  Funktion"
+	lines = [f"Gesamtlaufzeit {stats.total_tt:.3f}s, {stats.total_calls} Aufrufe", "",
+			 f"Top {top} nach Eigenzeit:", header]
+	ranked = sorted(entries.items(), key=lambda item: item[1][2], reverse=True)
+	for key, (_, calls, own, total, _) in ranked[:top]:
+		lines.append(f"{calls:>10} {own:>10.3f} {total:>10.3f}  {_function_label(key)}")
+
+	lines += ["", "Beobachtete Funktionen:", header]
+	for label, function in WATCHED_FUNCTIONS.items():
+		code = function.__code__
+		entry = entries.get((code.co_filename, code.co_firstlineno, code.co_name))
+		if entry is None:
+			lines.append(f"{'-':>10} {'-':>10} {'-':>10}  {label} (nicht aufgerufen)")
+		else:
+			_, calls, own, total, _ = entry
+			lines.append(f"{calls:>10} {own:>10.3f} {total:>10.3f}  {label}")
+	return '\n'.join(lines)
+
+
+def add_arguments(parser, output_dir=True):
+	"""Optionen des Profilings - ohne output_dir für abalone_main.py, das --profile und --game selbst anlegt"""
+	if output_dir:
+		parser.add_argument('output_dir')
+	group = parser.add_argument_group("Profiling")
+	group.add_argument('--script', metavar='ARCHIV', help="Züge aus einer Archivpartie statt Seed-Partie")
+	group.add_argument('--seed', type=int, default=0, help="Seed für Eröffnung und KIs")
+	group.add_argument('--opening', type=int, default=DEFAULT_OPENING, help="Zufällige Halbzüge zu Beginn")
+	group.add_argument('--plies', type=int, default=DEFAULT_PLIES, help="Höchstens so viele Halbzüge")
+	group.add_argument('--difficulty', choices=[d.name.lower() for d in AIDifficulty], default='medium')
+	group.add_argument('--engine', choices=AI_ENGINES, default=ENGINE_ALPHABETA)
+	group.add_argument('--ui', action='store_true', help="Nach jedem Halbzug mit der Oberfläche zeichnen")
+	group.add_argument('--sample', type=float, default=0, metavar='MS',
+					   help="Sampling-Intervall für Collapsed-Stacks (0 = ohne Sampler)")
+	group.add_argument('--top', type=int, default=DEFAULT_TOP, help="Anzahl Funktionen in der Zusammenfassung")
+	if output_dir:
+		group.add_argument('--game', type=int, default=-1, help="Nummer der Partie im Archiv (Standard: letzte)")
+
+
+def run(args):
+	"""Führt das Profiling mit den Optionen aus add_arguments() aus"""
+	os.makedirs(args.output_dir, exist_ok=True)
+	difficulty = AIDifficulty[args.difficulty.upper()]
+	script = None
+	if args.script:
+		with GameArchiveReader(args.script) as archive:
+			script = list(archive[args.game].moves)
+
+	ui = None
+	if args.ui:
+		from abalone import AbaloneUI
+		ui = AbaloneUI()
+
+	def play():
+		# Frische KIs je Durchgang, damit beide Durchgänge dieselbe Partie spielen
+		ais = _create_ais(difficulty, args.engine, args.seed)
+		return play_profiled_game(ais, args.plies, args.seed, args.opening, script, ui)
+
+	profiler = cProfile.Profile()
+	started = time.perf_counter()
+	profiler.enable()
+	game = play()
+	profiler.disable()
+	elapsed = time.perf_counter() - started
+	pstats_path = os.path.join(args.output_dir, PSTATS_FILE)
+	profiler.dump_stats(pstats_path)
+	print(f"Partie mit {game.ply} Halbzügen in {elapsed:.1f}s profiliert: {pstats_path}")
+
+	if args.sample:
+		sampler = StackSampler(args.sample / 1000)
+		sampler.start()
+		try:
+			play()
+		finally:
+			sampler.stop()
+		collapsed_path = os.path.join(args.output_dir, COLLAPSED_FILE)
+		sampler.write_collapsed(collapsed_path)
+		print(f"{sum(sampler.counts.values())} Stichproben: {collapsed_path}")
+
+	summary = summarize(pstats.Stats(pstats_path), args.top)
+	with open(os.path.join(args.output_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+		f.write(summary + '\n')
+	print(summary)
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="KI-gegen-KI-Partie mit cProfile und Sampler profilieren")
+	add_arguments(parser)
+	run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,215 @@
+"""Headless-Rendering von Stellungen als PNG-Vorschaubilder
+
+ThumbnailRenderer zeichnet Stellungen ohne Fenster im Stil des Spiels: die
+statischen Ebenen (Hintergrund, Felder) und die Kugel-Sprites aus AbaloneUI
+werden einmal erzeugt, auf den Brettausschnitt zugeschnitten und für jedes
+Bild wiederverwendet. Pro Stellung werden nur noch die Kugeln auf die
+Grundfläche geblittet, das Bild skaliert und gespeichert. PNGs werden direkt
+mit zlib auf niedriger Stufe kodiert - pygame.image.save braucht dafür ein
+Vielfaches der Renderzeit.
+
+SDL läuft mit dem Dummy-Videotreiber; render_positions() verteilt die
+Stellungen blockweise auf einen Prozess-Pool, sodass jeder Worker seine
+Ebenen nur einmal aufbaut.
+
+	python abalone_render.py games.abla thumbs/ --size 240
+"""
+
+import os
+import struct
+import zlib
+
+# Kein Fenster und keine Audio-Ausgabe - muss vor der Initialisierung von SDL gesetzt sein
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pygame
+
+from abalone import (BOARD_CELLS, HEX_SIZE, TEXT_COLOR, WINDOW_HEIGHT, WINDOW_WIDTH, AbaloneGame, AbaloneUI,
+					 Player)
+from abalone_analysis import iter_archive_positions
+from abalone_archive import GameArchiveReader
+
+DEFAULT_SIZE = 240  # Kantenlänge der Vorschaubilder in Pixeln
+BOARD_EXTENT = int(HEX_SIZE * 8)  # Halbe Kantenlänge des Ausschnitts um die Brettmitte
+CHUNK_SIZE = 64  # Stellungen pro Auftrag an einen Worker
+TASKS_PER_WORKER = 4  # Aufträge pro Worker in der Warteschlange
+PNG_COMPRESSION = 1  # zlib-Stufe: schnell, kaum größer als die höchste Stufe
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_chunk(tag, data):
+	return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def encode_png(surface, level=PNG_COMPRESSION):
+	"""Kodiert eine Fläche als RGB-PNG (ohne Zeilenfilter)"""
+	width, height = surface.get_size()
+	pixels = pygame.image.tobytes(surface, 'RGB')
+	stride = width * 3
+	rows = b''.join(b'\0' + pixels[y * stride:(y + 1) * stride] for y in range(height))
+	header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8 Bit, RGB
+	return (PNG_SIGNATURE + _png_chunk(b'IHDR', header)
+			+ _png_chunk(b'IDAT', zlib.compress(rows, level)) + _png_chunk(b'IEND', b''))
+
+
+class ThumbnailRenderer(AbaloneUI):
+	"""Zeichnet Stellungen auf eine Offscreen-Fläche
+
+	Übernimmt Ebenen, Felder und Kugel-Sprites von AbaloneUI, ohne dessen
+	Fenster, Menüs und Spielzustand anzulegen.
+	"""
+
+	def __init__(self, size=DEFAULT_SIZE):
+		if not pygame.display.get_init():
+			pygame.display.init()
+			pygame.display.set_mode((1, 1))  # Nur für convert() auf das Pixelformat
+		if not pygame.font.get_init():
+			pygame.font.init()
+
+		self.size = size
+		self.center_x = WINDOW_WIDTH // 2
+		self.center_y = WINDOW_HEIGHT // 2
+		self.game = AbaloneGame()  # Nur die Feldmenge wird für die Hex-Ebene gebraucht
+		self._layers = {}
+		self._marble_sprites = {}
+		self.font = pygame.font.Font(None, 28)
+
+		# Statische Ebenen einmal auf den Brettausschnitt zusammensetzen
+		self.crop = pygame.Rect(0, 0, BOARD_EXTENT * 2, BOARD_EXTENT * 2)
+		self.crop.center = (self.center_x, self.center_y)
+		self._base = pygame.Surface(self.crop.size).convert()
+		self._base.blit(self._get_layer('background'), (0, 0), self.crop)
+		self._base.blit(self._get_layer('hexes'), (0, 0), self.crop)
+		self.screen = self._base.copy()
+
+		self._sprites = {player: self._get_marble_sprite(player, False, False).convert_alpha()
+						 for player in (Player.BLACK, Player.WHITE)}
+		# Linke obere Ecke des Kugel-Sprites je Feld im Ausschnitt
+		self._offsets = []
+		for cell in BOARD_CELLS:
+			x, y = self.hex_to_pixel(cell)
+			self._offsets.append((x - HEX_SIZE - self.crop.x, y - HEX_SIZE - self.crop.y))
+		self._labels = {}
+
+	def render(self, snapshot):
+		"""Zeichnet eine Stellung (AbaloneGame.snapshot()) und liefert die skalierte Fläche"""
+		black, white, black_score, white_score, player = snapshot
+		frame = self.screen
+		frame.blit(self._base, (0, 0))
+
+		sprites = self._sprites
+		for i, offset in enumerate(self._offsets):
+			if black >> i & 1:
+				frame.blit(sprites[Player.BLACK], offset)
+			elif white >> i & 1:
+				frame.blit(sprites[Player.WHITE], offset)
+
+		frame.blit(self._label(black_score, white_score, player), (12, 12))
+		if self.size == self.crop.width:
+			return frame
+		return pygame.transform.smoothscale(frame, (self.size, self.size))
+
+	def _label(self, black_score, white_score, player):
+		"""Gecachte Zeile mit Punktestand und Spieler am Zug"""
+		key = (black_score, white_score, player)
+		label = self._labels.get(key)
+		if label is None:
+			side = "Schwarz" if player == Player.BLACK.value else "Weiß"
+			text = f"Schwarz {black_score} : {white_score} Weiß - {side} am Zug"
+			label = self.font.render(text, True, TEXT_COLOR)
+			self._labels[key] = label
+		return label
+
+	def save(self, snapshot, path):
+		"""Speichert eine Stellung als PNG"""
+		with open(path, 'wb') as f:
+			f.write(encode_png(self.render(snapshot)))
+
+
+# --- Worker (laufen in eigenen Prozessen) ---
+
+_RENDERER = None
+
+
+def _init_worker(size):
+	"""Baut Ebenen und Sprites einmal pro Prozess auf"""
+	global _RENDERER
+	_RENDERER = ThumbnailRenderer(size)
+
+
+def _worker_render(chunk, output_dir):
+	paths = []
+	for position_id, snapshot in chunk:
+		path = os.path.join(output_dir, f"{position_id}.png")
+		_RENDERER.save(snapshot, path)
+		paths.append(path)
+	return paths
+
+
+def render_positions(positions, output_dir, size=DEFAULT_SIZE, workers=None, chunk_size=CHUNK_SIZE):
+	"""Rendert (ID, Snapshot)-Paare parallel als <ID>.png nach output_dir und liefert die Pfade
+
+	Die IDs müssen als Dateinamen taugen. Wie bei analyze_positions() sind
+	nur wenige Aufträge pro Worker unterwegs, sodass beliebig lange Eingaben
+	durchlaufen.
+	"""
+	os.makedirs(output_dir, exist_ok=True)
+	workers = workers or os.cpu_count() or 1
+	max_in_flight = workers * TASKS_PER_WORKER
+
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(size,)) as executor:
+		pending = set()
+		chunk = []
+		try:
+			for position in positions:
+				chunk.append(position)
+				if len(chunk) < chunk_size:
+					continue
+				if len(pending) >= max_in_flight:
+					done, pending = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						yield from future.result()
+				pending.add(executor.submit(_worker_render, chunk, output_dir))
+				chunk = []
+			if chunk:
+				pending.add(executor.submit(_worker_render, chunk, output_dir))
+
+			while pending:
+				done, pending = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					yield from future.result()
+		finally:
+			# Abbruch durch den Aufrufer: noch nicht gestartete Aufträge verwerfen
+			for future in pending:
+				future.cancel()
+
+
+def main(argv=None):
+	import argparse
+	import time
+
+	parser = argparse.ArgumentParser(description="Vorschaubilder aller Stellungen eines Partiearchivs rendern")
+	parser.add_argument('archive')
+	parser.add_argument('output_dir')
+	parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help="Kantenlänge in Pixeln")
+	parser.add_argument('--workers', type=int)
+	args = parser.parse_args(argv)
+
+	started = time.perf_counter()
+	count = 0
+	with GameArchiveReader(args.archive) as archive:
+		# IDs 'Partie:Halbzug' als Dateinamen 'Partie_Halbzug'
+		positions = ((position_id.replace(':', '_'), snapshot)
+					 for position_id, snapshot, _ in iter_archive_positions(archive))
+		for _ in render_positions(positions, args.output_dir, args.size, args.workers):
+			count += 1
+	elapsed = time.perf_counter() - started
+	print(f"Gerendert: {count} Bilder in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f}/s)")
+
+
+if __name__ == "__main__":
+	main()
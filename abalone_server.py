@@ -0,0 +1,496 @@
+"""Headless Asyncio-Server für viele gleichzeitige Partien gegen die KI
+
+Protokoll: eine JSON-Nachricht pro Zeile über TCP. Jede Anfrage trägt eine
+``id``, die in der Antwort zurückkommt, und eine Operation ``op``:
+
+	{"id": 1, "op": "new_game", "difficulty": "medium", "ai": "W", "time_limit": 1.0}
+	{"id": 2, "op": "move", "game": 7, "move": 2113}
+	{"id": 3, "op": "ai_move", "game": 7}
+	{"id": 4, "op": "state", "game": 7}
+	{"id": 5, "op": "close_game", "game": 7}
+	{"id": 6, "op": "metrics"}
+
+Züge werden als 2-Byte-Codes aus abalone_archive.encode_move übertragen,
+das Brett als 61 Zeichen ('B', 'W', '.') in der Reihenfolge von BOARD_CELLS.
+
+Partien werden nur als kompakter Snapshot gehalten, dazu die Wiederholungszähler
+seit der letzten hinausgeschobenen Kugel für die Remisregeln (Antwortfeld
+``draw_reason``, sonst null). KI-Züge laufen in einem
+festen Pool vorgewärmter Engine-Prozesse mit Zeitbudget pro Anfrage; ist die
+Warteschlange voll, wird mit ``"error": "busy"`` abgelehnt.
+"""
+
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from abalone import AbaloneAI, AbaloneGame, AIDifficulty, BOARD_CELLS, Player
+from abalone_archive import decode_move, encode_move
+from abalone_cache import AnalysisCache
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_TIME_LIMIT = 2.0
+MAX_TIME_LIMIT = 10.0
+SESSION_TIMEOUT = 30 * 60  # Sekunden ohne Aktivität, bis eine Partie verworfen wird
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class ProtocolError(Exception):
+	"""Fehlerhafte Anfrage - wird als Fehlermeldung an den Client zurückgegeben"""
+
+
+class EngineBusy(Exception):
+	"""Die Warteschlange des Engine-Pools ist voll"""
+
+
+# --- Engine-Worker (laufen in eigenen Prozessen) ---
+
+_ENGINES = {}
+
+
+def _init_worker(cache_path=None):
+	"""Erstellt die KI-Instanzen einmal pro Prozess, damit ihre Caches warm bleiben"""
+	cache = AnalysisCache(cache_path) if cache_path else None
+	for difficulty in AIDifficulty:
+		_ENGINES[difficulty.value] = AbaloneAI(difficulty, analysis_cache=cache)
+
+
+def _worker_search(snapshot, difficulty, time_limit, position_counts=None, quiet_plies=0):
+	"""Sucht im Worker-Prozess den besten Zug und liefert dessen Code (oder None)
+
+	position_counts und quiet_plies geben der Suche den Verlauf der Partie mit,
+	damit sie Wiederholungen erkennt.
+	"""
+	game = AbaloneGame.from_snapshot(snapshot)
+	if position_counts is not None:
+		game.position_counts = position_counts
+		game.quiet_plies = quiet_plies
+	move = _ENGINES[difficulty].get_best_move(game, game.current_player, time_limit)
+	if move is None:
+		return None
+	return encode_move(*move)
+
+
+def _worker_ping():
+	return True
+
+
+class EnginePool:
+	"""Fester Pool von Engine-Prozessen mit begrenzter Warteschlange"""
+
+	def __init__(self, workers=2, max_pending=64, cache_path=None):
+		self.workers = workers
+		self.max_pending = max_pending
+		self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+											initargs=(cache_path,))
+
+		self.pending = 0
+		self.completed = 0
+		self.rejected = 0
+		self.total_latency = 0.0
+		self.max_latency = 0.0
+
+	async def warm_up(self):
+		"""Startet alle Worker-Prozesse vorab"""
+		loop = asyncio.get_running_loop()
+		await asyncio.gather(*(loop.run_in_executor(self.executor, _worker_ping)
+							   for _ in range(self.workers)))
+
+	def check_capacity(self):
+		"""Wirft EngineBusy, wenn keine weitere Suche angenommen werden kann"""
+		if self.pending >= self.max_pending:
+			self.rejected += 1
+			raise EngineBusy()
+
+	async def search(self, snapshot, difficulty, time_limit, position_counts=None, quiet_plies=0):
+		"""Reiht eine Suche ein - wirft EngineBusy, wenn die Warteschlange voll ist"""
+		self.check_capacity()
+
+		loop = asyncio.get_running_loop()
+		self.pending += 1
+		started = time.perf_counter()
+		try:
+			# Das Zeitbudget wird im Worker von AbaloneAI.get_best_move eingehalten
+			code = await loop.run_in_executor(self.executor, _worker_search, snapshot, difficulty.value, time_limit,
+											  position_counts, quiet_plies)
+		finally:
+			self.pending -= 1
+
+		latency = time.perf_counter() - started
+		self.completed += 1
+		self.total_latency += latency
+		self.max_latency = max(self.max_latency, latency)
+		return code
+
+	def metrics(self):
+		return {
+			'workers': self.workers,
+			'pending': self.pending,
+			'queue_depth': max(0, self.pending - self.workers),
+			'max_pending': self.max_pending,
+			'completed': self.completed,
+			'rejected': self.rejected,
+			'avg_latency': self.total_latency / self.completed if self.completed else 0.0,
+			'max_latency': self.max_latency,
+		}
+
+	def shutdown(self):
+		self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class GameSession:
+	"""Kompakter Zustand einer Partie
+
+	Neben dem Snapshot werden Wiederholungszähler und Halbzüge ohne
+	hinausgeschobene Kugel gehalten. Nach einem Punkt kann sich keine frühere
+	Stellung wiederholen (der Stand ist Teil des Hashes), die Zähler beginnen
+	dann von vorn und bleiben klein.
+	"""
+	__slots__ = ('snapshot', 'position_counts', 'quiet_plies', 'difficulty', 'ai_player', 'time_limit', 'ply',
+				 'busy', 'last_active')
+
+	def __init__(self, difficulty, ai_player, time_limit):
+		self.difficulty = difficulty
+		self.ai_player = ai_player
+		self.time_limit = time_limit
+		self.ply = 0
+		self.busy = False
+		self.last_active = time.monotonic()
+		self.store(AbaloneGame())
+
+	def game(self):
+		"""Baut die Partie mit Remis-Zählern aus dem Snapshot auf"""
+		game = AbaloneGame.from_snapshot(self.snapshot)
+		game.position_counts = dict(self.position_counts)
+		game.quiet_plies = self.quiet_plies
+		return game
+
+	def store(self, game):
+		"""Übernimmt Stellung und Remis-Zähler von game"""
+		self.snapshot = game.snapshot()
+		self.quiet_plies = game.quiet_plies
+		self.position_counts = {game.hash: 1} if game.quiet_plies == 0 else dict(game.position_counts)
+
+
+def _is_int(value):
+	"""JSON-Ganzzahl (bool ist in Python ebenfalls int, hier aber keine ID)"""
+	return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _board_string(snapshot):
+	black, white = snapshot[0], snapshot[1]
+	return ''.join('B' if black >> i & 1 else 'W' if white >> i & 1 else '.'
+				   for i in range(len(BOARD_CELLS)))
+
+
+class AbaloneServer:
+	"""Verwaltet Sessions und beantwortet Anfragen der Clients"""
+
+	def __init__(self, pool, max_sessions=10000, session_timeout=SESSION_TIMEOUT):
+		self.pool = pool
+		self.max_sessions = max_sessions
+		self.session_timeout = session_timeout
+		self.sessions = {}
+		self.next_game_id = 1
+		self.connections = 0
+		self.requests = 0
+		self.expiry_task = None
+
+	async def handle_connection(self, reader, writer):
+		"""Bearbeitet die Anfragen einer Verbindung nacheinander (natürlicher Gegendruck)"""
+		self.connections += 1
+		try:
+			while True:
+				try:
+					line = await reader.readline()
+				except (ConnectionError, ValueError):
+					break
+				if not line:
+					break
+
+				response = await self.handle_line(line)
+				writer.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b'\n')
+				await writer.drain()
+		finally:
+			self.connections -= 1
+			writer.close()
+
+	async def handle_line(self, line):
+		self.requests += 1
+		request_id = None
+		try:
+			request = json.loads(line)
+			if not isinstance(request, dict):
+				raise ProtocolError("Anfrage muss ein JSON-Objekt sein")
+			request_id = request.get('id')
+			handler = getattr(self, f"op_{request.get('op')}", None)
+			if handler is None:
+				raise ProtocolError(f"Unbekannte Operation: {request.get('op')}")
+			result = await handler(request)
+			return {'id': request_id, 'ok': True, **result}
+		except ProtocolError as e:
+			return {'id': request_id, 'ok': False, 'error': str(e)}
+		except EngineBusy:
+			return {'id': request_id, 'ok': False, 'error': 'busy'}
+		except ValueError as e:
+			return {'id': request_id, 'ok': False, 'error': f"Ungültige Anfrage: {e}"}
+		except Exception as e:
+			# Eine fehlerhafte Zeile darf nie die Verbindung beenden
+			return {'id': request_id, 'ok': False, 'error': f"Interner Fehler: {type(e).__name__}"}
+
+	def _session(self, request):
+		game_id = request.get('game')
+		if not _is_int(game_id):
+			raise ProtocolError("Partie-ID muss eine Ganzzahl sein")
+		session = self.sessions.get(game_id)
+		if session is None:
+			raise ProtocolError("Unbekannte Partie")
+		session.last_active = time.monotonic()
+		return session
+
+	def _state(self, game_id, session):
+		game = session.game()
+		winner = game.check_winner()
+		return {
+			'game': game_id,
+			'board': _board_string(session.snapshot),
+			'scores': [session.snapshot[2], session.snapshot[3]],
+			'to_move': session.snapshot[4],
+			'ply': session.ply,
+			'winner': winner.value if winner else None,
+			'draw_reason': game.draw_reason() if winner is None else None,
+		}
+
+	async def op_new_game(self, request):
+		if len(self.sessions) >= self.max_sessions:
+			raise ProtocolError("Maximale Anzahl an Partien erreicht")
+		difficulty = request.get('difficulty', 'medium')
+		if not isinstance(difficulty, str) or difficulty.upper() not in AIDifficulty.__members__:
+			raise ProtocolError("Unbekannte Schwierigkeit")
+		difficulty = AIDifficulty[difficulty.upper()]
+
+		ai = request.get('ai', Player.WHITE.value)
+		if ai is not None and ai not in (Player.BLACK.value, Player.WHITE.value):
+			raise ProtocolError("'ai' muss 'B', 'W' oder null sein")
+		ai_player = Player(ai) if ai is not None else None
+
+		time_limit = request.get('time_limit', DEFAULT_TIME_LIMIT)
+		if isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)):
+			raise ProtocolError("'time_limit' muss eine Zahl sein")
+		if not time_limit > 0:  # Auch NaN
+			raise ProtocolError("'time_limit' muss positiv sein")
+		time_limit = float(min(time_limit, MAX_TIME_LIMIT))
+
+		game_id = self.next_game_id
+		self.next_game_id += 1
+		session = GameSession(difficulty, ai_player, time_limit)
+		self.sessions[game_id] = session
+
+		result = {}
+		if ai_player == Player.BLACK:
+			result['ai_move'] = await self._play_ai_move(session)
+		return {**result, **self._state(game_id, session)}
+
+	async def op_move(self, request):
+		game_id = request.get('game')
+		session = self._session(request)
+		if session.busy:
+			raise ProtocolError("Die KI rechnet noch")
+
+		game = session.game()
+		if game.is_over():
+			raise ProtocolError("Die Partie ist beendet")
+		if game.current_player == session.ai_player:
+			raise ProtocolError("Die KI ist am Zug")
+		try:
+			move = decode_move(int(request['move']))
+		except (KeyError, TypeError, IndexError):
+			raise ProtocolError("Ungültiger Zug-Code")
+		if session.ai_player is not None:
+			# Vor dem Zug prüfen, damit eine Ablehnung die Partie nicht verändert
+			self.pool.check_capacity()
+		if not game.make_move(*move):
+			raise ProtocolError("Illegaler Zug")
+		session.store(game)
+		session.ply += 1
+
+		result = {}
+		if session.ai_player == game.current_player and not game.is_over():
+			result['ai_move'] = await self._play_ai_move(session)
+		return {**result, **self._state(game_id, session)}
+
+	async def _play_ai_move(self, session):
+		"""Lässt den Engine-Pool ziehen und übernimmt den Zug in die Session"""
+		session.busy = True
+		try:
+			code = await self.pool.search(session.snapshot, session.difficulty, session.time_limit,
+										  session.position_counts, session.quiet_plies)
+		finally:
+			session.busy = False
+		if code is None:
+			return None
+
+		game = session.game()
+		if game.make_move(*decode_move(code)):
+			session.store(game)
+			session.ply += 1
+		return code
+
+	async def op_ai_move(self, request):
+		"""Lässt die KI ziehen, falls sie am Zug ist (z.B. nach einer Ablehnung)"""
+		session = self._session(request)
+		if session.busy:
+			raise ProtocolError("Die KI rechnet noch")
+		game = session.game()
+		if game.current_player != session.ai_player or game.is_over():
+			raise ProtocolError("Die KI ist nicht am Zug")
+		ai_move = await self._play_ai_move(session)
+		return {'ai_move': ai_move, **self._state(request.get('game'), session)}
+
+	async def op_state(self, request):
+		return self._state(request.get('game'), self._session(request))
+
+	async def op_close_game(self, request):
+		self._session(request)
+		del self.sessions[request.get('game')]
+		return {}
+
+	async def op_metrics(self, request):
+		return {
+			'sessions': len(self.sessions),
+			'connections': self.connections,
+			'requests': self.requests,
+			**self.pool.metrics(),
+		}
+
+	async def expire_sessions(self, interval=60):
+		"""Verwirft regelmäßig Partien ohne Aktivität"""
+		while True:
+			await asyncio.sleep(interval)
+			limit = time.monotonic() - self.session_timeout
+			for game_id in [g for g, s in self.sessions.items() if s.last_active < limit and not s.busy]:
+				del self.sessions[game_id]
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=2, max_pending=64, max_sessions=10000,
+				cache_path=None):
+	"""Startet Engine-Pool und Server und liefert (Server, asyncio-Server)"""
+	pool = EnginePool(workers, max_pending, cache_path)
+	await pool.warm_up()
+	server = AbaloneServer(pool, max_sessions)
+	tcp_server = await asyncio.start_server(server.handle_connection, host, port, limit=MAX_LINE_LENGTH)
+	server.expiry_task = asyncio.create_task(server.expire_sessions())
+	return server, tcp_server
+
+
+class LocalClient:
+	"""Einfacher Client für Tests und Lastsimulation"""
+
+	def __init__(self, reader, writer):
+		self.reader = reader
+		self.writer = writer
+		self.next_id = 1
+
+	@classmethod
+	async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT):
+		reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE_LENGTH)
+		return cls(reader, writer)
+
+	async def request(self, op, **params):
+		request_id = self.next_id
+		self.next_id += 1
+		message = {'id': request_id, 'op': op, **params}
+		self.writer.write(json.dumps(message).encode('utf-8') + b'\n')
+		await self.writer.drain()
+		return json.loads(await self.reader.readline())
+
+	async def close(self):
+		self.writer.close()
+		await self.writer.wait_closed()
+
+
+def _random_move(board, to_move):
+	"""Zufälliger legaler Einzelkugel-Zug für die Lastsimulation"""
+	game = AbaloneGame()
+	for cell, char in zip(BOARD_CELLS, board):
+		game.board[cell] = Player(char) if char != '.' else Player.EMPTY
+	game.current_player = Player(to_move)
+	marbles = [pos for pos, p in game.board.items() if p == game.current_player]
+	random.shuffle(marbles)
+	for marble in marbles:
+		targets = game.calculate_valid_moves([marble])
+		if targets:
+			return encode_move([marble], random.choice(sorted(targets)))
+	return None
+
+
+async def simulate(host, port, clients=10, plies=10, difficulty='easy', time_limit=0.5):
+	"""Lässt mehrere Clients gleichzeitig gegen die KI spielen"""
+
+	async def play():
+		client = await LocalClient.connect(host, port)
+		try:
+			state = await client.request('new_game', difficulty=difficulty, time_limit=time_limit)
+			for _ in range(plies):
+				if not state.get('ok') or state.get('winner') or state.get('draw_reason'):
+					break
+				move = _random_move(state['board'], state['to_move'])
+				if move is None:
+					break
+				response = await client.request('move', game=state['game'], move=move)
+				if response.get('error') == 'busy':
+					await asyncio.sleep(0.1)
+					continue
+				state = response
+			await client.request('close_game', game=state.get('game'))
+		finally:
+			await client.close()
+
+	await asyncio.gather(*(play() for _ in range(clients)))
+	client = await LocalClient.connect(host, port)
+	metrics = await client.request('metrics')
+	await client.close()
+	return metrics
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Abalone-Server für viele Partien gegen die KI")
+	parser.add_argument('--host', default=DEFAULT_HOST)
+	parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+	parser.add_argument('--workers', type=int, default=2)
+	parser.add_argument('--max-pending', type=int, default=64)
+	parser.add_argument('--max-sessions', type=int, default=10000)
+	parser.add_argument('--cache', metavar='PATH', help="Persistenter Analyse-Cache (SQLite), von allen Workern geteilt")
+	parser.add_argument('--simulate', type=int, metavar='CLIENTS',
+						help="Startet zusätzlich so viele lokale Test-Clients und beendet danach")
+	parser.add_argument('--plies', type=int, default=10, help="Züge pro simuliertem Client")
+	args = parser.parse_args(argv)
+
+	async def run():
+		server, tcp_server = await serve(args.host, args.port, args.workers, args.max_pending,
+											  args.max_sessions, args.cache)
+		try:
+			if args.simulate:
+				port = tcp_server.sockets[0].getsockname()[1]
+				metrics = await simulate(args.host, port, args.simulate, args.plies)
+				print(json.dumps(metrics, indent=2))
+			else:
+				print(f"Server läuft auf {args.host}:{args.port}")
+				await tcp_server.serve_forever()
+		finally:
+			tcp_server.close()
+			server.pool.shutdown()
+
+	try:
+		asyncio.run(run())
+	except KeyboardInterrupt:
+		pass
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,243 @@
+"""Texel-Tuning der Bewertungsgewichte von AbaloneAI
+
+Die Merkmale aus AbaloneAI._evaluate_position werden vektorisiert direkt
+aus den Bitmasken eines Stellungsdatensatzes (abalone_dataset.py) berechnet.
+Die Bewertung aus Sicht von Schwarz ist w · f; die Gewinnwahrscheinlichkeit
+wird als sigmoid(K · w · f) modelliert und die Gewichte per Mini-Batch-Adam
+auf die logistische Verlustfunktion gegen die Partieergebnisse angepasst.
+
+Angepasst wird ein Gewichtssatz für alle Schwierigkeiten: AbaloneAI und
+MCTSAI werten jedes Merkmal mit Gewicht ungleich 0 bei jeder Schwierigkeit
+aus (auch den Zusammenhalt), die Spielstärke unterscheidet sich nur über
+das Suchprofil.
+
+Das Ergebnis wird als JSON geschrieben und von AbaloneAI beim Start über
+load_eval_weights() geladen.
+"""
+
+import json
+import time
+
+import numpy as np
+
+from abalone import (BOARD_CELLS, CELL_INDEX, CENTER_POSITIONS, DEFAULT_EVAL_WEIGHTS, EDGE_CELLS, EJECTION_PATTERNS,
+					 EJECTION_TABLE, EVAL_WEIGHTS_FILE, Hex)
+from abalone_dataset import labels, load_dataset, unpack_boards
+
+FEATURES = list(DEFAULT_EVAL_WEIGHTS)
+DEFAULT_BATCH_SIZE = 1 << 18
+COHESION_MARBLES = 8  # _calculate_cohesion_fast betrachtet nur die ersten 8 Kugeln
+
+
+def _cell_mask(cells):
+	mask = 0
+	for cell in cells:
+		mask |= 1 << CELL_INDEX[cell]
+	return np.uint64(mask)
+
+
+CENTER_MASK = _cell_mask(Hex(q, r) for q, r in CENTER_POSITIONS)
+EDGE_MASK = _cell_mask(EDGE_CELLS)
+# Ausschublinien als Matrix (alle gleich lang) für eine gemeinsame Tabellensuche
+EJECTION_VALUES = np.array(EJECTION_TABLE, dtype=np.float32)
+EJECTION_CELLS = np.array(EJECTION_PATTERNS.tuples, dtype=np.intp)
+EJECTION_OFFSETS = np.array(EJECTION_PATTERNS.offsets, dtype=np.int64)
+EJECTION_POWERS = 3 ** np.arange(EJECTION_CELLS.shape[1], dtype=np.int64)
+
+# Nachbarschaftsmatrix der 61 Felder für den Zusammenhalt
+ADJACENCY = np.zeros((len(BOARD_CELLS), len(BOARD_CELLS)), dtype=np.float32)
+for _i, _cell in enumerate(BOARD_CELLS):
+	for _d in range(6):
+		_j = CELL_INDEX.get(_cell.neighbor(_d))
+		if _j is not None:
+			ADJACENCY[_i, _j] = 1
+
+
+if hasattr(np, 'bitwise_count'):
+	def popcount(x):
+		return np.bitwise_count(x).astype(np.int16)
+else:
+	_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.int16)
+
+	def popcount(x):
+		return _BYTE_COUNTS[np.ascontiguousarray(x).view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+def _cohesion(bits):
+	"""Zusammenhalt der ersten COHESION_MARBLES Kugeln je Stellung (N, 61) -> (N,)"""
+	bits = bits.astype(np.float32)
+	first = bits * (np.cumsum(bits, axis=1) <= COHESION_MARBLES)
+	return (first * (bits @ ADJACENCY)).sum(axis=1)
+
+
+def _ejection_threats(board):
+	"""Gefährdete schwarze minus weiße Randkugeln je Stellung (N, 61) -> (N,)"""
+	codes = np.where(board > 0, 1, np.where(board < 0, 2, 0)).astype(np.int64)
+	indices = codes[:, EJECTION_CELLS] @ EJECTION_POWERS + EJECTION_OFFSETS
+	return EJECTION_VALUES[indices].sum(axis=1)
+
+
+def extract_features(records, features=FEATURES):
+	"""Merkmalsmatrix (N, len(features)) aus Sicht von Schwarz"""
+	black = records['black']
+	white = records['white']
+	board = None  # Entpackte Bretter, erst bei Bedarf
+	columns = []
+	for name in features:
+		if name == 'score':
+			column = records['black_score'].astype(np.int16) - records['white_score']
+		elif name == 'center':
+			column = popcount(black & CENTER_MASK) - popcount(white & CENTER_MASK)
+		elif name == 'material':
+			column = popcount(black) - popcount(white)
+		elif name == 'edge':
+			column = popcount(black & EDGE_MASK) - popcount(white & EDGE_MASK)
+		elif name == 'cohesion':
+			board = unpack_boards(records) if board is None else board
+			column = _cohesion(board == 1) - _cohesion(board == -1)
+		elif name == 'danger':
+			board = unpack_boards(records) if board is None else board
+			column = _ejection_threats(board)
+		else:
+			raise ValueError(f"Unbekanntes Merkmal: {name}")
+		columns.append(np.asarray(column, dtype=np.float32))
+	return np.stack(columns, axis=1)
+
+
+def iter_batches(data, batch_size, features, rng=None):
+	"""Liefert (Merkmale, Zielwahrscheinlichkeit, Gewicht) je Batch"""
+	starts = np.arange(0, len(data), batch_size)
+	if rng is not None:
+		rng.shuffle(starts)
+	for start in starts:
+		records = np.asarray(data[start:start + batch_size])
+		target = (labels(records) + 1) / 2
+		yield extract_features(records, features), target.astype(np.float32), records['count'].astype(np.float32)
+
+
+def _sigmoid(x):
+	return 1 / (1 + np.exp(-np.clip(x, -50, 50)))
+
+
+def _logistic_loss(x, y, w, weights, scale):
+	"""Gewichtete Kreuzentropie für einen Batch"""
+	p = np.clip(_sigmoid(scale * (x @ weights)), 1e-7, 1 - 1e-7)
+	return float(-(w * (y * np.log(p) + (1 - y) * np.log(1 - p))).sum() / max(float(w.sum()), 1))
+
+
+def fit_scale(data, weights, features, sample_size=1 << 20, seed=0):
+	"""Sucht den Skalierungsfaktor K für die Startgewichte (Goldener Schnitt auf log K)
+
+	Die Suche läuft auf einer Stichprobe, deren Merkmale nur einmal berechnet werden.
+	"""
+	rng = np.random.default_rng(seed)
+	if len(data) > sample_size:
+		rows = np.sort(rng.choice(len(data), sample_size, replace=False))
+		records = np.asarray(data[rows])
+	else:
+		records = np.asarray(data)
+	x = extract_features(records, features)
+	y = ((labels(records) + 1) / 2).astype(np.float32)
+	w = records['count'].astype(np.float32)
+	loss = lambda log_k: _logistic_loss(x, y, w, weights, np.exp(log_k))
+
+	lo, hi = np.log(1e-6), np.log(1.0)
+	ratio = (np.sqrt(5) - 1) / 2
+	a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+	fa, fb = loss(a), loss(b)
+	for _ in range(40):
+		if fa < fb:
+			hi, b, fb = b, a, fa
+			a = hi - ratio * (hi - lo)
+			fa = loss(a)
+		else:
+			lo, a, fa = a, b, fb
+			b = lo + ratio * (hi - lo)
+			fb = loss(b)
+	scale = float(np.exp((lo + hi) / 2))
+	return scale, loss(np.log(scale))
+
+
+def tune(data, initial_weights=None, features=FEATURES, epochs=10, learning_rate=1.0,
+		 batch_size=DEFAULT_BATCH_SIZE, scale=None, seed=0, log=print):
+	"""Passt die Gewichte per Mini-Batch-Adam an und liefert (Gewichte, K)"""
+	initial = dict(DEFAULT_EVAL_WEIGHTS)
+	if initial_weights:
+		initial.update(initial_weights)
+	weights = np.array([initial[name] for name in features], dtype=np.float64)
+
+	if scale is None:
+		scale, start_loss = fit_scale(data, weights, features, seed=seed)
+		log(f"K = {scale:.6g}  Startverlust (Stichprobe) {start_loss:.6f}")
+
+	rng = np.random.default_rng(seed)
+	m = np.zeros_like(weights)
+	v = np.zeros_like(weights)
+	beta1, beta2, eps = 0.9, 0.999, 1e-8
+	step = 0
+
+	for epoch in range(epochs):
+		started = time.perf_counter()
+		total_loss = 0.0
+		total_weight = 0.0
+		for x, y, w in iter_batches(data, batch_size, features, rng):
+			batch_weight = max(float(w.sum()), 1)
+			total_loss += _logistic_loss(x, y, w, weights, scale) * batch_weight
+			total_weight += batch_weight
+			p = _sigmoid(scale * (x @ weights))
+
+			# Gradient der Kreuzentropie nach den Gewichten
+			grad = scale * ((w * (p - y)) @ x) / batch_weight
+
+			step += 1
+			m = beta1 * m + (1 - beta1) * grad
+			v = beta2 * v + (1 - beta2) * grad * grad
+			m_hat = m / (1 - beta1 ** step)
+			v_hat = v / (1 - beta2 ** step)
+			weights -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+
+		log(f"Epoche {epoch + 1}: Verlust {total_loss / total_weight:.6f} "
+			f"({time.perf_counter() - started:.1f}s)")
+
+	return dict(zip(features, (round(float(w), 3) for w in weights))), scale
+
+
+def save_weights(weights, path=EVAL_WEIGHTS_FILE):
+	"""Schreibt eine Gewichtsdatei für load_eval_weights()"""
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump(weights, f, indent=2)
+		f.write('\n')
+
+
+def main(argv=None):
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Bewertungsgewichte per Texel-Tuning anpassen")
+	parser.add_argument('dataset', help="Stellungsdatensatz aus abalone_dataset.py")
+	parser.add_argument('--output', default=EVAL_WEIGHTS_FILE)
+	parser.add_argument('--features', nargs='+', choices=FEATURES, default=FEATURES)
+	parser.add_argument('--epochs', type=int, default=10)
+	parser.add_argument('--learning-rate', type=float, default=1.0)
+	parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+	parser.add_argument('--scale', type=float, help="Fester Skalierungsfaktor K statt automatischer Suche")
+	parser.add_argument('--seed', type=int, default=0)
+	args = parser.parse_args(argv)
+
+	data = load_dataset(args.dataset)
+	if not len(data):
+		parser.error("Der Datensatz ist leer")
+
+	weights, _ = tune(data, features=args.features, epochs=args.epochs, learning_rate=args.learning_rate,
+					  batch_size=args.batch_size, scale=args.scale, seed=args.seed)
+
+	# Nicht getunte Merkmale behalten ihren Standardwert
+	result = dict(DEFAULT_EVAL_WEIGHTS)
+	result.update(weights)
+	save_weights(result, args.output)
+	print(f"Gewichte geschrieben: {args.output}")
+	for name, value in result.items():
+		print(f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,55 @@
+"""Gemeinsame Hilfen der Tests (test_*.py)"""
+
+import random
+
+import pytest
+
+from abalone import AbaloneGame, Move, MoveKind
+
+
+def play_random_game(seed, plies):
+	"""Partie aus zufälligen legalen Zügen (endet vorzeitig bei Spielende)"""
+	rng = random.Random(seed)
+	game = AbaloneGame()
+	for _ in range(plies):
+		if game.is_over():
+			break
+		game.apply(rng.choice(game.generate_moves()))
+	return game
+
+
+def is_generated(move, game):
+	"""Ob der Zuggenerator move erzeugt - unabhängig von der Reihenfolge der Kugeln"""
+	return any(set(move.marbles) == set(other.marbles) and move.direction == other.direction
+			   and move.kind == other.kind and set(move.pushed) == set(other.pushed)
+			   for other in game.generate_moves())
+
+
+def shuffle_moves(game):
+	"""Vier Züge, nach denen die Stellung wieder dieselbe ist: je Seite eine Kugel vor und zurück"""
+	game = game.copy()
+	forward = []
+	for _ in range(2):
+		move = next(m for m in game.generate_moves() if len(m.marbles) == 1 and m.kind == MoveKind.INLINE)
+		forward.append(move)
+		game.apply(move)
+	back = [Move((move.target,), (move.direction + 3) % 6, MoveKind.INLINE) for move in forward]
+	return forward + back
+
+
+@pytest.fixture
+def random_game():
+	"""random_game(seed, plies) -> AbaloneGame"""
+	return play_random_game
+
+
+@pytest.fixture
+def generated():
+	"""generated(move, game) -> bool"""
+	return is_generated
+
+
+@pytest.fixture
+def shuffle():
+	"""shuffle(game) -> vier Züge, die zur Stellung zurückführen"""
+	return shuffle_moves
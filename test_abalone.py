@@ -0,0 +1,250 @@
+"""Tests für das Spielmodell in abalone.py"""
+
+import random
+from array import array
+from dataclasses import replace
+
+import pytest
+
+from abalone import (CELL_INDEX, SYMMETRY_COUNT, SYMMETRY_INVERSE, AbaloneAI, AbaloneGame, AIDifficulty,
+					 CHECKPOINT_INTERVAL, DRAW_SCORE, NTUPLE_PATTERNS, NTUPLE_SIZE, Hex, Move, MoveKind, PatternState, Player,
+					 canonical_snapshot, snapshot_hash, transform_mask, transform_move)
+
+
+def position(black, white, black_score=0, white_score=0, to_move=Player.BLACK):
+	"""Stellung aus Listen von (q, r)-Feldern"""
+	def mask(cells):
+		return sum(1 << CELL_INDEX[Hex(q, r)] for q, r in cells)
+	return AbaloneGame.from_snapshot((mask(black), mask(white), black_score, white_score, to_move.value))
+
+
+# --- Züge ---
+
+def test_generated_moves_are_legal(random_game):
+	for seed in range(5):
+		game = random_game(seed, 20)
+		for move in game.generate_moves():
+			assert game.is_legal(move)
+
+
+def test_is_legal_rejects_tampered_moves(random_game):
+	game = random_game(3, 12)
+	move = next(m for m in game.generate_moves() if len(m.marbles) == 2)
+	opponent = next(cell for cell, player in game.board.items() if player not in (game.current_player, Player.EMPTY))
+	for tampered in (replace(move, direction=6), replace(move, direction=-1),
+					 replace(move, marbles=(move.marbles[0], move.marbles[0])),
+					 replace(move, marbles=(opponent,)), replace(move, kind=MoveKind.PUSH, pushed=(opponent,)),
+					 (move.marbles, move.target)):
+		assert not game.is_legal(tampered)
+
+
+def test_is_legal_checks_sumito_strength():
+	# Zwei gegen zwei darf nicht schieben, drei gegen zwei schon
+	game = position(black=[(-2, 0), (-1, 0)], white=[(0, 0), (1, 0)])
+	assert not game.is_legal(Move((Hex(-2, 0), Hex(-1, 0)), 0, MoveKind.PUSH, (Hex(0, 0), Hex(1, 0))))
+	game = position(black=[(-3, 0), (-2, 0), (-1, 0)], white=[(0, 0), (1, 0)])
+	assert game.is_legal(Move((Hex(-3, 0), Hex(-2, 0), Hex(-1, 0)), 0, MoveKind.PUSH, (Hex(0, 0), Hex(1, 0))))
+
+
+# --- Verlauf und Zobrist-Hash ---
+
+def test_incremental_hash_matches_rehash():
+	game = AbaloneGame()
+	rng = random.Random(5)
+	for _ in range(60):
+		if game.is_over():
+			break
+		game.apply(rng.choice(game.generate_moves()))
+		incremental = game.hash
+		game.rehash()
+		assert game.hash == incremental
+		assert snapshot_hash(game.snapshot()) == incremental
+
+
+@pytest.mark.parametrize('score', [0, 5, 7, 9])
+def test_scoring_hash_matches_rehash(score):
+	# Auch geladene Stellungen mit Punkteständen über der Schlüsseltabelle
+	game = position(black=[(2, -3), (3, -3)], white=[(4, -3), (0, 0)], black_score=score)
+	move = Move((Hex(2, -3), Hex(3, -3)), 0, MoveKind.PUSH, (Hex(4, -3),))
+	assert game.is_legal(move)
+	before = game.hash
+	game.apply(move)
+	assert game.scores[Player.BLACK] == score + 1
+	assert game.hash == game.rehash()
+	game.undo()
+	assert game.hash == before == game.rehash()
+
+
+def test_undo_redo_restore_positions(random_game):
+	game = random_game(6, 30)
+	snapshots = []
+	while game.ply:
+		snapshots.append((game.snapshot(), game.hash))
+		game.undo()
+	assert game.snapshot() == AbaloneGame().snapshot()
+	for snapshot, position_hash in reversed(snapshots):
+		assert game.redo() is not None
+		assert (game.snapshot(), game.hash) == (snapshot, position_hash)
+	assert game.redo() is None
+
+
+def test_goto_ply_matches_step_by_step(random_game):
+	plies = 3 * CHECKPOINT_INTERVAL + 5
+	game = random_game(7, plies)
+	reference = AbaloneGame()
+	expected = [(reference.snapshot(), reference.hash)]
+	for delta in game.history:
+		reference.apply(delta.move)
+		expected.append((reference.snapshot(), reference.hash))
+
+	for ply in (0, game.ply, 1, CHECKPOINT_INTERVAL, 2 * CHECKPOINT_INTERVAL + 3, game.ply - 1, 5, game.ply):
+		game.goto_ply(ply)
+		assert game.ply == ply
+		assert (game.snapshot(), game.hash) == expected[ply]
+		assert game.repetitions() == sum(1 for snapshot, _ in expected[:ply + 1] if snapshot == expected[ply][0])
+
+
+# --- Remisregeln ---
+
+def test_threefold_repetition_is_a_draw(shuffle):
+	game = AbaloneGame()
+	moves = shuffle(game)
+	for move in moves:
+		assert game.is_legal(move)
+		game.apply(move)
+	assert game.repetitions() == 2 and not game.is_over()
+	for move in moves:
+		game.apply(move)
+	assert game.draw_reason() == 'repetition'
+	assert game.is_draw() and game.is_over()
+
+	game.undo()
+	assert game.draw_reason() is None
+	game.redo()
+	assert game.draw_reason() == 'repetition'
+	assert game.copy().draw_reason() == 'repetition'
+
+
+def test_quiet_ply_limit(shuffle):
+	game = AbaloneGame(repetition_limit=0, quiet_ply_limit=6)
+	moves = shuffle(game)
+	for ply, move in enumerate(moves * 2, 1):
+		game.apply(move)
+		assert game.quiet_plies == ply
+		assert (game.draw_reason() == 'quiet_plies') == (ply >= 6)
+
+
+def test_push_off_resets_quiet_plies():
+	game = position(black=[(2, -3), (3, -3)], white=[(4, -3), (0, 0)])
+	game.quiet_plies = 50
+	game.apply(Move((Hex(2, -3), Hex(3, -3)), 0, MoveKind.PUSH, (Hex(4, -3),)))
+	assert game.quiet_plies == 0
+	game.undo()
+	assert game.quiet_plies == 50
+
+
+def test_search_scores_a_repetition_as_draw(shuffle):
+	game = AbaloneGame()
+	moves = shuffle(game)
+	for move in moves + moves[:3]:
+		game.apply(move)
+	# Der Rückzug wiederholt die Stellung ein drittes Mal
+	ai = AbaloneAI(AIDifficulty.MEDIUM)
+	search_game = ai._copy_game_state(game)
+	search_game.apply(moves[3])
+	assert ai._is_search_draw(search_game)
+	assert ai._minimax(search_game, 2, float('-inf'), float('inf'), True, Player.BLACK) == DRAW_SCORE
+
+
+# --- Musterbewertung ---
+
+def assert_patterns_match(game):
+	"""Mitgeführte Musterzustände gleich einer vollständigen Neuberechnung"""
+	for state in game.patterns.values():
+		fresh = PatternState(state.patterns, state.table, game.board)
+		assert state.indices == fresh.indices
+		assert state.value == pytest.approx(fresh.value, abs=1e-3)
+
+
+def test_ntuple_state_follows_moves():
+	rng = random.Random(42)
+	table = array('f', (rng.uniform(-50, 50) for _ in range(NTUPLE_SIZE)))
+	ai = AbaloneAI(AIDifficulty.MEDIUM, ntuple_weights=table)
+	game = ai._copy_game_state(AbaloneGame())
+	assert game.patterns['ntuple'].patterns is NTUPLE_PATTERNS
+	for _ in range(80):
+		if game.is_over():
+			break
+		game.apply(rng.choice(game.generate_moves()))
+		assert_patterns_match(game)
+	while game.ply:
+		game.undo()
+		assert_patterns_match(game)
+	game.goto_ply(len(game.history))
+	assert_patterns_match(game)
+
+
+def test_ejection_threats_in_known_positions():
+	# Weiß am Rand vor zwei schwarzen Kugeln: eine gefährdete weiße Kugel
+	assert AbaloneAI._ejection_threats(position(black=[(2, -3), (3, -3)], white=[(4, -3)])) == -1
+	# Zwei gegen zwei schiebt nicht
+	assert AbaloneAI._ejection_threats(position(black=[(1, -3), (2, -3)], white=[(3, -3), (4, -3)])) == 0
+	# Drei gegen zwei schon - und mit vertauschten Farben zählt es für Schwarz
+	assert AbaloneAI._ejection_threats(position(black=[(0, -3), (1, -3), (2, -3)], white=[(3, -3), (4, -3)])) == -1
+	assert AbaloneAI._ejection_threats(position(black=[(3, -3), (4, -3)], white=[(0, -3), (1, -3), (2, -3)])) == 1
+	assert AbaloneAI._ejection_threats(AbaloneGame()) == 0
+
+
+def test_danger_state_follows_moves():
+	ai = AbaloneAI(AIDifficulty.MEDIUM)
+	game = ai._copy_game_state(AbaloneGame())
+	rng = random.Random(43)
+	threatened = 0
+	for _ in range(120):
+		if game.is_over():
+			break
+		game.apply(rng.choice(game.generate_moves()))
+		assert game.patterns['danger'].value == AbaloneAI._ejection_threats(game)
+		threatened += game.patterns['danger'].value != 0
+	assert threatened
+	while game.ply:
+		game.undo()
+		assert_patterns_match(game)
+
+
+# --- Symmetrien ---
+
+def equivalent_snapshots(snapshot):
+	"""Alle 24 gleichwertigen Stellungen: 12 Symmetrien, jeweils mit und ohne Farbtausch"""
+	black, white, black_score, white_score, player = snapshot
+	other = 'B' if player == 'W' else 'W'
+	for symmetry in range(SYMMETRY_COUNT):
+		b, w = transform_mask(black, symmetry), transform_mask(white, symmetry)
+		yield (b, w, black_score, white_score, player)
+		yield (w, b, white_score, black_score, other)
+
+
+def test_equivalent_positions_share_canonical_key(random_game):
+	for seed in range(20):
+		snapshot = random_game(seed, seed * 2).snapshot()
+		key, _ = canonical_snapshot(snapshot)
+		assert key[4] == 'B'
+		for other in equivalent_snapshots(snapshot):
+			assert canonical_snapshot(other)[0] == key
+
+
+def test_canonical_transform_maps_legal_moves_both_ways(random_game, generated):
+	for seed in range(10):
+		game = random_game(100 + seed, 25)
+		key, (symmetry, _) = canonical_snapshot(game.snapshot())
+		canonical = AbaloneGame.from_snapshot(key)
+		for move in game.generate_moves():
+			mapped = transform_move(move, symmetry)
+			assert generated(mapped, canonical)
+			assert transform_move(mapped, SYMMETRY_INVERSE[symmetry]) == move
+
+
+def test_symmetry_inverse():
+	mask = AbaloneGame().snapshot()[0]
+	for symmetry in range(SYMMETRY_COUNT):
+		assert transform_mask(transform_mask(mask, symmetry), SYMMETRY_INVERSE[symmetry]) == mask
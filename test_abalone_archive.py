@@ -0,0 +1,63 @@
+"""Tests für Zugcodes und Archivformat (abalone_archive)"""
+
+import pytest
+
+from abalone_archive import (RESULT_BLACK, RESULT_UNKNOWN, GameArchiveReader, GameArchiveWriter, decode_move,
+							 encode_move)
+
+
+def test_move_codes_round_trip(random_game):
+	game = random_game(1, 30)
+	for move in game.generate_moves():
+		marbles, target = decode_move(encode_move(*move))
+		# Seitwärtszüge beziehen das Ziel auf die erste Kugel - verglichen wird der aufgelöste Zug
+		decoded = [m for m in game.moves_for_selection(marbles) if m.target == target]
+		assert len(decoded) == 1
+		assert (set(decoded[0].marbles), decoded[0].direction) == (set(move.marbles), move.direction)
+
+
+def test_archive_round_trip(tmp_path, random_game):
+	path = str(tmp_path / 'games.abla')
+	games = [random_game(seed, 40) for seed in range(3)]
+	with GameArchiveWriter(path) as writer:
+		for i, game in enumerate(games):
+			writer.write_game([delta.move for delta in game.history], RESULT_BLACK if i else RESULT_UNKNOWN,
+							  {'seed': i})
+
+	with GameArchiveReader(path) as reader:
+		assert len(reader) == len(games)
+		for i, (archived, game) in enumerate(zip(reader, games)):
+			assert archived.metadata == {'seed': i}
+			assert len(archived.moves) == game.ply
+			for replayed, _ in archived.replay():
+				pass
+			assert replayed.snapshot() == game.snapshot()
+		assert reader[-1].result == RESULT_BLACK
+
+
+def test_archive_append_and_missing_index(tmp_path, random_game):
+	path = str(tmp_path / 'games.abla')
+	game = random_game(4, 20)
+	moves = [delta.move for delta in game.history]
+	with GameArchiveWriter(path) as writer:
+		writer.write_game(moves)
+	with GameArchiveWriter(path) as writer:
+		writer.write_game(moves)
+	with GameArchiveReader(path) as reader:
+		assert len(reader) == 2
+
+	# Ohne Footer werden die Offsets durch einen Scan rekonstruiert
+	writer = GameArchiveWriter(path)
+	writer.write_game(moves)
+	writer.file.close()
+	with GameArchiveReader(path) as reader:
+		assert len(reader) == 3
+		assert list(reader[2].moves) == [encode_move(*move) for move in moves]
+
+
+@pytest.mark.parametrize('content', [b'', b'ABL', b'NOTANARCHIVE'])
+def test_archive_rejects_invalid_files(tmp_path, content):
+	path = tmp_path / 'broken.abla'
+	path.write_bytes(content)
+	with pytest.raises(ValueError):
+		GameArchiveReader(str(path))
@@ -0,0 +1,49 @@
+"""Tests für den persistenten Analyse-Cache (abalone_cache)"""
+
+from abalone import AbaloneAI, AbaloneGame, AIDifficulty, transform_mask
+from abalone_cache import AnalysisCache
+
+
+def test_analysis_cache_shares_symmetric_positions(tmp_path, random_game, generated):
+	game = random_game(8, 9)
+	black, white, black_score, white_score, player = game.snapshot()
+	mirrored = AbaloneGame.from_snapshot((transform_mask(white, 7), transform_mask(black, 7), white_score,
+										  black_score, 'B' if player == 'W' else 'W'))
+
+	with AnalysisCache(str(tmp_path / 'analysis.sqlite')) as cache:
+		ai = AbaloneAI(AIDifficulty.MEDIUM, analysis_cache=cache)
+		result = ai.search(game, game.current_player, depth=2)
+		assert len(cache) == 1
+
+		hits = cache.hits
+		cached = ai.search(mirrored, mirrored.current_player, depth=2)
+		assert cache.hits == hits + 1
+		assert (cached.depth, cached.score) == (result.depth, result.score)
+		line = mirrored.copy()
+		for move in cached.pv:
+			assert generated(move, line)
+			line.apply(move)
+
+
+def test_analysis_cache_separates_configurations(tmp_path, random_game):
+	game = random_game(9, 6)
+	with AnalysisCache(str(tmp_path / 'analysis.sqlite')) as cache:
+		hard = AbaloneAI(AIDifficulty.HARD, analysis_cache=cache)
+		medium = AbaloneAI(AIDifficulty.MEDIUM, analysis_cache=cache)
+		assert hard.cache_config() != medium.cache_config()
+
+		hard.search(game, game.current_player, depth=2)
+		assert cache.probe(game, game.current_player, 1, hard.cache_config()) is not None
+		assert cache.probe(game, game.current_player, 1, medium.cache_config()) is None
+		assert cache.probe(game, game.current_player, 3, hard.cache_config()) is None
+
+
+def test_analysis_cache_keeps_deeper_entry(tmp_path):
+	with AnalysisCache(str(tmp_path / 'analysis.sqlite')) as cache:
+		cache.put(42, 3, 1.5, 7, [7, 8])
+		cache.put(42, 2, -1.0, 9, [9])
+		entry = cache.get(42)
+		assert (entry.depth, entry.score, entry.move, entry.pv) == (3, 1.5, 7, [7, 8])
+		assert cache.get(42, min_depth=4) is None
+		cache.clear()
+		assert len(cache) == 0
@@ -0,0 +1,97 @@
+"""Tests für das textbasierte Engine-Protokoll (abalone_engine)"""
+
+import io
+import time
+
+import pytest
+
+from abalone import AbaloneGame
+from abalone_archive import decode_move, encode_move
+from abalone_engine import EngineProtocol
+
+
+@pytest.fixture
+def engine():
+	protocol = EngineProtocol(io.StringIO())
+	yield protocol
+	protocol.stop_search()
+
+
+def output(engine):
+	return engine.output.getvalue().splitlines()
+
+
+def finish(engine):
+	"""Wartet auf das Ende der laufenden Suche und liefert den Zugcode aus ``bestmove``"""
+	engine.search_thread.join(timeout=60)
+	assert not engine.search_thread.is_alive()
+	last = output(engine)[-1]
+	assert last.startswith('bestmove ')
+	return last.split()[1]
+
+
+def test_handshake_and_options(engine):
+	engine.handle('abi')
+	engine.handle('isready')
+	lines = output(engine)
+	assert lines[0].startswith('id name') and lines[-2:] == ['abiok', 'readyok']
+
+	engine.handle('setoption name Difficulty value hard')
+	assert engine.ai.difficulty.name == 'HARD'
+	engine.handle('setoption name Difficulty value impossible')
+	assert output(engine)[-1].startswith('info string Fehler')
+	assert engine.handle('quit') is False
+
+
+def test_go_reports_info_and_a_legal_bestmove(engine):
+	engine.handle('position startpos moves ' + str(encode_move(*AbaloneGame().generate_moves()[0])))
+	engine.handle('go depth 2')
+	code = finish(engine)
+	infos = [line for line in output(engine) if line.startswith('info depth')]
+	assert [line.split()[2] for line in infos] == ['1', '2']
+	assert engine.game.copy().make_move(*decode_move(int(code)))
+
+
+def test_stop_right_after_go_infinite(engine):
+	real_search = engine.ai.search
+
+	def delayed_search(*args, **kwargs):
+		time.sleep(0.1)  # Das ``stop`` kommt an, bevor die Suche beginnt
+		return real_search(*args, **kwargs)
+
+	engine.ai.search = delayed_search
+	engine.handle('go infinite')
+	engine.handle('stop')
+	assert engine.search_thread is None
+	assert output(engine)[-1].startswith('bestmove ')
+
+
+def test_failed_search_still_sends_bestmove(engine):
+	def broken_search(*args, **kwargs):
+		raise RuntimeError("Worker abgestürzt")
+
+	engine.ai.search = broken_search
+	engine.handle('go depth 1')
+	assert finish(engine) == 'none'
+	assert 'RuntimeError' in output(engine)[-2] and output(engine)[-2].startswith('info string')
+
+
+def test_go_searches_with_the_game_history(engine, shuffle):
+	codes = [encode_move(*move) for move in shuffle(AbaloneGame())]
+	engine.handle('position startpos moves ' + ' '.join(map(str, codes * 2)))
+	assert engine.game.draw_reason() == 'repetition'
+
+	searched = []
+	engine.ai.search = lambda game, *args: searched.append(game) or engine.ai.__class__.search(
+		engine.ai, game, *args)
+	engine.handle('go depth 1')
+	finish(engine)
+	assert searched[0].repetitions() == 3
+
+
+def test_invalid_positions_are_reported(engine):
+	engine.handle('position startpos moves 99999')
+	engine.handle('position snapshot BW 0 0 B')
+	engine.handle('position somewhere')
+	assert sum(line.startswith('info string Fehler') for line in output(engine)) == 3
+	assert engine.game.snapshot() == AbaloneGame().snapshot()
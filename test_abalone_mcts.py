@@ -0,0 +1,60 @@
+"""Tests für die Monte-Carlo-Baumsuche (abalone_mcts)"""
+
+import pytest
+
+import abalone_mcts
+from abalone import AbaloneGame, AIDifficulty, Player
+from abalone_mcts import MCTSAI, _worker_visits
+
+
+@pytest.fixture
+def worker_cache(monkeypatch):
+	cache = {}
+	monkeypatch.setattr(abalone_mcts, '_WORKER_AI', cache)
+	return cache
+
+
+def worker_search(ai, game, worker, node_limit=200):
+	return _worker_visits(game.snapshot(), ai.difficulty.value, ai.profile, ai.weights, ai.ntuple_weights,
+						  ai.cache_config(), worker, node_limit, None)
+
+
+def test_search_returns_a_legal_move_within_budget(random_game):
+	game = random_game(4, 10)
+	ai = MCTSAI(AIDifficulty.MEDIUM)
+	result = ai.search(game, game.current_player, node_limit=100)
+	assert game.is_legal(result.move)
+	assert result.nodes == 100
+	assert result.pv[0] == result.move
+
+
+def test_workers_diverge_reproducibly(random_game, worker_cache):
+	game = random_game(2, 6)
+	ai = MCTSAI(AIDifficulty.MEDIUM)
+	visits = []
+	for worker in (1, 2, 1):
+		worker_cache.clear()  # Ohne wiederverwendeten Baum
+		visits.append(worker_search(ai, game, worker)[0])
+	assert visits[0] != visits[1]
+	assert visits[0] == visits[2]
+
+
+def test_worker_rebuilds_ai_for_new_weights(worker_cache):
+	game = AbaloneGame()
+	ai = MCTSAI(AIDifficulty.MEDIUM)
+	_, nodes = worker_search(ai, game, 1, node_limit=50)
+	assert nodes == 50
+	changed = MCTSAI(AIDifficulty.MEDIUM, weights={**ai.weights, 'center': ai.weights['center'] + 5})
+	worker_search(changed, game, 1, node_limit=50)
+	assert [worker.weights for worker in worker_cache.values()] == [changed.weights]
+
+
+def test_parallel_search_counts_worker_simulations():
+	game = AbaloneGame()
+	ai = MCTSAI(AIDifficulty.MEDIUM, workers=3)
+	try:
+		result = ai.search(game, Player.BLACK, node_limit=40)
+	finally:
+		ai.close()
+	assert result.nodes == 3 * 40
+	assert game.is_legal(result.move)
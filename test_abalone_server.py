@@ -0,0 +1,131 @@
+"""Tests für den Spielserver (abalone_server) ohne Prozesse und Netzwerk"""
+
+import asyncio
+import json
+
+import pytest
+
+import abalone_server
+from abalone import AbaloneGame
+from abalone_archive import encode_move
+from abalone_server import AbaloneServer, EngineBusy
+
+
+class InlinePool:
+	"""Engine-Pool, der die Worker-Funktion im Testprozess aufruft"""
+
+	def __init__(self, max_pending=64):
+		abalone_server._init_worker()
+		self.max_pending = max_pending
+		self.pending = 0
+		self.searches = []
+
+	def check_capacity(self):
+		if self.pending >= self.max_pending:
+			raise EngineBusy()
+
+	async def search(self, snapshot, difficulty, time_limit, position_counts=None, quiet_plies=0):
+		self.check_capacity()
+		self.searches.append((snapshot, position_counts, quiet_plies))
+		return abalone_server._worker_search(snapshot, difficulty.value, time_limit, position_counts, quiet_plies)
+
+	def metrics(self):
+		return {'pending': self.pending}
+
+
+@pytest.fixture
+def server():
+	return AbaloneServer(InlinePool())
+
+
+def request(server, **message):
+	return asyncio.run(server.handle_line(json.dumps(message).encode('utf-8')))
+
+
+def test_repetition_ends_a_server_game(server, shuffle):
+	state = request(server, id=1, op='new_game', ai=None)
+	assert state['ok'] and state['draw_reason'] is None
+	codes = [encode_move(*move) for move in shuffle(AbaloneGame())]
+	for code in codes * 2:
+		state = request(server, op='move', game=state['game'], move=code)
+		assert state['ok'], state
+	assert state['draw_reason'] == 'repetition' and state['winner'] is None
+
+	response = request(server, op='move', game=state['game'], move=codes[0])
+	assert not response['ok'] and response['error'] == "Die Partie ist beendet"
+
+
+def test_ai_search_sees_the_game_history(server, shuffle):
+	state = request(server, op='new_game', ai='W', difficulty='medium', time_limit=1)
+	moves = shuffle(AbaloneGame())
+	game_id = state['game']
+	session = server.sessions[game_id]
+
+	# Die KI spielt Weiß; ihre Suche bekommt Wiederholungszähler und ruhige Halbzüge mit
+	state = request(server, op='move', game=game_id, move=encode_move(*moves[0]))
+	assert state['ok'] and state['ply'] == 2
+	snapshot, counts, quiet = server.pool.searches[-1]
+	assert quiet == 1 and sum(counts.values()) == 2
+	assert session.quiet_plies == 2 and len(session.position_counts) == 3
+
+
+@pytest.mark.parametrize('line', [
+	b'not json', b'[1]', b'{"op": "nope"}', b'{"op": [1]}', b'\xff',
+	b'{"op": "new_game", "time_limit": null}', b'{"op": "new_game", "time_limit": NaN}',
+	b'{"op": "new_game", "time_limit": 0}', b'{"op": "new_game", "time_limit": true}',
+	b'{"op": "new_game", "ai": 5}', b'{"op": "new_game", "difficulty": ["hard"]}',
+	b'{"op": "new_game", "difficulty": "impossible"}',
+	b'{"op": "state", "game": [1]}', b'{"op": "state", "game": true}', b'{"op": "state", "game": 99}',
+])
+def test_malformed_requests_get_an_error_reply(server, line):
+	response = asyncio.run(server.handle_line(line))
+	assert response['ok'] is False and response['error']
+
+
+def test_invalid_moves_are_rejected(server):
+	state = request(server, op='new_game', ai=None)
+	for move in ([1], 'x', 2 ** 20, encode_move(*AbaloneGame().generate_moves()[0]) ^ 1 << 11):
+		response = request(server, id=7, op='move', game=state['game'], move=move)
+		assert response['id'] == 7 and response['ok'] is False
+	assert request(server, op='state', game=state['game'])['ply'] == 0
+
+
+def test_game_lifecycle(server):
+	state = request(server, op='new_game', ai='B', difficulty='easy', time_limit=100)
+	assert state['ok'] and state['ai_move'] is not None and state['ply'] == 1 and state['to_move'] == 'W'
+	assert server.sessions[state['game']].time_limit == abalone_server.MAX_TIME_LIMIT
+
+	response = request(server, op='ai_move', game=state['game'])
+	assert response['ok'] is False  # Weiß ist am Zug, nicht die KI
+	assert request(server, op='metrics')['sessions'] == 1
+	assert request(server, op='close_game', game=state['game'])['ok']
+	assert request(server, op='state', game=state['game'])['ok'] is False
+
+
+def test_busy_pool_leaves_the_game_unchanged(server):
+	state = request(server, op='new_game', ai='W')
+	server.pool.max_pending = 0
+	move = encode_move(*AbaloneGame().generate_moves()[0])
+	response = request(server, op='move', game=state['game'], move=move)
+	assert response == {'id': None, 'ok': False, 'error': 'busy'}
+	assert request(server, op='state', game=state['game'])['ply'] == 0
+
+
+def test_connection_survives_bad_lines(server):
+	async def session():
+		tcp = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+		port = tcp.sockets[0].getsockname()[1]
+		client = await abalone_server.LocalClient.connect('127.0.0.1', port)
+		try:
+			client.writer.write(b'{"op": "state", "game": [1]}\n')
+			first = json.loads(await client.reader.readline())
+			second = await client.request('new_game', ai=None)
+		finally:
+			await client.close()
+			tcp.close()
+			await tcp.wait_closed()
+		return first, second
+
+	first, second = asyncio.run(session())
+	assert first['ok'] is False
+	assert second['ok'] is True